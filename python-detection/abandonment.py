@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Abandonment Engine - decide "left behind" over time instead of from one frame
+Objects are tracked per camera (tracker.SortTracker) and each track keeps how
+long it has been stationary, how long no person has been within the
+isolation radius (object x person distance matrix per frame) and a decayed
+confidence. An 'abandoned' event is emitted once per object, only after the
+config.py context rules (stationary_frames, isolation_radius,
+min_observation_time, confidence_decay) are all met.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import DETECTION_CONFIG, SMART_FILTERS
+from geometry import as_boxes
+from tracker import SortTracker
+
+logger = logging.getLogger(__name__)
+
+_POSITION_RULES = DETECTION_CONFIG['context_rules']['position_filters']
+_TEMPORAL_RULES = SMART_FILTERS['temporal_rules']
+
+# Person detections below this confidence do not count as an owner nearby
+MIN_PERSON_CONFIDENCE = 0.5
+# An object still counts as stationary if its center moved less than this
+# fraction of the frame's shorter side (or 10% of its own size)
+STATIONARY_TOLERANCE = 0.02
+
+
+def box_centers(boxes: np.ndarray) -> np.ndarray:
+    """(N, 4) xyxy -> (N, 2) centers"""
+    return (boxes[:, :2] + boxes[:, 2:]) / 2.0
+
+
+def nearest_person_distances(object_boxes, person_boxes, fmt: str = 'xyxy') -> np.ndarray:
+    """Distance from each object center to the closest person center (inf without people)"""
+    objects = box_centers(as_boxes(object_boxes, fmt))
+    people = box_centers(as_boxes(person_boxes, fmt))
+    if not len(people):
+        return np.full(len(objects), np.inf)
+    distances = np.linalg.norm(objects[:, None, :] - people[None, :, :], axis=2)
+    return distances.min(axis=1)
+
+
+def proximity_thresholds(object_boxes, image_size: Tuple[int, int], radius: float,
+                         fmt: str = 'xyxy') -> np.ndarray:
+    """Per-object "near a person" distance: radius x the frame's shorter side, or 2x the object size"""
+    boxes = as_boxes(object_boxes, fmt)
+    height, width = image_size
+    object_size = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+    return np.maximum(min(width, height) * radius, object_size * 2)
+
+
+def people_boxes(people: List[Dict[str, Any]], min_confidence: float = MIN_PERSON_CONFIDENCE) -> List:
+    return [p['bbox'] for p in people if p.get('confidence', 0) >= min_confidence]
+
+
+class _ObjectState:
+    """Temporal evidence for one tracked object"""
+
+    __slots__ = ('anchor', 'stationary_frames', 'unattended_since', 'confidence', 'first_seen', 'alerted')
+
+    def __init__(self, center: np.ndarray, confidence: float, timestamp: float):
+        self.anchor = center
+        self.stationary_frames = 1
+        self.unattended_since: Optional[float] = None
+        self.confidence = confidence
+        self.first_seen = timestamp
+        self.alerted = False
+
+
+class AbandonmentEngine:
+    """
+    Per-camera abandonment state
+
+    update() takes one frame's object and person detections (xyxy 'bbox')
+    and returns (objects, events): the objects annotated with their temporal
+    state, and the objects that became abandoned in this frame.
+    """
+
+    def __init__(self, stationary_frames: int = _POSITION_RULES['stationary_frames'],
+                 isolation_radius: float = _POSITION_RULES['isolation_radius'],
+                 min_observation_time: float = _TEMPORAL_RULES['min_observation_time'],
+                 max_tracking_time: float = _TEMPORAL_RULES['max_tracking_time'],
+                 confidence_decay: float = _TEMPORAL_RULES['confidence_decay'],
+                 min_confidence: float = 0.5, max_missed_frames: int = 10):
+        self.stationary_frames = stationary_frames
+        self.isolation_radius = isolation_radius
+        self.min_observation_time = min_observation_time
+        self.max_tracking_time = max_tracking_time
+        self.confidence_decay = confidence_decay
+        self.min_confidence = min_confidence
+        self.tracker = SortTracker(iou_threshold=0.3, max_age=max_missed_frames, keep_finished=False)
+        self.last_update: Optional[float] = None
+
+    def update(self, objects: List[Dict[str, Any]], people: List[Dict[str, Any]],
+               image_size: Tuple[int, int], timestamp: Optional[float] = None
+               ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        self.last_update = timestamp
+        self.tracker.update(objects)
+
+        # Objects that were not seen this frame lose confidence
+        for track in self.tracker.tracks:
+            state = track.data.get('abandonment')
+            if state is not None and track.time_since_update > 0:
+                state.confidence *= self.confidence_decay
+
+        if not objects:
+            return objects, []
+
+        boxes = as_boxes([o['bbox'] for o in objects])
+        centers = box_centers(boxes)
+        nearest = nearest_person_distances(boxes, people_boxes(people))
+        thresholds = proximity_thresholds(boxes, image_size, self.isolation_radius)
+        tolerances = np.maximum(min(image_size) * STATIONARY_TOLERANCE,
+                                0.1 * np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]))
+
+        events = []
+        for i, obj in enumerate(objects):
+            track = self.tracker.get(obj['track_id'])
+            state = track.data.get('abandonment')
+            confidence = float(obj.get('confidence', 0))
+
+            if state is None:
+                state = track.data['abandonment'] = _ObjectState(centers[i], confidence, timestamp)
+            elif timestamp - state.first_seen > self.max_tracking_time:
+                # Observation window ran out: collect the evidence afresh, but an object
+                # that was already reported stays reported (one alert per object)
+                fresh = _ObjectState(centers[i], confidence, timestamp)
+                fresh.unattended_since, fresh.alerted = state.unattended_since, state.alerted
+                state = track.data['abandonment'] = fresh
+            else:
+                state.confidence = max(confidence, state.confidence * self.confidence_decay)
+                if np.linalg.norm(centers[i] - state.anchor) <= tolerances[i]:
+                    state.stationary_frames += 1
+                else:
+                    state.anchor = centers[i]
+                    state.stationary_frames = 1
+
+            attended = bool(nearest[i] <= thresholds[i])
+            if attended:
+                state.unattended_since = None
+            elif state.unattended_since is None:
+                state.unattended_since = timestamp
+            unattended_seconds = 0.0 if attended else timestamp - state.unattended_since
+
+            abandoned = (not attended
+                         and state.stationary_frames >= self.stationary_frames
+                         and unattended_seconds >= self.min_observation_time
+                         and state.confidence >= self.min_confidence)
+            obj.update({
+                'near_person': attended,
+                'nearest_person_distance': None if np.isinf(nearest[i]) else float(nearest[i]),
+                'stationary_frames': state.stationary_frames,
+                'unattended_seconds': unattended_seconds,
+                'abandonment_confidence': state.confidence,
+                'abandoned': abandoned or state.alerted
+            })
+            if abandoned and not state.alerted:
+                state.alerted = True
+                events.append(obj)
+                logger.info(f"🚨 {obj.get('class')} (track {track.id}) abandoned: "
+                            f"unattended {unattended_seconds:.0f}s, still for {state.stationary_frames} frames")
+        return objects, events
+
+
+class AbandonmentMonitor:
+    """
+    One AbandonmentEngine per camera id; cameras that go quiet are forgotten
+
+    Client timestamps only drive their own camera's engine (each camera may
+    use video time or wall-clock time); idle expiry uses the monotonic time
+    at which the monitor last heard from each camera.
+    """
+
+    def __init__(self, idle_timeout: float = _TEMPORAL_RULES['max_tracking_time'], **engine_kwargs):
+        self.idle_timeout = idle_timeout
+        self.engine_kwargs = engine_kwargs
+        self._engines: Dict[str, AbandonmentEngine] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(self, camera_id: str, objects: List[Dict[str, Any]], people: List[Dict[str, Any]],
+               image_size: Tuple[int, int], timestamp: Optional[float] = None
+               ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        with self._lock:
+            now = time.monotonic()
+            self._expire_idle(now)
+            self._last_seen[camera_id] = now
+            engine = self._engines.get(camera_id)
+            if engine is None:
+                engine = self._engines[camera_id] = AbandonmentEngine(**self.engine_kwargs)
+                self._locks[camera_id] = threading.Lock()
+            camera_lock = self._locks[camera_id]
+        # Frames of one camera are applied in order, cameras run in parallel
+        with camera_lock:
+            return engine.update(objects, people, image_size, timestamp)
+
+    def _expire_idle(self, now: float):
+        idle = [camera_id for camera_id, last_seen in self._last_seen.items()
+                if now - last_seen > self.idle_timeout]
+        for camera_id in idle:
+            del self._engines[camera_id]
+            del self._locks[camera_id]
+            del self._last_seen[camera_id]
+
+    def reset(self, camera_id: Optional[str] = None):
+        with self._lock:
+            if camera_id is None:
+                self._engines.clear()
+                self._locks.clear()
+                self._last_seen.clear()
+            else:
+                self._engines.pop(camera_id, None)
+                self._locks.pop(camera_id, None)
+                self._last_seen.pop(camera_id, None)
+
+    @property
+    def cameras(self) -> List[str]:
+        return list(self._engines)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Artifact Store - content-addressed storage for crops and annotated frames
+Images are encoded once, named by the SHA-256 of their bytes and written
+atomically into a per-request namespace directory, so concurrent requests
+never overwrite each other and identical crops within a request are stored
+once. Responses reference artifacts by URL instead of inlining base64.
+A background GC deletes whole namespaces past the age quota, then the
+oldest ones until the store fits its byte quota.
+"""
+
+import os
+import re
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.getenv('ARTIFACT_DIR', 'artifacts')
+ARTIFACT_BASE_URL = os.getenv('ARTIFACT_BASE_URL', 'http://localhost:5002/artifacts')
+ARTIFACT_MAX_BYTES = int(os.getenv('ARTIFACT_MAX_MB', '1024')) * 1024 * 1024
+ARTIFACT_MAX_AGE = float(os.getenv('ARTIFACT_MAX_AGE_HOURS', '168')) * 3600
+ARTIFACT_GC_INTERVAL = float(os.getenv('ARTIFACT_GC_INTERVAL_SECONDS', '300'))
+
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+_FILE_PATTERN = re.compile(r'^[0-9a-f]{64}\.[a-z]{2,4}$')
+
+
+class Artifact(NamedTuple):
+    namespace: str
+    name: str
+    path: str
+    url: str
+    size: int
+
+
+class ArtifactStore:
+    """
+    Namespaced, content-addressed file store
+
+    put_image()/put_bytes() return an Artifact with its absolute path and
+    URL (base_url/<namespace>/<sha256>.<ext>). Namespaces are removed as a
+    whole by gc(), so a request's artifacts stay consistent.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR, base_url: str = ARTIFACT_BASE_URL,
+                 max_bytes: int = ARTIFACT_MAX_BYTES, max_age: float = ARTIFACT_MAX_AGE,
+                 gc_interval: float = ARTIFACT_GC_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.gc_interval = gc_interval
+        self.removed_namespaces = 0
+        self.freed_bytes = 0
+        self._gc_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def new_namespace(hint: Optional[str] = None) -> str:
+        """A namespace name: the hint (e.g. a request id) if usable, otherwise a fresh id"""
+        if hint and _NAME_PATTERN.match(hint):
+            return hint
+        return uuid.uuid4().hex
+
+    def _namespace_dir(self, namespace: str) -> str:
+        if not _NAME_PATTERN.match(namespace):
+            raise ValueError(f"Invalid artifact namespace: {namespace}")
+        return os.path.join(self.root, namespace)
+
+    def put_bytes(self, data: bytes, namespace: str, extension: str = '.jpg') -> Artifact:
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{digest}{extension.lower()}"
+        directory = self._namespace_dir(namespace)
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            # Same name means same bytes, so a concurrent writer's replace is harmless
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return Artifact(namespace, name, path, f"{self.base_url}/{namespace}/{name}", len(data))
+
+    def put_image(self, image: np.ndarray, namespace: str, extension: str = '.jpg',
+                  params: Optional[List[int]] = None) -> Artifact:
+        """Encode an image once and store it"""
+        if params is None and extension == '.jpg':
+            params = [cv2.IMWRITE_JPEG_QUALITY, 95]
+        ok, encoded = cv2.imencode(extension, image, params or [])
+        if not ok:
+            raise ValueError(f"Could not encode image as {extension}")
+        return self.put_bytes(encoded.tobytes(), namespace, extension)
+
+    def path(self, namespace: str, name: str) -> str:
+        """Absolute path of a stored artifact; FileNotFoundError for anything else"""
+        if not _NAME_PATTERN.match(namespace) or not _FILE_PATTERN.match(name):
+            raise FileNotFoundError(f"{namespace}/{name}")
+        path = os.path.join(self.root, namespace, name)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{namespace}/{name}")
+        return path
+
+    def _namespaces(self) -> List[Dict[str, Any]]:
+        namespaces = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                size, newest = 0, entry.stat().st_mtime
+                for item in os.scandir(entry.path):
+                    stat = item.stat()
+                    size += stat.st_size
+                    newest = max(newest, stat.st_mtime)
+            except FileNotFoundError:
+                continue  # removed by a concurrent GC
+            namespaces.append({'name': entry.name, 'path': entry.path, 'bytes': size, 'mtime': newest})
+        return namespaces
+
+    def gc(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Apply the age quota, then the byte quota (oldest namespaces first)"""
+        now = time.time() if now is None else now
+        removed, freed = 0, 0
+        with self._gc_lock:
+            namespaces = sorted(self._namespaces(), key=lambda ns: ns['mtime'])
+            total = sum(ns['bytes'] for ns in namespaces)
+            for ns in namespaces:
+                if now - ns['mtime'] <= self.max_age and total <= self.max_bytes:
+                    break
+                shutil.rmtree(ns['path'], ignore_errors=True)
+                total -= ns['bytes']
+                removed += 1
+                freed += ns['bytes']
+            self.removed_namespaces += removed
+            self.freed_bytes += freed
+        if removed:
+            logger.info(f"🧹 Artifact GC removed {removed} namespace(s), {freed / 1024 / 1024:.1f} MB")
+        return {'removed_namespaces': removed, 'freed_bytes': freed, 'bytes': total}
+
+    def _run_gc(self):
+        while not self._stop.wait(self.gc_interval):
+            try:
+                self.gc()
+            except Exception as e:
+                logger.error(f"❌ Artifact GC failed: {e}")
+
+    def start_gc(self) -> 'ArtifactStore':
+        """Run gc() every gc_interval seconds on a daemon thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run_gc, name='artifact-gc', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop_gc(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = self._namespaces()
+        return {
+            'root': self.root,
+            'namespaces': len(namespaces),
+            'bytes': sum(ns['bytes'] for ns in namespaces),
+            'max_bytes': self.max_bytes,
+            'max_age_seconds': self.max_age,
+            'removed_namespaces': self.removed_namespaces,
+            'freed_bytes': self.freed_bytes
+        }
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide store configured through the environment, GC thread started"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore().start_gc()
+        return _store
+
+
+def create_artifacts_blueprint(store: ArtifactStore, url_prefix: str = '/artifacts'):
+    """Blueprint serving stored artifacts (immutable, so cacheable for a year)"""
+    from flask import Blueprint, jsonify, send_file
+
+    blueprint = Blueprint('artifacts', __name__)
+
+    @blueprint.route(f'{url_prefix}/<namespace>/<name>', methods=['GET'])
+    def get_artifact(namespace: str, name: str):
+        try:
+            path = store.path(namespace, name)
+        except FileNotFoundError:
+            return jsonify({'error': 'Artifact not found'}), 404
+        response = send_file(path, conditional=True, etag=name.split('.')[0], max_age=365 * 24 * 3600)
+        response.headers['Cache-Control'] += ', immutable'
+        return response
+
+    return blueprint
@@ -0,0 +1,17 @@
+"""
+Detector benchmark suite
+Run from python-detection/: python -m benchmarks --help
+"""
+
+from .synthetic_videos import SPEC_SETS, VideoSpec, create_benchmark_videos, create_synthetic_video
+from .runner import DETECTORS, compare_to_baseline, run_detector_subprocess
+
+__all__ = [
+    'SPEC_SETS',
+    'VideoSpec',
+    'create_benchmark_videos',
+    'create_synthetic_video',
+    'DETECTORS',
+    'compare_to_baseline',
+    'run_detector_subprocess',
+]
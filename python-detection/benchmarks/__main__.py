@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+📊 DETECTOR BENCHMARKS
+Usage: python -m benchmarks [--detectors unified strict] [--specs quick]
+                            [--baseline benchmarks/baseline.json] [--save-baseline PATH]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from .synthetic_videos import SPEC_SETS, create_benchmark_videos
+from .runner import DETECTORS, compare_to_baseline, environment_info, run_detector_subprocess
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark every detector on synthetic videos')
+    parser.add_argument('--detectors', nargs='*', default=list(DETECTORS), choices=list(DETECTORS))
+    parser.add_argument('--specs', default='default', choices=list(SPEC_SETS), help='Synthetic video set')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per video')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per video')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default='benchmark_output')
+    parser.add_argument('--output', default=None, help='Report path (default: <output-dir>/benchmark_results.json)')
+    parser.add_argument('--baseline', default=None, help='Previous report to compare against')
+    parser.add_argument('--save-baseline', default=None, help='Also write this report as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative regression')
+    parser.add_argument('--timeout', type=float, default=1800, help='Seconds per detector')
+    args = parser.parse_args()
+
+    output_dir = os.path.abspath(args.output_dir)
+    specs = SPEC_SETS[args.specs]
+    print(f"🎬 Building {len(specs)} synthetic videos ({args.specs})...")
+    paths = create_benchmark_videos(specs, os.path.join(output_dir, 'videos'), seed=args.seed)
+    videos = {
+        spec.name: {'path': paths[spec.name], 'frames': spec.total_frames,
+                    'resolution': f"{spec.width}x{spec.height}", 'objects': spec.objects, 'people': spec.people}
+        for spec in specs
+    }
+
+    results = {'environment': environment_info(), 'videos': videos, 'detectors': []}
+    for name in args.detectors:
+        print(f"⏱️  {name}...", flush=True)
+        result = run_detector_subprocess(name, videos, output_dir, args.repeat, args.warmup, args.timeout)
+        results['detectors'].append(result)
+        if result.get('status') == 'ok':
+            print(f"   {result['frames_per_second']} fps, p95 {result['latency_p95']}s, "
+                  f"load {result['model_load_time']}s, peak RSS {result['peak_rss_mb']} MB")
+        else:
+            print(f"   ❌ {result['status']}: {result.get('error')}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare_to_baseline(results, json.load(f), args.tolerance)
+        results['baseline'] = {'path': args.baseline, 'tolerance': args.tolerance, 'comparison': comparison}
+        for name, entry in comparison.items():
+            for metric, values in entry['metrics'].items():
+                if values['regression']:
+                    print(f"⚠️ {name} {metric}: {values['baseline']} -> {values['current']} ({values['change']:+.1%})")
+        if any(entry['regressed'] for entry in comparison.values()):
+            exit_code = 2
+
+    output = args.output or os.path.join(output_dir, 'benchmark_results.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    for path in filter(None, [output, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"📄 Report saved: {output}")
+
+    if any(d.get('status') != 'ok' for d in results['detectors']):
+        exit_code = exit_code or 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
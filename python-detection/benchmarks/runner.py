@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner
+Each detector runs in its own worker process (so peak RSS and model-load
+time are per detector) and calls the detector's Python API directly on the
+synthetic videos - no HTTP services needed.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import platform
+import resource
+import subprocess
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DETECTION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_COMMAND = 'import sys; from benchmarks.runner import worker_main; sys.exit(worker_main(sys.argv[1], sys.argv[2]))'
+
+
+def _unified():
+    # Importing the API module builds its UnifiedDetector (and Flask app)
+    import unified_detection_api
+    return unified_detection_api.detector, lambda d, path: d.process_video(path)
+
+
+def _strict():
+    from strict_suitcase_detector import StrictSuitcaseDetector
+    return StrictSuitcaseDetector(confidence_threshold=0.05), lambda d, path: d.detect_main_suitcase(path)
+
+
+def _robust():
+    from robust_object_detector import RobustLostObjectDetector
+    return RobustLostObjectDetector(confidence_threshold=0.4), lambda d, path: d.detect_lost_objects(path)
+
+
+def _single():
+    from single_object_detector import SingleObjectDetector
+    return SingleObjectDetector(confidence_threshold=0.8), lambda d, path: d.detect_single_object(path)
+
+
+def _ultra():
+    from ultra_enhanced_detector import UltraEnhancedDetector
+    return UltraEnhancedDetector(confidence_threshold=0.85), lambda d, path: d.process_video_ultra_enhanced(path)
+
+
+def _smart():
+    from smart_lost_object_detector import SmartLostObjectDetector
+    return SmartLostObjectDetector(), lambda d, path: d.detect_lost_objects(path)
+
+
+# name -> factory returning (detector, run(detector, video_path))
+DETECTORS: Dict[str, Callable[[], Tuple[Any, Callable[[Any, str], Any]]]] = {
+    'unified': _unified,
+    'strict': _strict,
+    'robust': _robust,
+    'single': _single,
+    'ultra': _ultra,
+    'smart': _smart,
+}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 4) if values else None
+
+
+def run_worker(detector_name: str, videos: Dict[str, Dict[str, Any]], repeat: int, warmup: int) -> Dict[str, Any]:
+    """Benchmark one detector inside the current process"""
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    detector, run = DETECTORS[detector_name]()
+    load_time = time.perf_counter() - start
+
+    per_video = {}
+    all_latencies = []
+    total_frames = 0
+    total_time = 0.0
+
+    for video_name, video in videos.items():
+        for _ in range(warmup):
+            run(detector, video['path'])
+
+        latencies = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            run(detector, video['path'])
+            latencies.append(time.perf_counter() - t0)
+
+        frames = video['frames'] * repeat
+        elapsed = sum(latencies)
+        total_frames += frames
+        total_time += elapsed
+        all_latencies.extend(latencies)
+        per_video[video_name] = {
+            'runs': repeat,
+            'frames_per_second': round(frames / elapsed, 2) if elapsed else None,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'latency_p99': percentile(latencies, 99),
+        }
+
+    return {
+        'detector': detector_name,
+        'status': 'ok',
+        'model_load_time': round(load_time, 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_before_load_mb': round(rss_before, 1),
+        'frames_per_second': round(total_frames / total_time, 2) if total_time else None,
+        'latency_p50': percentile(all_latencies, 50),
+        'latency_p95': percentile(all_latencies, 95),
+        'latency_p99': percentile(all_latencies, 99),
+        'videos': per_video,
+    }
+
+
+def _prepare_workdir(workdir: str):
+    """Detectors write crops/reports relative to cwd; give them a scratch dir with the local weights"""
+    os.makedirs(workdir, exist_ok=True)
+    for weights in glob.glob(os.path.join(DETECTION_DIR, 'yolov8*')):
+        link = os.path.join(workdir, os.path.basename(weights))
+        if not os.path.exists(link):
+            os.symlink(weights, link)
+
+
+def run_detector_subprocess(detector_name: str, videos: Dict[str, Dict[str, Any]], output_dir: str,
+                            repeat: int, warmup: int, timeout: float) -> Dict[str, Any]:
+    """Run one detector benchmark in a fresh Python process"""
+    workdir = os.path.join(output_dir, 'work', detector_name)
+    _prepare_workdir(workdir)
+    spec_path = os.path.join(workdir, 'benchmark_spec.json')
+    result_path = os.path.join(workdir, 'benchmark_result.json')
+    if os.path.exists(result_path):
+        os.remove(result_path)
+    with open(spec_path, 'w') as f:
+        json.dump({'detector': detector_name, 'videos': videos, 'repeat': repeat, 'warmup': warmup}, f)
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [DETECTION_DIR, env.get('PYTHONPATH')]))
+    cmd = [sys.executable, '-c', WORKER_COMMAND, spec_path, result_path]
+
+    try:
+        proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'detector': detector_name, 'status': 'timeout', 'error': f'No result after {timeout}s'}
+
+    if proc.returncode != 0 or not os.path.exists(result_path):
+        tail = (proc.stderr or proc.stdout or '').strip().splitlines()[-5:]
+        return {'detector': detector_name, 'status': 'error', 'returncode': proc.returncode, 'error': '\n'.join(tail)}
+
+    with open(result_path) as f:
+        return json.load(f)
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> Dict[str, Any]:
+    """
+    Relative change per detector against a saved baseline report
+
+    A metric regresses when it is worse than the baseline by more than
+    tolerance (fps lower, latency/RSS/load time higher).
+    """
+    higher_is_better = {'frames_per_second': True, 'latency_p50': False, 'latency_p95': False,
+                        'latency_p99': False, 'peak_rss_mb': False, 'model_load_time': False}
+    baseline_by_name = {d['detector']: d for d in baseline.get('detectors', [])}
+    comparison = {}
+
+    for current in results['detectors']:
+        name = current['detector']
+        previous = baseline_by_name.get(name)
+        if not previous or current.get('status') != 'ok' or previous.get('status') != 'ok':
+            continue
+
+        metrics = {}
+        for metric, better_up in higher_is_better.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            metrics[metric] = {
+                'baseline': old,
+                'current': new,
+                'change': round(change, 4),
+                'regression': (change < -tolerance) if better_up else (change > tolerance)
+            }
+        comparison[name] = {
+            'metrics': metrics,
+            'regressed': any(m['regression'] for m in metrics.values())
+        }
+    return comparison
+
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'inference_backend': os.getenv('INFERENCE_BACKEND', 'pytorch'),
+        'decode_backend': os.getenv('FRAME_DECODE_BACKEND', 'auto'),
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+def worker_main(spec_path: str, result_path: str) -> int:
+    """Entry point of the per-detector worker process"""
+    with open(spec_path) as f:
+        spec = json.load(f)
+    result = run_worker(spec['detector'], spec['videos'], spec['repeat'], spec['warmup'])
+    with open(result_path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return 0
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Synthetic benchmark videos
+Deterministic clips at several resolutions, lengths and object densities,
+built the same way as create_test_video() in the pipeline test scripts but
+seeded so every run benchmarks identical input.
+"""
+
+import os
+from typing import Dict, List, NamedTuple
+
+import cv2
+import numpy as np
+
+
+class VideoSpec(NamedTuple):
+    name: str
+    width: int
+    height: int
+    seconds: float
+    fps: float = 30.0
+    objects: int = 1          # static "lost" objects (suitcase-like boxes)
+    people: int = 0           # moving person-like shapes
+
+    @property
+    def total_frames(self) -> int:
+        return int(round(self.seconds * self.fps))
+
+
+# Small enough to run in CI, covering the resolutions and densities we see from cameras
+DEFAULT_SPECS: List[VideoSpec] = [
+    VideoSpec('480p_short_sparse', 640, 480, 3, objects=1),
+    VideoSpec('720p_medium_dense', 1280, 720, 10, objects=5, people=2),
+    VideoSpec('1080p_medium_sparse', 1920, 1080, 10, objects=1, people=1),
+]
+
+QUICK_SPECS: List[VideoSpec] = [
+    VideoSpec('360p_quick', 640, 360, 2, objects=2, people=1),
+]
+
+SPEC_SETS: Dict[str, List[VideoSpec]] = {
+    'default': DEFAULT_SPECS,
+    'quick': QUICK_SPECS,
+}
+
+# BGR colors used by the pipeline test scripts
+OBJECT_COLORS = [(101, 67, 33), (0, 255, 0), (255, 255, 0), (40, 40, 160), (90, 90, 90)]
+
+
+def create_synthetic_video(spec: VideoSpec, output_dir: str, seed: int = 0) -> str:
+    """Write the video for spec into output_dir (reused if already present)"""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{spec.name}_seed{seed}.mp4")
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return path
+
+    rng = np.random.default_rng(seed)
+    w, h = spec.width, spec.height
+
+    # Static background: floor gradient plus fixed noise texture
+    gradient = np.linspace(60, 140, h, dtype=np.float32)[:, None, None]
+    background = np.repeat(np.repeat(gradient, w, axis=1), 3, axis=2)
+    background += rng.normal(0, 6, size=(h, w, 3))
+    background = np.clip(background, 0, 255).astype(np.uint8)
+
+    objects = []
+    for i in range(spec.objects):
+        ow = int(rng.uniform(0.08, 0.2) * w)
+        oh = int(ow * rng.uniform(0.6, 1.2))
+        x = int(rng.uniform(0.05, 0.9) * (w - ow))
+        y = int(rng.uniform(0.5, 0.95) * (h - oh))
+        objects.append((x, y, ow, oh, OBJECT_COLORS[i % len(OBJECT_COLORS)]))
+
+    people = []
+    for _ in range(spec.people):
+        start_x = rng.uniform(0, w)
+        speed = rng.uniform(-4, 4) * w / 640.0
+        people.append((start_x, speed, int(0.12 * h), int(0.35 * h)))
+
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(path, fourcc, spec.fps, (w, h))
+    if not out.isOpened():
+        raise RuntimeError(f"Cannot write video: {path}")
+
+    try:
+        for frame_number in range(spec.total_frames):
+            frame = background.copy()
+
+            for x, y, ow, oh, color in objects:
+                cv2.rectangle(frame, (x, y), (x + ow, y + oh), color, -1)
+                # Handle on top, like the suitcase in create_test_video()
+                cv2.rectangle(frame, (x + ow // 2 - ow // 10, y - oh // 8), (x + ow // 2 + ow // 10, y), (50, 50, 50), -1)
+
+            for start_x, speed, pw, ph in people:
+                px = int((start_x + speed * frame_number) % w)
+                py = h - ph - h // 20
+                cv2.ellipse(frame, (px, py + ph // 2), (pw // 2, ph // 2), 0, 0, 360, (30, 30, 200), -1)
+                cv2.circle(frame, (px, py - pw // 3), pw // 3, (150, 180, 220), -1)
+
+            out.write(frame)
+    finally:
+        out.release()
+    return path
+
+
+def create_benchmark_videos(specs: List[VideoSpec], output_dir: str, seed: int = 0) -> Dict[str, str]:
+    """Build every spec and return {spec name: video path}"""
+    return {spec.name: create_synthetic_video(spec, output_dir, seed) for spec in specs}
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Detection Deduplication - indexed spatio-temporal merging for long videos
+Detections are merged into clusters of the same class whose last box overlaps
+(IoU) within a time window. Live clusters are indexed by class and coarse grid
+cell, so each detection is only compared with the few clusters near it and
+clusters that fall out of the time window leave the index: near-linear in
+video length. Each cluster keeps its best-confidence detection plus
+first/last-seen times, so the same item seen at different times stays apart.
+"""
+
+import os
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from geometry import as_boxes, iou_matrix
+
+DEFAULT_DEDUP_IOU = float(os.getenv('DEDUP_IOU_THRESHOLD', '0.5'))
+DEFAULT_DEDUP_TIME_WINDOW = float(os.getenv('DEDUP_TIME_WINDOW_SECONDS', '30'))
+DEFAULT_DEDUP_CELL_SIZE = int(os.getenv('DEDUP_CELL_SIZE', '128'))
+
+
+class _Cluster:
+    """One deduplicated object"""
+
+    __slots__ = ('id', 'label', 'best', 'box', 'cells', 'first_seen', 'last_seen',
+                 'first_frame', 'last_frame', 'occurrences')
+
+    def __init__(self, cluster_id: int, label: str, detection: Dict[str, Any], box,
+                 cells: List[Tuple[int, int]], first_seen: float, last_seen: float,
+                 first_frame: Optional[int], last_frame: Optional[int], occurrences: int):
+        self.id = cluster_id
+        self.label = label
+        self.best = detection
+        self.box = box
+        self.cells = cells
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.first_frame = first_frame
+        self.last_frame = last_frame
+        self.occurrences = occurrences
+
+
+class DetectionDeduplicator:
+    """
+    Streaming deduplicator over detection dicts
+
+    add() detections in (roughly) time order, then results() returns one
+    detection per object - the most confident one - with 'first_seen',
+    'last_seen' (seconds), 'first_frame', 'last_frame' and 'occurrences'.
+    Detections without a time_key value are all treated as simultaneous.
+    Already-merged results can be fed back in; their seen ranges are kept.
+    """
+
+    def __init__(self, iou_threshold: float = DEFAULT_DEDUP_IOU,
+                 time_window: float = DEFAULT_DEDUP_TIME_WINDOW,
+                 cell_size: int = DEFAULT_DEDUP_CELL_SIZE, bbox_format: str = 'xyxy',
+                 bbox_key: str = 'bbox', class_key: str = 'class',
+                 time_key: str = 'frame_timestamp', frame_key: str = 'frame_number',
+                 confidence_key: str = 'confidence'):
+        self.iou_threshold = iou_threshold
+        self.time_window = time_window
+        self.cell_size = max(1, int(cell_size))
+        self.bbox_format = bbox_format
+        self.bbox_key = bbox_key
+        self.class_key = class_key
+        self.time_key = time_key
+        self.frame_key = frame_key
+        self.confidence_key = confidence_key
+
+        self._clusters: List[_Cluster] = []
+        # (class, cell_x, cell_y) -> ids of clusters still inside the time window
+        self._index: Dict[Tuple[str, int, int], Set[int]] = defaultdict(set)
+        self._live: Set[int] = set()
+        self._latest_time = float('-inf')
+        self._last_sweep = float('-inf')
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def _cells(self, box) -> List[Tuple[int, int]]:
+        x1, y1, x2, y2 = (int(v // self.cell_size) for v in box)
+        return [(cx, cy) for cx in range(x1, x2 + 1) for cy in range(y1, y2 + 1)]
+
+    def _unindex(self, cluster: _Cluster):
+        for cell in cluster.cells:
+            key = (cluster.label, *cell)
+            ids = self._index.get(key)
+            if ids is not None:
+                ids.discard(cluster.id)
+                if not ids:
+                    del self._index[key]
+
+    def _sweep(self, now: float):
+        """Drop clusters that can no longer be matched from the index"""
+        cutoff = now - self.time_window
+        expired = [cid for cid in self._live if self._clusters[cid].last_seen < cutoff]
+        for cid in expired:
+            self._unindex(self._clusters[cid])
+            self._live.discard(cid)
+        self._last_sweep = now
+
+    def add(self, detection: Dict[str, Any]) -> int:
+        """Merge one detection; returns the id of the cluster it joined or started"""
+        label = str(detection.get(self.class_key))
+        box = as_boxes([detection[self.bbox_key]], self.bbox_format)[0]
+        timestamp = detection.get(self.time_key)
+        timestamp = float(timestamp) if isinstance(timestamp, (int, float)) else 0.0
+        first_seen = float(detection.get('first_seen', timestamp))
+        last_seen = float(detection.get('last_seen', timestamp))
+        frame = detection.get(self.frame_key)
+        first_frame = detection.get('first_frame', frame)
+        last_frame = detection.get('last_frame', frame)
+        occurrences = int(detection.get('occurrences', 1))
+
+        self._latest_time = max(self._latest_time, last_seen)
+        if self._latest_time - self._last_sweep > self.time_window:
+            self._sweep(self._latest_time)
+
+        cells = self._cells(box)
+        candidates = set()
+        for cell in cells:
+            candidates.update(self._index.get((label, *cell), ()))
+        # Gap between the detection's and the cluster's seen ranges (0 when they overlap)
+        candidates = [cid for cid in candidates
+                      if max(first_seen - self._clusters[cid].last_seen,
+                             self._clusters[cid].first_seen - last_seen, 0.0) <= self.time_window]
+
+        if candidates:
+            candidates.sort()
+            ious = iou_matrix(box[None, :], [self._clusters[cid].box for cid in candidates])[0]
+            best = int(ious.argmax())
+            if ious[best] > self.iou_threshold:
+                self._merge(self._clusters[candidates[best]], detection, box, cells, first_seen, last_seen,
+                            first_frame, last_frame, occurrences)
+                return candidates[best]
+
+        cluster = _Cluster(len(self._clusters), label, detection, box, cells, first_seen, last_seen,
+                           first_frame, last_frame, occurrences)
+        self._clusters.append(cluster)
+        self._live.add(cluster.id)
+        for cell in cells:
+            self._index[(label, *cell)].add(cluster.id)
+        return cluster.id
+
+    def best(self, cluster_id: int) -> Dict[str, Any]:
+        """The most confident detection merged into a cluster so far"""
+        return self._clusters[cluster_id].best
+
+    def _merge(self, cluster: _Cluster, detection: Dict[str, Any], box, cells,
+               first_seen: float, last_seen: float, first_frame, last_frame, occurrences: int):
+        if detection.get(self.confidence_key, 0) > cluster.best.get(self.confidence_key, 0):
+            cluster.best = detection
+        # Match against the latest box so slowly drifting objects stay one cluster
+        if last_seen >= cluster.last_seen:
+            self._unindex(cluster)
+            cluster.box = box
+            cluster.cells = cells
+            for cell in cells:
+                self._index[(cluster.label, *cell)].add(cluster.id)
+        if first_seen < cluster.first_seen:
+            cluster.first_seen, cluster.first_frame = first_seen, first_frame
+        if last_seen >= cluster.last_seen:
+            cluster.last_seen, cluster.last_frame = last_seen, last_frame
+        cluster.occurrences += occurrences
+
+    def add_many(self, detections: Iterable[Dict[str, Any]]):
+        for detection in detections:
+            self.add(detection)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """One detection per object, in order of first appearance"""
+        merged = []
+        for cluster in sorted(self._clusters, key=lambda c: (c.first_seen, c.id)):
+            detection = dict(cluster.best)
+            detection.update({
+                'first_seen': cluster.first_seen,
+                'last_seen': cluster.last_seen,
+                'first_frame': cluster.first_frame,
+                'last_frame': cluster.last_frame,
+                'occurrences': cluster.occurrences
+            })
+            merged.append(detection)
+        return merged
+
+
+def deduplicate_detections(detections: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+    """Deduplicate a finished list of detections (see DetectionDeduplicator for options)"""
+    deduplicator = DetectionDeduplicator(**kwargs)
+    time_key = kwargs.get('time_key', 'frame_timestamp')
+
+    def sort_key(d):
+        value = d.get('first_seen', d.get(time_key))
+        return value if isinstance(value, (int, float)) else 0.0
+
+    deduplicator.add_many(sorted(detections, key=sort_key))
+    return deduplicator.results()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Detection Jobs - asynchronous video detection
+Uploads are queued as jobs and processed by a worker pool, so HTTP requests
+return a job id immediately and clients poll for progress and results.
+"""
+
+import os
+import uuid
+import time
+import logging
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Blueprint, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the job queue cannot accept more work"""
+
+
+class DetectionJob:
+    """State of one queued detection run"""
+
+    def __init__(self, kind: str, filename: str, job_id: Optional[str] = None):
+        self.id = job_id or str(uuid.uuid4())
+        self.kind = kind
+        self.filename = filename
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.frames_processed = 0
+        self.total_frames = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # Detections reported while the job is still running (streaming ingest)
+        self.partial_detections: List[Dict[str, Any]] = []
+        self._partial_lock = threading.Lock()
+
+    def update_progress(self, frames_processed: int, total_frames: int):
+        """Progress callback handed to the detectors"""
+        self.frames_processed = frames_processed
+        self.total_frames = total_frames
+
+    def add_partial_detections(self, detections: List[Dict[str, Any]]):
+        """Detections callback handed to the detectors; visible before the job completes"""
+        with self._partial_lock:
+            self.partial_detections.extend(detections)
+
+    @property
+    def progress(self) -> Optional[float]:
+        if self.status == 'completed':
+            return 1.0
+        if not self.total_frames:
+            return None
+        return min(1.0, self.frames_processed / self.total_frames)
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        def iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'filename': self.filename,
+            'status': self.status,
+            'created_at': iso(self.created_at),
+            'started_at': iso(self.started_at),
+            'finished_at': iso(self.finished_at),
+            'progress': {
+                'frames_processed': self.frames_processed,
+                'total_frames': self.total_frames,
+                'fraction': self.progress
+            },
+            'detections_so_far': len(self.partial_detections)
+        }
+        if self.error:
+            data['error'] = self.error
+        if include_result and self.result is not None:
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    """Worker pool plus an in-memory registry of jobs"""
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 100,
+                 retention_seconds: int = 3600):
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='detection-job')
+        self.jobs: 'OrderedDict[str, DetectionJob]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'JobManager':
+        return cls(
+            max_workers=int(os.getenv('JOB_WORKERS', '2')),
+            max_queued=int(os.getenv('JOB_MAX_QUEUED', '100')),
+            retention_seconds=int(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+        )
+
+    def pending_count(self) -> int:
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job.status in ('queued', 'running'))
+
+    def submit(self, kind: str, filename: str, work: Callable[..., Dict[str, Any]],
+               cleanup_path: Optional[str] = None, job_id: Optional[str] = None,
+               pass_job: bool = False) -> DetectionJob:
+        """
+        Queue work(progress_callback) -> result dict
+
+        cleanup_path is removed once the job has finished, whatever the outcome.
+        job_id lets the client pick the id up front (ValueError if already in use);
+        with pass_job=True the work is called as work(job) instead.
+        """
+        self._prune()
+        job = DetectionJob(kind, filename, job_id)
+
+        with self.lock:
+            if job.id in self.jobs:
+                raise ValueError(f"Job id already in use: {job.id}")
+            pending = sum(1 for j in self.jobs.values() if j.status in ('queued', 'running'))
+            if pending >= self.max_queued:
+                raise JobQueueFullError(f"Job queue is full ({pending} pending jobs)")
+            self.jobs[job.id] = job
+
+        self.executor.submit(self._run, job, work, cleanup_path, pass_job)
+        logger.info(f"Queued {kind} job {job.id} for {filename}")
+        return job
+
+    def _run(self, job: DetectionJob, work, cleanup_path: Optional[str], pass_job: bool = False):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = work(job) if pass_job else work(job.update_progress)
+            job.status = 'completed'
+            logger.info(f"Job {job.id} completed in {time.time() - job.started_at:.2f}s")
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            logger.error(f"Job {job.id} failed: {e}")
+            logger.error(traceback.format_exc())
+        finally:
+            job.finished_at = time.time()
+            if cleanup_path and os.path.exists(cleanup_path):
+                os.remove(cleanup_path)
+
+    def get(self, job_id: str) -> Optional[DetectionJob]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[DetectionJob]:
+        with self.lock:
+            jobs = [job for job in reversed(self.jobs.values()) if status is None or job.status == status]
+        return jobs[:limit]
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+
+def create_jobs_blueprint(manager: JobManager) -> Blueprint:
+    """Read-only job endpoints shared by the detection APIs"""
+    jobs_bp = Blueprint('jobs', __name__)
+
+    @jobs_bp.route('/jobs', methods=['GET'])
+    def list_jobs():
+        status = request.args.get('status')
+        if status and status not in JOB_STATUSES:
+            return jsonify({'error': f'Unknown status: {status}'}), 400
+        limit = request.args.get('limit', default=100, type=int)
+        jobs = manager.list(status=status, limit=max(1, limit))
+        return jsonify({
+            'jobs': [job.to_dict() for job in jobs],
+            'total': len(jobs),
+            'pending': manager.pending_count()
+        })
+
+    @jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id: str):
+        job = manager.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job.to_dict())
+
+    @jobs_bp.route('/jobs/<job_id>/results', methods=['GET'])
+    def get_job_results(job_id: str):
+        job = manager.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status == 'failed':
+            return jsonify(job.to_dict()), 500
+        if job.status != 'completed':
+            data = job.to_dict()
+            if job.partial_detections:
+                data['partial_detections'] = list(job.partial_detections)
+            return jsonify(data), 202
+        return jsonify(job.result)
+
+    return jobs_bp
+
+
+def job_accepted_response(job: DetectionJob):
+    """202 response body for a freshly submitted job"""
+    data = job.to_dict()
+    data['status_url'] = f"/jobs/{job.id}"
+    data['results_url'] = f"/jobs/{job.id}/results"
+    return jsonify(data), 202
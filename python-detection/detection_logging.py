@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Detection Logging - queued handlers, a diagnostics ring buffer and JSON summaries
+Request threads only put records on a queue; a listener thread formats and
+writes them. Per-box/per-frame diagnostics go to `diagnostics`, a ring
+buffer of unformatted (message, args) entries that skips LogRecord creation:
+they can be fetched from /debug/diagnostics or are written out for sampled
+requests. Each request ends with one JSON line holding its stage timings.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import random
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
+import metrics
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+DIAGNOSTICS_BUFFER_SIZE = int(os.getenv('DIAGNOSTICS_BUFFER_SIZE', '5000'))
+DIAGNOSTICS_SAMPLE_RATE = float(os.getenv('DIAGNOSTICS_SAMPLE_RATE', '0'))  # share of requests whose diagnostics are logged
+
+summary_logger = logging.getLogger('detection.summary')
+logger = logging.getLogger(__name__)
+
+_request_id: ContextVar[Optional[str]] = ContextVar('detection_request_id', default=None)
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar('detection_request_stages', default=None)
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Records carrying a 'fields' dict become JSON lines, others use the text format"""
+
+    def __init__(self, fmt: str = LOG_FORMAT):
+        super().__init__(fmt)
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, 'fields', None)
+        if not isinstance(fields, dict):
+            return super().format(record)
+        return json.dumps({
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            **fields
+        }, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The root handler sees a record last, so it is finalized in place instead of copied
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DiagnosticsBuffer:
+    """
+    Logger-like ring buffer for per-box / per-frame detail
+
+    debug()/info() take %-style arguments and only store them; messages are
+    formatted when dumped. Entries are tagged with the current request id.
+    When the 'detection.diagnostics' logger is enabled for DEBUG, entries
+    are also logged normally.
+    """
+
+    def __init__(self, capacity: int = DIAGNOSTICS_BUFFER_SIZE, name: str = 'detection.diagnostics'):
+        self.entries: deque = deque(maxlen=capacity)
+        self.logger = logging.getLogger(name)
+
+    def _add(self, level: int, msg: str, args: tuple):
+        self.entries.append((time.time(), level, msg, args, _request_id.get()))
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, *args)
+
+    def debug(self, msg: str, *args):
+        self._add(logging.DEBUG, msg, args)
+
+    def info(self, msg: str, *args):
+        self._add(logging.INFO, msg, args)
+
+    @staticmethod
+    def _format(msg: str, args: tuple) -> str:
+        try:
+            return msg % args if args else msg
+        except (TypeError, ValueError):
+            return f"{msg} {args}"
+
+    def dump(self, request_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Buffered entries (optionally one request's, newest last) as dicts"""
+        entries = [e for e in list(self.entries) if request_id is None or e[4] == request_id]
+        if limit:
+            entries = entries[-limit:]
+        return [{
+            'time': datetime.fromtimestamp(created).isoformat(timespec='milliseconds'),
+            'level': logging.getLevelName(level),
+            'request_id': entry_request_id,
+            'message': self._format(msg, args)
+        } for created, level, msg, args, entry_request_id in entries]
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Per-box / per-frame detail: use %-style arguments, entries are only formatted when dumped
+diagnostics = DiagnosticsBuffer()
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(log_file: Optional[str] = None, level: int = logging.INFO,
+                  fmt: str = LOG_FORMAT) -> NonBlockingQueueHandler:
+    """
+    Route all logging through a queue to a listener thread (idempotent)
+
+    Replaces the root handlers (e.g. from basicConfig in imported modules) with
+    one queue handler; console and optional log_file writes happen on the
+    listener thread.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+
+        formatter = JsonLineFormatter(fmt)
+        targets: List[logging.Handler] = [logging.StreamHandler()]
+        if log_file:
+            targets.append(logging.FileHandler(log_file))
+        for handler in targets:
+            handler.setFormatter(formatter)
+
+        log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, *targets, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+
+        metrics.add_stage_listener(_record_stage)
+        return _queue_handler
+
+
+def _record_stage(stage: str, seconds: float):
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def current_request_id() -> Optional[str]:
+    """Id of the request being handled on this thread/context, if any"""
+    return _request_id.get()
+
+
+def log_summary(event: str, **fields):
+    """Emit one structured JSON line on the summary logger"""
+    summary_logger.info(event, extra={'fields': {'event': event, **fields}})
+
+
+def init_request_logging(app, service: str, sample_rate: float = DIAGNOSTICS_SAMPLE_RATE):
+    """
+    Per-request ids, JSON request summaries and sampled diagnostics for a Flask app
+
+    The request id comes from X-Request-Id (or is generated) and is echoed
+    back. Requests are sampled at sample_rate, or when sent with
+    X-Debug-Diagnostics: 1; their buffered diagnostics are logged as JSON.
+    """
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def _start_request_logging():
+        request_id = request.headers.get('X-Request-Id') or uuid.uuid4().hex
+        g._log_tokens = (_request_id.set(request_id), _request_stages.set({}))
+        g._log_start = time.perf_counter()
+        g._log_sampled = request.headers.get('X-Debug-Diagnostics') == '1' or random.random() < sample_rate
+
+    @app.after_request
+    def _tag_response(response):
+        request_id = _request_id.get()
+        if request_id:
+            response.headers['X-Request-Id'] = request_id
+        g._log_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_logging(exc=None):
+        tokens = g.pop('_log_tokens', None)
+        if tokens is None:
+            return
+        request_id = _request_id.get()
+        stages = _request_stages.get() or {}
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        log_summary('request', service=service, request_id=request_id, method=request.method,
+                    endpoint=endpoint, status=g.pop('_log_status', 500 if exc else None),
+                    duration_ms=round((time.perf_counter() - g.pop('_log_start')) * 1000, 2),
+                    stages_ms={stage: round(seconds * 1000, 2) for stage, seconds in stages.items()},
+                    error=str(exc) if exc else None)
+        if g.pop('_log_sampled', False):
+            log_summary('diagnostics', service=service, request_id=request_id,
+                        records=diagnostics.dump(request_id))
+        _request_stages.reset(tokens[1])
+        _request_id.reset(tokens[0])
+
+    @app.route('/debug/diagnostics', methods=['GET'])
+    def debug_diagnostics():
+        """Recent per-box/per-frame diagnostics from the in-memory ring buffer"""
+        request_id = request.args.get('request_id')
+        limit = request.args.get('limit', default=500, type=int)
+        records = diagnostics.dump(request_id, limit)
+        return jsonify({
+            'records': records,
+            'count': len(records),
+            'capacity': diagnostics.entries.maxlen,
+            'dropped_log_records': _queue_handler.dropped if _queue_handler else 0
+        })
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Detection Stream - incremental video results as NDJSON or Server-Sent Events
+Detection runs in a background thread and pushes 'frame' and 'progress'
+events as soon as they are computed; the final 'summary' event carries the
+same deduplicated result the non-streaming endpoints return.
+"""
+
+import json
+import queue
+import logging
+import threading
+import traceback
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from flask import Response
+
+logger = logging.getLogger(__name__)
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+_DONE = object()
+
+
+class StreamCancelled(Exception):
+    """Raised inside the detection thread once the client has gone away"""
+
+
+def requested_stream_format(request) -> Optional[str]:
+    """
+    Streaming format asked for by the client, or None for a plain JSON response
+
+    Uses the 'stream' query/form field (ndjson|sse), else the Accept header.
+    """
+    fmt = (request.args.get('stream') or request.form.get('stream') or '').lower()
+    if fmt in STREAM_FORMATS:
+        return fmt
+    accept = request.headers.get('Accept', '')
+    if STREAM_FORMATS['sse'] in accept:
+        return 'sse'
+    if STREAM_FORMATS['ndjson'] in accept:
+        return 'ndjson'
+    return None
+
+
+def format_event(fmt: str, event: str, data: Dict[str, Any]) -> str:
+    """Serialize one event as an NDJSON line or an SSE message"""
+    if fmt == 'sse':
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    return json.dumps({'event': event, **data}, default=str) + "\n"
+
+
+class DetectionEventStream:
+    """Queue between a detection thread and the streamed HTTP response"""
+
+    def __init__(self, fmt: str):
+        if fmt not in STREAM_FORMATS:
+            raise ValueError(f"Unknown stream format: {fmt}")
+        self.fmt = fmt
+        self.cancelled = False
+        self._queue: 'queue.Queue' = queue.Queue()
+
+    def emit(self, event: str, data: Dict[str, Any]):
+        if self.cancelled:
+            raise StreamCancelled()
+        self._queue.put((event, data))
+
+    def progress_callback(self, frames_processed: int, total_frames: int):
+        self.emit('progress', {'frames_processed': frames_processed, 'total_frames': total_frames})
+
+    def frame_callback(self, frame_number: int, timestamp: float, detections: List[Dict[str, Any]]):
+        self.emit('frame', {'frame_number': frame_number, 'timestamp': timestamp, 'detections': detections})
+
+    def start(self, work: Callable[['DetectionEventStream'], Dict[str, Any]],
+              cleanup: Optional[Callable[[], None]] = None):
+        """Run work(stream) -> summary dict in a background thread"""
+        thread = threading.Thread(target=self._run, args=(work, cleanup), name='detection-stream', daemon=True)
+        thread.start()
+
+    def _run(self, work, cleanup):
+        try:
+            result = work(self)
+            self._queue.put(('summary', {'result': result}))
+        except StreamCancelled:
+            logger.info("Client disconnected, streamed detection stopped")
+        except Exception as e:
+            logger.error(f"Streamed detection failed: {e}")
+            logger.error(traceback.format_exc())
+            self._queue.put(('error', {'error': str(e), 'timestamp': datetime.now().isoformat()}))
+        finally:
+            if cleanup:
+                cleanup()
+            self._queue.put(_DONE)
+
+    def events(self) -> Iterator[str]:
+        """Formatted events until the summary/error; closing it cancels the detection"""
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    return
+                yield format_event(self.fmt, *item)
+        finally:
+            self.cancelled = True
+
+
+def stream_response(fmt: str, work: Callable[[DetectionEventStream], Dict[str, Any]],
+                    cleanup: Optional[Callable[[], None]] = None) -> Response:
+    """Start work(stream) and return a response that streams its events"""
+    stream = DetectionEventStream(fmt)
+    stream.start(work, cleanup)
+    return Response(stream.events(), mimetype=STREAM_FORMATS[fmt], headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # stop nginx from buffering the stream
+    })
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Frame Gate - skip inference on near-duplicate video frames
+Each sampled frame is reduced to a tiny grayscale signature (area downscale,
+so sensor noise averages out) and compared with the signature of the last
+frame that went through inference. When only a negligible share of cells
+changed (after compensating for a global brightness shift), the frame reuses
+that frame's detections. A refresh interval in video seconds bounds how long
+results can be reused, so slow changes are still picked up.
+
+Off by default (FRAME_GATE=true enables it): with the default thresholds a
+small new object (a bag set down far from the camera, a few signature
+cells) can go unseen until the next refresh. Enable it for static cameras
+after checking the thresholds on your own footage.
+"""
+
+import os
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+import cv2
+import numpy as np
+
+T = TypeVar('T')
+
+FRAME_GATE_ENABLED = os.getenv('FRAME_GATE', 'false').lower() == 'true'
+# A signature cell counts as changed when it differs by more than this many gray levels
+FRAME_GATE_PIXEL_DELTA = int(os.getenv('FRAME_GATE_PIXEL_DELTA', '12'))
+# Frames with at most this share of changed cells reuse the previous detections
+FRAME_GATE_MAX_CHANGED = float(os.getenv('FRAME_GATE_MAX_CHANGED', '0.002'))
+# Inference runs at least once per this many seconds of video
+FRAME_GATE_REFRESH_SECONDS = float(os.getenv('FRAME_GATE_REFRESH_SECONDS', '5'))
+FRAME_GATE_SIGNATURE_SIZE = (64, 36)
+
+
+def copy_detections(result: T) -> T:
+    """Shallow copies of a list of detection dicts, so callers can annotate them per frame"""
+    if isinstance(result, list):
+        return [dict(item) if isinstance(item, dict) else item for item in result]
+    return result
+
+
+class FrameGate:
+    """
+    Near-duplicate detector for one video's sampled frames
+
+    check() tells whether a frame may reuse the last processed frame's
+    results (and otherwise makes it the new reference); detect() wraps a
+    per-frame detection function with that decision. Create one per video.
+    """
+
+    def __init__(self, enabled: bool = FRAME_GATE_ENABLED, pixel_delta: int = FRAME_GATE_PIXEL_DELTA,
+                 max_changed: float = FRAME_GATE_MAX_CHANGED,
+                 refresh_seconds: float = FRAME_GATE_REFRESH_SECONDS,
+                 signature_size: Tuple[int, int] = FRAME_GATE_SIGNATURE_SIZE):
+        self.enabled = enabled
+        self.pixel_delta = pixel_delta
+        self.max_changed = max_changed
+        self.refresh_seconds = refresh_seconds
+        self.signature_size = signature_size
+        self.frames = 0
+        self.skipped = 0
+        self._reference: Optional[np.ndarray] = None
+        self._reference_time = 0.0
+        self._result: Any = None
+        self._has_result = False
+
+    def signature(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, self.signature_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def changed_fraction(self, signature: np.ndarray, reference: np.ndarray) -> float:
+        diff = signature - reference
+        # A global lighting change (auto exposure, clouds) shifts every cell alike
+        diff -= int(np.median(diff))
+        return float(np.count_nonzero(np.abs(diff) > self.pixel_delta)) / diff.size
+
+    def check(self, frame: np.ndarray, timestamp: float) -> bool:
+        """True when frame is a near-duplicate of the last processed frame and may reuse its results"""
+        self.frames += 1
+        if not self.enabled:
+            return False
+        signature = self.signature(frame)
+        if (self._reference is not None
+                and timestamp - self._reference_time < self.refresh_seconds
+                and self.changed_fraction(signature, self._reference) <= self.max_changed):
+            self.skipped += 1
+            return True
+        self._reference, self._reference_time = signature, timestamp
+        return False
+
+    def detect(self, frame: np.ndarray, timestamp: float, compute: Callable[[np.ndarray], T]) -> T:
+        """
+        A copy of compute(frame), or of the last computed result for a
+        near-duplicate frame; callers may annotate what they get back
+        """
+        if not (self.check(frame, timestamp) and self._has_result):
+            self._has_result = False
+            self._result = compute(frame)
+            self._has_result = True
+        return copy_detections(self._result)
+
+    def settings(self) -> Dict[str, Any]:
+        """Parameters that change which frames reuse results (part of result cache keys)"""
+        return {'enabled': self.enabled, 'pixel_delta': self.pixel_delta, 'max_changed': self.max_changed,
+                'refresh_seconds': self.refresh_seconds, 'signature_size': list(self.signature_size)}
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {'frames': self.frames, 'skipped': self.skipped, 'skip_ratio': round(self.skip_ratio, 3)}
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Frame Sampler - shared video decode loop for every detector
+Skips unsampled frames without retrieving them, supports frame-interval and
+time-based sampling, reuses preallocated frame buffers and can decode with
+OpenCV or PyAV (threaded decoding) when it is installed.
+"""
+
+import os
+import time
+import logging
+from typing import Iterator, List, NamedTuple, Optional, Union
+
+import cv2
+import numpy as np
+
+# Optional imports - graceful fallback if not available
+try:
+    import av
+    HAS_PYAV = True
+except ImportError:
+    HAS_PYAV = False
+
+from metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DECODE_BACKEND = os.getenv('FRAME_DECODE_BACKEND', 'auto')
+
+
+class VideoOpenError(ValueError):
+    """Raised when a decode backend cannot open the video source"""
+
+
+class SampledFrame(NamedTuple):
+    """A frame selected by the sampler"""
+    frame_number: int   # 1-based position in the video, same convention as the detectors
+    timestamp: float    # seconds from the start of the video
+    image: np.ndarray   # BGR image (may be a reused buffer, copy it to keep it)
+
+
+class OpenCVDecodeBackend:
+    """cv2.VideoCapture backend - grab() skips frames without color conversion"""
+
+    name = 'opencv'
+
+    def __init__(self, source: str):
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise VideoOpenError(f"Cannot open video: {source}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.total_frames = max(0, int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def grab(self) -> bool:
+        return self.cap.grab()
+
+    def retrieve(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        ret, frame = self.cap.retrieve(out) if out is not None else self.cap.retrieve()
+        return frame if ret else None
+
+    def current_time(self) -> float:
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def release(self):
+        self.cap.release()
+
+
+class PyAVDecodeBackend:
+    """PyAV backend with threaded decoding; accepts paths or readable file objects"""
+
+    name = 'pyav'
+
+    def __init__(self, source):
+        if not HAS_PYAV:
+            raise RuntimeError("PyAV is not installed")
+        try:
+            self.container = av.open(source)
+            self.stream = self.container.streams.video[0]
+        except (av.error.FFmpegError, IndexError) as e:
+            raise VideoOpenError(f"Cannot open video: {source} ({e})")
+
+        self.stream.thread_type = 'AUTO'
+        self.fps = float(self.stream.average_rate) if self.stream.average_rate else 0.0
+        self.total_frames = max(0, int(self.stream.frames or 0))
+        self.width = self.stream.codec_context.width
+        self.height = self.stream.codec_context.height
+        self._frames = self.container.decode(self.stream)
+        self._current = None
+
+    def grab(self) -> bool:
+        try:
+            self._current = next(self._frames)
+            return True
+        except StopIteration:
+            return False
+        except av.error.FFmpegError as e:
+            logger.warning(f"PyAV decode stopped early: {e}")
+            return False
+
+    def retrieve(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        # PyAV always allocates on conversion, so preallocated buffers are not used here
+        if self._current is None:
+            return None
+        return self._current.to_ndarray(format='bgr24')
+
+    def current_time(self) -> float:
+        if self._current is None or self._current.time is None:
+            return 0.0
+        return float(self._current.time)
+
+    def release(self):
+        self.container.close()
+
+
+DECODE_BACKENDS = {
+    'opencv': OpenCVDecodeBackend,
+    'pyav': PyAVDecodeBackend,
+}
+
+
+def open_decode_backend(source, backend: str = DEFAULT_DECODE_BACKEND):
+    """Open a decode backend by name ('auto' prefers PyAV when installed)"""
+    if backend == 'auto':
+        backend = 'pyav' if HAS_PYAV else 'opencv'
+    if backend not in DECODE_BACKENDS:
+        raise ValueError(f"Unknown decode backend: {backend}")
+    if backend == 'pyav' and not HAS_PYAV:
+        logger.warning("PyAV not installed - falling back to OpenCV decoding")
+        backend = 'opencv'
+    if backend == 'opencv' and not isinstance(source, (str, os.PathLike)):
+        raise VideoOpenError("OpenCV decoding needs a file path")
+    return DECODE_BACKENDS[backend](source)
+
+
+class FrameSampler:
+    """
+    Iterate over the sampled frames of a video
+
+    Use either every_n_frames (frame_number % n == 0, like the detector loops)
+    or frames_per_second (N frames per second of video, whatever its FPS).
+    With reuse_buffers=True the yielded images are written into a rotating
+    pool of buffer_pool_size preallocated arrays, so callers holding frames
+    longer than that must copy them.
+    """
+
+    def __init__(self, source: Union[str, os.PathLike], every_n_frames: int = 1,
+                 frames_per_second: Optional[float] = None, backend: str = DEFAULT_DECODE_BACKEND,
+                 reuse_buffers: bool = False, buffer_pool_size: int = 2,
+                 max_frames: Optional[int] = None):
+        self.source = source
+        self.every_n_frames = max(1, int(every_n_frames or 1))
+        self.frames_per_second = frames_per_second
+        self.reuse_buffers = reuse_buffers
+        self.buffer_pool_size = max(1, buffer_pool_size)
+        self.max_frames = max_frames
+
+        self.backend = open_decode_backend(source, backend)
+        self.fps = self.backend.fps
+        self.total_frames = self.backend.total_frames
+        self.width = self.backend.width
+        self.height = self.backend.height
+
+        self.frames_read = 0
+        self.frames_sampled = 0
+        self._buffers: List[np.ndarray] = []
+        self._next_buffer = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if not self._closed:
+            self.backend.release()
+            self._closed = True
+
+    def _frame_time(self, frame_number: int) -> float:
+        if self.fps > 0:
+            return frame_number / self.fps
+        return self.backend.current_time()
+
+    def _next_out_buffer(self) -> Optional[np.ndarray]:
+        if not self.reuse_buffers or not (self.width and self.height):
+            return None
+        if len(self._buffers) < self.buffer_pool_size:
+            self._buffers.append(np.empty((self.height, self.width, 3), dtype=np.uint8))
+        buffer = self._buffers[self._next_buffer % len(self._buffers)]
+        self._next_buffer += 1
+        return buffer
+
+    def __iter__(self) -> Iterator[SampledFrame]:
+        next_sample_time = 0.0
+        sample_period = 1.0 / self.frames_per_second if self.frames_per_second else None
+
+        decode_time = 0.0
+        try:
+            while self.max_frames is None or self.frames_sampled < self.max_frames:
+                start = time.perf_counter()
+                grabbed = self.backend.grab()
+                decode_time += time.perf_counter() - start
+                if not grabbed:
+                    break
+                self.frames_read += 1
+                frame_number = self.frames_read
+
+                if sample_period is not None:
+                    # Time-based sampling: frame time since the first frame
+                    frame_time = self._frame_time(frame_number - 1)
+                    if frame_time + 1e-9 < next_sample_time:
+                        continue
+                    while next_sample_time <= frame_time + 1e-9:
+                        next_sample_time += sample_period
+                elif frame_number % self.every_n_frames != 0:
+                    continue
+
+                start = time.perf_counter()
+                image = self.backend.retrieve(self._next_out_buffer())
+                decode_time += time.perf_counter() - start
+                if image is None:
+                    break
+
+                # Decode cost of this sample, including the frames skipped since the last one
+                observe_stage('decode', decode_time)
+                decode_time = 0.0
+                self.frames_sampled += 1
+                yield SampledFrame(frame_number, self._frame_time(frame_number), image)
+        finally:
+            self.close()
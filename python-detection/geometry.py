@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Box Geometry - vectorized IoU, NMS, soft-NMS, weighted box fusion and grouping
+Every function takes (N, 4) arrays in either convention the detectors use:
+'xyxy' ([x1, y1, x2, y2], UnifiedDetector / YOLO) or 'xywh' ([x, y, w, h],
+Ultra/Strict/Single detectors). Results are index arrays into the input, so
+callers keep working with their detection dicts.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+BOX_FORMATS = ('xyxy', 'xywh')
+
+
+def as_boxes(boxes, fmt: str = 'xyxy') -> np.ndarray:
+    """Any sequence of boxes as a float (N, 4) xyxy array"""
+    if fmt not in BOX_FORMATS:
+        raise ValueError(f"Unknown box format: {fmt}")
+    boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+    if fmt == 'xywh':
+        boxes[:, 2:] += boxes[:, :2]
+    return boxes
+
+
+def detection_boxes(detections: Sequence[Dict[str, Any]], fmt: str = 'xyxy', key: str = 'bbox') -> np.ndarray:
+    """The key boxes of a list of detection dicts as an (N, 4) xyxy array"""
+    return as_boxes([d[key] for d in detections], fmt)
+
+
+def to_xywh(boxes: np.ndarray) -> np.ndarray:
+    """(N, 4) xyxy -> xywh"""
+    boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+    boxes[:, 2:] -= boxes[:, :2]
+    return boxes
+
+
+def box_area(boxes: np.ndarray) -> np.ndarray:
+    """Areas of (N, 4) xyxy boxes"""
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def iou_matrix(boxes_a, boxes_b, fmt: str = 'xyxy') -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) boxes as an (N, M) matrix"""
+    a = as_boxes(boxes_a, fmt)
+    b = as_boxes(boxes_b, fmt)
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = box_area(a)[:, None] + box_area(b)[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def box_iou(box_a, box_b, fmt: str = 'xyxy') -> float:
+    """IoU of two single boxes"""
+    return float(iou_matrix([box_a], [box_b], fmt)[0, 0])
+
+
+def _offset_by_label(boxes: np.ndarray, labels) -> np.ndarray:
+    """Shift each label's boxes to a disjoint region so one NMS pass is class-aware"""
+    _, label_ids = np.unique(np.asarray(labels, dtype=object).astype(str), return_inverse=True)
+    offset = (boxes.max() + 1.0) if len(boxes) else 0.0
+    return boxes + (label_ids.astype(np.float64) * offset)[:, None]
+
+
+def nms(boxes, scores, iou_threshold: float = 0.5, fmt: str = 'xyxy', labels=None) -> np.ndarray:
+    """
+    Greedy non-maximum suppression
+
+    Returns indices of the kept boxes, highest score first. With labels,
+    boxes only suppress boxes of the same label.
+    """
+    boxes = as_boxes(boxes, fmt)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if not len(boxes):
+        return np.zeros(0, dtype=int)
+    if labels is not None:
+        boxes = _offset_by_label(boxes, labels)
+
+    areas = box_area(boxes)
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        union = areas[i] + areas[rest] - intersection
+        iou = np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+        order = rest[iou < iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+def soft_nms(boxes, scores, iou_threshold: float = 0.3, sigma: float = 0.5,
+             score_threshold: float = 0.001, method: str = 'gaussian',
+             fmt: str = 'xyxy') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Soft-NMS (Bodla et al.): decay the scores of overlapping boxes instead of dropping them
+
+    method is 'gaussian' (score *= exp(-iou^2 / sigma)) or 'linear'
+    (score *= 1 - iou above iou_threshold). Returns (indices, decayed scores)
+    for the boxes whose score stays above score_threshold, best first.
+    """
+    if method not in ('gaussian', 'linear'):
+        raise ValueError(f"Unknown soft-NMS method: {method}")
+    boxes = as_boxes(boxes, fmt)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1).copy()
+    iou = iou_matrix(boxes, boxes)
+
+    remaining = np.arange(len(boxes))
+    keep, keep_scores = [], []
+    while remaining.size:
+        best = remaining[np.argmax(scores[remaining])]
+        if scores[best] < score_threshold:
+            break
+        keep.append(best)
+        keep_scores.append(scores[best])
+        remaining = remaining[remaining != best]
+        overlap = iou[best, remaining]
+        if method == 'gaussian':
+            scores[remaining] *= np.exp(-(overlap ** 2) / sigma)
+        else:
+            scores[remaining] *= np.where(overlap > iou_threshold, 1.0 - overlap, 1.0)
+    return np.array(keep, dtype=int), np.array(keep_scores)
+
+
+def group_overlapping(boxes, iou_threshold: float = 0.3, fmt: str = 'xyxy') -> List[List[int]]:
+    """
+    Group boxes that overlap a seed box by more than iou_threshold
+
+    Seeds are taken in input order and each box joins the first seed it
+    overlaps (not transitive), matching the detectors' original grouping.
+    """
+    boxes = as_boxes(boxes, fmt)
+    overlaps = iou_matrix(boxes, boxes) > iou_threshold
+    unused = np.ones(len(boxes), dtype=bool)
+    groups = []
+    for seed in range(len(boxes)):
+        if not unused[seed]:
+            continue
+        members = np.flatnonzero(overlaps[seed] & unused)
+        members = np.union1d([seed], members[members > seed])
+        unused[members] = False
+        groups.append(members.tolist())
+    return groups
+
+
+def weighted_box_fusion(boxes, scores, iou_threshold: float = 0.55,
+                        fmt: str = 'xyxy') -> Tuple[np.ndarray, np.ndarray, List[List[int]]]:
+    """
+    Weighted box fusion: merge overlapping boxes into score-weighted averages
+
+    Boxes are visited by descending score and join the first fused cluster
+    they overlap by more than iou_threshold. Returns (fused boxes in fmt,
+    mean cluster scores, member indices per cluster).
+    """
+    boxes = as_boxes(boxes, fmt)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    fused: List[np.ndarray] = []
+    clusters: List[List[int]] = []
+
+    for i in np.argsort(-scores, kind='stable'):
+        if fused:
+            iou = iou_matrix(boxes[i:i + 1], np.array(fused))[0]
+            best = int(np.argmax(iou))
+            if iou[best] > iou_threshold:
+                clusters[best].append(int(i))
+                members = np.array(clusters[best])
+                weights = scores[members]
+                fused[best] = (boxes[members] * weights[:, None]).sum(axis=0) / max(weights.sum(), 1e-9)
+                continue
+        fused.append(boxes[i].copy())
+        clusters.append([int(i)])
+
+    fused_boxes = np.array(fused).reshape(-1, 4)
+    if fmt == 'xywh':
+        fused_boxes = to_xywh(fused_boxes)
+    fused_scores = np.array([scores[members].mean() for members in clusters])
+    return fused_boxes, fused_scores, clusters
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Image Ingest - decode uploads straight from the request stream
+Multipart uploads are buffered in a SpooledTemporaryFile (memory up to a size
+threshold, disk only beyond it) and decoded with cv2.imdecode, so image
+requests never write a temp file or make YOLO re-read the image from disk.
+"""
+
+import os
+import tempfile
+from typing import Optional
+
+import cv2
+import numpy as np
+from flask import Request
+from werkzeug.datastructures import FileStorage
+
+DEFAULT_SPOOL_MAX_BYTES = int(os.getenv('UPLOAD_SPOOL_MAX_MB', '16')) * 1024 * 1024
+
+
+def make_spooled_request_class(max_memory_bytes: int = DEFAULT_SPOOL_MAX_BYTES):
+    """Flask request class whose file uploads stay in memory up to max_memory_bytes"""
+
+    class SpooledUploadRequest(Request):
+        def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+            return tempfile.SpooledTemporaryFile(max_size=max_memory_bytes, mode='w+b')
+
+    return SpooledUploadRequest
+
+
+def decode_image_bytes(data: bytes) -> Optional[np.ndarray]:
+    """Decode encoded image bytes into a BGR array (None if not an image)"""
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_image_upload(file: FileStorage) -> Optional[np.ndarray]:
+    """Decode an uploaded image from its (spooled) stream without touching the temp dir"""
+    file.stream.seek(0)
+    return decode_image_bytes(file.stream.read())
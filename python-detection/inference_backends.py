@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Inference Backends - optimized CPU runtimes for the YOLO detectors
+Exports the configured ultralytics weights once to ONNX, OpenVINO IR or
+TorchScript, caches the artifact next to the weights and loads it back through
+ultralytics, so pre/post-processing and the Results format stay unchanged.
+INT8 ONNX models built by quantize_model.py load only once approved.
+"""
+
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Optional imports - graceful fallback if not available
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+try:
+    from ultralytics import YOLO
+    HAS_YOLO = True
+except ImportError:
+    HAS_YOLO = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'pytorch').lower()
+EXPORT_IMAGE_SIZE = int(os.getenv('INFERENCE_EXPORT_IMGSZ', '640'))
+
+# backend name -> ultralytics export format and options
+EXPORT_FORMATS: Dict[str, Dict] = {
+    'onnx': {'format': 'onnx', 'dynamic': True, 'simplify': True},
+    'openvino': {'format': 'openvino', 'dynamic': True, 'half': False},
+    'torchscript': {'format': 'torchscript'},
+}
+# onnx-int8 is produced offline by quantize_model.py and only used once approved
+INFERENCE_BACKENDS = ('pytorch',) + tuple(EXPORT_FORMATS) + ('onnx-int8',)
+
+_export_lock = threading.Lock()
+
+
+@contextmanager
+def full_checkpoint_loading():
+    """Temporarily disable PyTorch weights_only so YOLO checkpoints can be unpickled"""
+    if not HAS_TORCH:
+        yield
+        return
+    original_load = torch.load
+
+    def load(*args, **kwargs):
+        kwargs.setdefault('weights_only', False)
+        return original_load(*args, **kwargs)
+
+    torch.load = load
+    try:
+        yield
+    finally:
+        torch.load = original_load
+
+
+def exported_model_path(weights_path: str, backend: str) -> str:
+    """Path ultralytics writes the exported artifact to (next to the weights)"""
+    stem, _ = os.path.splitext(weights_path)
+    if backend == 'onnx':
+        return f"{stem}.onnx"
+    if backend == 'openvino':
+        return f"{stem}_openvino_model"
+    if backend == 'torchscript':
+        return f"{stem}.torchscript"
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def int8_model_path(weights_path: str) -> str:
+    return f"{os.path.splitext(weights_path)[0]}.int8.onnx"
+
+
+def int8_manifest_path(weights_path: str) -> str:
+    return f"{os.path.splitext(weights_path)[0]}.int8.json"
+
+
+def approved_int8_model(weights_path: str) -> Optional[str]:
+    """INT8 model path if quantize_model.py approved it for these weights, else None"""
+    manifest_path = int8_manifest_path(weights_path)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    int8_path = manifest.get('int8_model') or int8_model_path(weights_path)
+    if not manifest.get('approved') or not os.path.exists(int8_path):
+        return None
+    return int8_path
+
+
+def export_model(weights_path: str, backend: str, imgsz: int = EXPORT_IMAGE_SIZE) -> str:
+    """Export weights to the backend format unless a cached export already exists"""
+    if backend not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    target = exported_model_path(weights_path, backend)
+
+    with _export_lock:
+        if os.path.exists(target):
+            return target
+
+        logger.info(f"Exporting {weights_path} to {backend} (one-time)...")
+        with full_checkpoint_loading():
+            exported = YOLO(weights_path).export(imgsz=imgsz, **EXPORT_FORMATS[backend])
+        exported = str(exported) if exported else target
+        if os.path.abspath(exported) != os.path.abspath(target):
+            logger.warning(f"Export written to {exported} instead of {target}")
+        logger.info(f"Exported {backend} model cached at {exported}")
+        return exported
+
+
+def load_inference_model(weights_path: str, backend: Optional[str] = None):
+    """
+    Load a YOLO model running on the requested backend
+
+    Falls back to PyTorch eager mode when the export or the runtime is not
+    available, so a missing optional dependency never takes the service down.
+    """
+    if not HAS_YOLO:
+        raise RuntimeError("ultralytics is not installed")
+    backend = (backend or DEFAULT_INFERENCE_BACKEND).lower()
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    if backend == 'onnx-int8':
+        int8_path = approved_int8_model(weights_path)
+        if int8_path:
+            return YOLO(int8_path, task='detect')
+        logger.warning(f"No approved INT8 model for {weights_path} (run quantize_model.py) - using FP32 ONNX")
+        backend = 'onnx'
+
+    if backend != 'pytorch':
+        try:
+            return YOLO(export_model(weights_path, backend), task='detect')
+        except Exception as e:
+            logger.warning(f"{backend} backend unavailable for {weights_path} ({e}) - using PyTorch")
+
+    with full_checkpoint_loading():
+        return YOLO(weights_path)
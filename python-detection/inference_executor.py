@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Inference Executor - dynamic micro-batching for a shared model
+Concurrent requests are queued and grouped into one forward pass per latency
+window, then each caller gets back its own results. The executor's single
+worker thread is the only thread that runs the model, so every caller of a
+shared (model_registry) instance must go through get_inference_executor()
+instead of calling the model directly - ultralytics predictors are not
+thread-safe.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import INFERENCE_BATCH_SIZE, INFERENCE_QUEUE_DEPTH, observe_model_speed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', '10'))
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH', '16'))
+
+
+class _InferenceRequest:
+    __slots__ = ('images', 'kwargs', 'key', 'future')
+
+    def __init__(self, images: List[np.ndarray], kwargs: Dict[str, Any]):
+        self.images = images
+        self.kwargs = kwargs
+        # Requests are only batched together when they use the same call options
+        self.key = tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+        self.future: Future = Future()
+
+
+class BatchingInferenceExecutor:
+    """
+    Queue images for a model and run them in micro-batches
+
+    The worker takes the first waiting request, keeps collecting for up to
+    batch_window_ms (or until max_batch_size images are queued), then runs one
+    model call per group of requests sharing the same keyword arguments.
+    """
+
+    def __init__(self, model, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 batch_window_ms: float = DEFAULT_BATCH_WINDOW_MS, name: str = 'model'):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = max(0.0, batch_window_ms) / 1000.0
+        self.name = name
+        self.requests: 'queue.Queue[Optional[_InferenceRequest]]' = queue.Queue()
+        self.batches_run = 0
+        self.images_run = 0
+        self._closed = False
+        self.worker = threading.Thread(target=self._worker, name=f'inference-{name}', daemon=True)
+        self.worker.start()
+
+    def submit(self, images: Sequence[np.ndarray], **kwargs) -> Future:
+        """Queue a list of images; the future resolves to one result per image"""
+        if self._closed:
+            raise RuntimeError(f"Inference executor {self.name} is closed")
+        request = _InferenceRequest(list(images), kwargs)
+        if not request.images:
+            request.future.set_result([])
+            return request.future
+        self.requests.put(request)
+        INFERENCE_QUEUE_DEPTH.labels(self.name).set(self.requests.qsize())
+        return request.future
+
+    def infer(self, image: np.ndarray, timeout: Optional[float] = None, **kwargs):
+        """Run one image and return its single result (blocks until the batch ran)"""
+        return self.submit([image], **kwargs).result(timeout=timeout)[0]
+
+    def infer_batch(self, images: Sequence[np.ndarray], timeout: Optional[float] = None, **kwargs) -> List[Any]:
+        """Run a list of images and return their results in order"""
+        return self.submit(images, **kwargs).result(timeout=timeout)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.requests.put(None)
+
+    def _collect(self, first: _InferenceRequest) -> Tuple[List[_InferenceRequest], bool]:
+        """Gather requests arriving within the batch window"""
+        batch = [first]
+        image_count = len(first.images)
+        deadline = time.monotonic() + self.batch_window
+
+        while image_count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+            image_count += len(request.images)
+        return batch, False
+
+    def _run_group(self, group: List[_InferenceRequest]):
+        images = [image for request in group for image in request.images]
+        try:
+            results = list(self.model(images, **group[0].kwargs))
+            if len(results) != len(images):
+                raise RuntimeError(f"Model returned {len(results)} results for {len(images)} images")
+        except Exception as e:
+            for request in group:
+                request.future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.images_run += len(images)
+        INFERENCE_BATCH_SIZE.labels(self.name).observe(len(images))
+        observe_model_speed(results)
+        offset = 0
+        for request in group:
+            count = len(request.images)
+            request.future.set_result(results[offset:offset + count])
+            offset += count
+
+    def _worker(self):
+        stop = False
+        while not stop:
+            first = self.requests.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            INFERENCE_QUEUE_DEPTH.labels(self.name).set(self.requests.qsize())
+
+            groups: Dict[tuple, List[_InferenceRequest]] = {}
+            for request in batch:
+                if request.future.set_running_or_notify_cancel():
+                    groups.setdefault(request.key, []).append(request)
+            for group in groups.values():
+                self._run_group(group)
+
+        # Fail anything still queued after close()
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError(f"Inference executor {self.name} is closed"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'queued_requests': self.requests.qsize(),
+            'batches_run': self.batches_run,
+            'images_run': self.images_run,
+            'average_batch_size': round(self.images_run / self.batches_run, 2) if self.batches_run else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'batch_window_ms': self.batch_window * 1000.0
+        }
+
+
+_executors: Dict[int, BatchingInferenceExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_inference_executor(model, name: Optional[str] = None,
+                           max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                           batch_window_ms: float = DEFAULT_BATCH_WINDOW_MS) -> BatchingInferenceExecutor:
+    """
+    Shared executor for a model instance (one worker thread per model)
+
+    Batching options only apply to the call that creates the executor.
+    """
+    with _executors_lock:
+        executor = _executors.get(id(model))
+        if executor is None or executor.model is not model:
+            executor = BatchingInferenceExecutor(
+                model,
+                max_batch_size=max_batch_size,
+                batch_window_ms=batch_window_ms,
+                name=name or str(getattr(model, 'ckpt_path', None) or 'model')
+            )
+            _executors[id(model)] = executor
+        return executor
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Detection Metrics - Prometheus instrumentation for the detection APIs
+Per-stage latency histograms, request/in-flight tracking, inference batch
+sizes, queue depths and model-load events, exposed on /metrics.
+Everything degrades to no-ops when prometheus_client is not installed.
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+# Optional imports - graceful fallback if not available
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    )
+    HAS_PROMETHEUS = True
+except ImportError:
+    HAS_PROMETHEUS = False
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages reported in detection_stage_seconds
+STAGES = (
+    'upload_save',      # writing the upload to disk
+    'decode',           # image decode / video frame decode
+    'preprocess',       # model input preparation (letterbox, normalize)
+    'inference',        # model forward pass
+    'nms',              # model output decoding and non-maximum suppression
+    'postprocess',      # category mapping, validation, proximity filtering
+    'annotate',         # crop / draw / encode result images
+    'persistence',      # outbound saves to the lost-objects API
+)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _NoopMetric:
+    """Stands in for every metric type when prometheus_client is missing"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def set_function(self, f):
+        pass
+
+
+if HAS_PROMETHEUS:
+    REGISTRY = CollectorRegistry(auto_describe=True)
+
+    STAGE_SECONDS = Histogram(
+        'detection_stage_seconds', 'Time spent in each detection pipeline stage',
+        ['app', 'stage'], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+    REQUEST_SECONDS = Histogram(
+        'detection_request_seconds', 'HTTP request latency',
+        ['app', 'endpoint'], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+    REQUESTS_TOTAL = Counter(
+        'detection_requests_total', 'HTTP requests by endpoint and status code',
+        ['app', 'endpoint', 'status'], registry=REGISTRY)
+    REQUESTS_IN_FLIGHT = Gauge(
+        'detection_requests_in_flight', 'HTTP requests currently being handled',
+        ['app'], registry=REGISTRY)
+    INFERENCE_BATCH_SIZE = Histogram(
+        'detection_inference_batch_size', 'Images per model forward pass',
+        ['model'], buckets=BATCH_BUCKETS, registry=REGISTRY)
+    INFERENCE_QUEUE_DEPTH = Gauge(
+        'detection_inference_queue_depth', 'Requests waiting for the inference executor',
+        ['model'], registry=REGISTRY)
+    JOB_QUEUE_DEPTH = Gauge(
+        'detection_job_queue_depth', 'Background detection jobs queued or running',
+        ['app'], registry=REGISTRY)
+    MODEL_LOADS = Counter(
+        'detection_model_loads_total', 'Model load events',
+        ['kind', 'model', 'device'], registry=REGISTRY)
+    MODEL_LOAD_SECONDS = Histogram(
+        'detection_model_load_seconds', 'Model load time (including warm-up)',
+        ['kind'], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+else:
+    REGISTRY = None
+    STAGE_SECONDS = REQUEST_SECONDS = REQUESTS_TOTAL = REQUESTS_IN_FLIGHT = _NoopMetric()
+    INFERENCE_BATCH_SIZE = INFERENCE_QUEUE_DEPTH = JOB_QUEUE_DEPTH = _NoopMetric()
+    MODEL_LOADS = MODEL_LOAD_SECONDS = _NoopMetric()
+
+# Name of the Flask app in this process, set by register_metrics()
+APP_NAME = 'detection'
+
+# Extra consumers of stage timings (e.g. per-request log summaries)
+_stage_listeners: List[Callable[[str, float], None]] = []
+
+
+def add_stage_listener(listener: Callable[[str, float], None]):
+    """Also call listener(stage, seconds) for every observed stage"""
+    if listener not in _stage_listeners:
+        _stage_listeners.append(listener)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(APP_NAME, stage).observe(seconds)
+    for listener in _stage_listeners:
+        listener(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a block as one pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_model_speed(results):
+    """Record ultralytics' own preprocess/inference/postprocess timings for a batch"""
+    if not results:
+        return
+    speed = getattr(results[0], 'speed', None)
+    if not isinstance(speed, dict):
+        return
+    # speed is milliseconds per image, averaged over the batch
+    batch = len(results)
+    for key, stage in (('preprocess', 'preprocess'), ('inference', 'inference'), ('postprocess', 'nms')):
+        if speed.get(key) is not None:
+            observe_stage(stage, speed[key] * batch / 1000.0)
+
+
+def record_model_load(kind: str, model: str, device: str, seconds: float):
+    MODEL_LOADS.labels(kind, model, device).inc()
+    MODEL_LOAD_SECONDS.labels(kind).observe(seconds)
+
+
+def track_job_queue(pending_count: Callable[[], int]):
+    """Report a JobManager's pending jobs as a gauge read at scrape time"""
+    JOB_QUEUE_DEPTH.labels(APP_NAME).set_function(pending_count)
+
+
+def register_metrics(app, app_name: str, job_pending_count: Optional[Callable[[], int]] = None):
+    """Add request tracking hooks and the /metrics endpoint to a Flask app"""
+    from flask import Response, g, jsonify, request
+
+    global APP_NAME
+    APP_NAME = app_name
+    if job_pending_count:
+        track_job_queue(job_pending_count)
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.labels(APP_NAME).inc()
+
+    @app.teardown_request
+    def _finish_request(exc=None):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        REQUESTS_IN_FLIGHT.labels(APP_NAME).dec()
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.labels(APP_NAME, endpoint).observe(time.perf_counter() - start)
+
+    @app.after_request
+    def _count_request(response):
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUESTS_TOTAL.labels(APP_NAME, endpoint, str(response.status_code)).inc()
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint"""
+        if not HAS_PROMETHEUS:
+            return jsonify({'error': 'prometheus_client is not installed'}), 501
+        return Response(generate_latest(REGISTRY), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Model Registry - process-wide cache of loaded models
+Each model is loaded and warmed up once per (kind, path/variant, device) and
+the same instance is handed to every detector, so building a detector per
+request no longer reloads weights.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from metrics import record_model_load
+from inference_backends import DEFAULT_INFERENCE_BACKEND, HAS_YOLO, full_checkpoint_loading, load_inference_model
+
+# Optional imports - graceful fallback if not available
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+try:
+    import mediapipe as mp
+    HAS_MEDIAPIPE = True
+except ImportError:
+    HAS_MEDIAPIPE = False
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, str]
+
+
+class ModelRegistry:
+    """Thread-safe load-once cache; concurrent first requests wait for a single load"""
+
+    def __init__(self):
+        self.models: Dict[ModelKey, Any] = {}
+        self.load_times: Dict[ModelKey, float] = {}
+        self.lock = threading.Lock()
+        self.key_locks: Dict[ModelKey, threading.Lock] = {}
+
+    def get(self, key: ModelKey, loader: Callable[[], Any]) -> Any:
+        """Return the cached model for key, calling loader() the first time"""
+        model = self.models.get(key)
+        if model is not None:
+            return model
+
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            model = self.models.get(key)
+            if model is None:
+                start = time.time()
+                model = loader()
+                self.load_times[key] = time.time() - start
+                self.models[key] = model
+                record_model_load(*key, self.load_times[key])
+                logger.info(f"Loaded {key[0]} model {key[1]} on {key[2]} in {self.load_times[key]:.2f}s")
+        return model
+
+    def get_yolo(self, model_path: str = 'yolov8n.pt', device: Optional[str] = None,
+                 warmup: bool = True, backend: Optional[str] = None):
+        """Shared YOLO model on the configured inference backend, warmed up with one dummy inference"""
+        if not HAS_YOLO:
+            raise RuntimeError("ultralytics is not installed")
+        backend = (backend or DEFAULT_INFERENCE_BACKEND).lower()
+
+        def load():
+            model = load_inference_model(model_path, backend)
+            with full_checkpoint_loading():
+                if device and HAS_TORCH and isinstance(getattr(model, 'model', None), torch.nn.Module):
+                    model.to(device)
+                if warmup:
+                    model(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+            return model
+
+        name = model_path if backend == 'pytorch' else f"{model_path}[{backend}]"
+        return self.get(('yolo', name, device or 'default'), load)
+
+    def get_classifier(self, variant: str = 'resnet50', device: str = 'cpu'):
+        """Shared torchvision classifier in eval mode"""
+        if not HAS_TORCH:
+            raise RuntimeError("PyTorch is not installed")
+
+        def load():
+            import torchvision.models as tv_models
+            model = getattr(tv_models, variant)(weights='DEFAULT')
+            model.eval()
+            return model.to(device)
+
+        return self.get(('classifier', variant, device), load)
+
+    def get_holistic(self, model_complexity: int = 2, enable_segmentation: bool = True):
+        """
+        Shared MediaPipe Holistic graph and the lock that serializes its use
+
+        Holistic keeps tracking state between calls, so callers must hold the
+        lock around process().
+        """
+        if not HAS_MEDIAPIPE:
+            raise RuntimeError("MediaPipe is not installed")
+
+        def load():
+            holistic = mp.solutions.holistic.Holistic(
+                static_image_mode=False,
+                model_complexity=model_complexity,
+                enable_segmentation=enable_segmentation
+            )
+            return holistic, threading.Lock()
+
+        variant = f"complexity{model_complexity}{'-seg' if enable_segmentation else ''}"
+        return self.get(('holistic', variant, 'cpu'), load)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'loaded_models': [
+                {'kind': kind, 'name': name, 'device': device, 'load_time': round(self.load_times.get((kind, name, device), 0.0), 3)}
+                for kind, name, device in list(self.models)
+            ]
+        }
+
+
+# Process-wide registry used by every detector
+registry = ModelRegistry()
+
+
+def get_yolo_model(model_path: str = 'yolov8n.pt', device: Optional[str] = None, warmup: bool = True,
+                   backend: Optional[str] = None):
+    return registry.get_yolo(model_path, device=device, warmup=warmup, backend=backend)
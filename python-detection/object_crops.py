@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Object Crops - keep screenshots of candidate objects from the detection pass
+While a video is decoded for detection, the crop of every detection that is
+currently the best of its deduplication cluster is copied out of the frame.
+A cluster only ever keeps its latest best crop and the buffer has a byte
+budget, so screenshots can be written after deduplication without re-opening
+and seeking the video.
+"""
+
+import os
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CROP_PADDING = 20
+DEFAULT_CROP_BUFFER_MAX_BYTES = int(os.getenv('CROP_BUFFER_MAX_MB', '64')) * 1024 * 1024
+
+
+def crop_object(frame: np.ndarray, bbox, padding: int = DEFAULT_CROP_PADDING) -> Optional[np.ndarray]:
+    """Copy of an [x1, y1, x2, y2] box plus padding, clipped to the frame (None if empty)"""
+    height, width = frame.shape[:2]
+    x1, y1, x2, y2 = (int(v) for v in bbox)
+    x1, y1 = max(0, x1 - padding), max(0, y1 - padding)
+    x2, y2 = min(width, x2 + padding), min(height, y2 + padding)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return frame[y1:y2, x1:x2].copy()
+
+
+def crop_key(detection: Dict[str, Any]) -> Tuple:
+    """Identifies a detection across the copies made by deduplication"""
+    return (detection.get('frame_number'), detection.get('class'), tuple(detection.get('bbox', ())))
+
+
+class ObjectCropBuffer:
+    """
+    Best-so-far crop per deduplication cluster, within a byte budget
+
+    offer() is called for detections that just became their cluster's best;
+    accept filters out detections that could never be reported. When the
+    budget is exceeded the least confident crops are dropped (callers fall
+    back to re-reading those frames).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CROP_BUFFER_MAX_BYTES,
+                 padding: int = DEFAULT_CROP_PADDING,
+                 accept: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        self.max_bytes = max_bytes
+        self.padding = padding
+        self.accept = accept
+        self.bytes_used = 0
+        self.evicted = 0
+        # cluster id -> (crop key, confidence, crop)
+        self._crops: Dict[int, Tuple[Tuple, float, np.ndarray]] = {}
+        self._by_key: Dict[Tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._crops)
+
+    def offer(self, cluster_id: int, detection: Dict[str, Any], frame: np.ndarray):
+        """Replace the cluster's crop with this detection's, taken from frame"""
+        if self.accept and not self.accept(detection):
+            return
+        crop = crop_object(frame, detection.get('bbox', (0, 0, 0, 0)), self.padding)
+        if crop is None:
+            return
+        self.discard(cluster_id)
+        key = crop_key(detection)
+        self._crops[cluster_id] = (key, float(detection.get('confidence', 0)), crop)
+        self._by_key[key] = cluster_id
+        self.bytes_used += crop.nbytes
+        if self.bytes_used > self.max_bytes:
+            self._evict()
+
+    def discard(self, cluster_id: int):
+        entry = self._crops.pop(cluster_id, None)
+        if entry is not None:
+            key, _, crop = entry
+            if self._by_key.get(key) == cluster_id:
+                del self._by_key[key]
+            self.bytes_used -= crop.nbytes
+
+    def _evict(self):
+        """Drop the least confident crops until the buffer fits its budget again"""
+        for cluster_id in sorted(self._crops, key=lambda cid: self._crops[cid][1]):
+            if self.bytes_used <= self.max_bytes:
+                break
+            self.discard(cluster_id)
+            self.evicted += 1
+
+    def get(self, detection: Dict[str, Any]) -> Optional[np.ndarray]:
+        """The stored crop for a (possibly copied) detection, if it was kept"""
+        cluster_id = self._by_key.get(crop_key(detection))
+        return self._crops[cluster_id][2] if cluster_id is not None else None
+
+    def clear(self):
+        self._crops.clear()
+        self._by_key.clear()
+        self.bytes_used = 0
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Persistence Outbox - durable, non-blocking delivery of detections to the web tier
+Detections are written to a local SQLite outbox inside the request (one
+transaction, no network). A background sender drains it in batches over a
+pooled keep-alive requests.Session, retries failed rows with exponential
+backoff and stops calling the endpoint while a circuit breaker is open, so
+detection latency does not depend on the lost-objects API being up.
+Rows are leased while in flight, so several worker processes can share one
+outbox file; delivery is at-least-once.
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOST_OBJECTS_URL = os.getenv('LOST_OBJECTS_API_URL', 'http://localhost:3000/api/lost-objects')
+
+# HTTP statuses worth retrying; other 4xx responses mean the payload itself was rejected
+RETRYABLE_STATUSES = {408, 425, 429}
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: closed -> open after failure_threshold
+    failures, half-open after reset_timeout (one trial call), closed again
+    on the first success
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a half-open trial that was not used"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("🔌 Lost-objects API reachable again, circuit closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_running:
+                    logger.warning(f"🔌 Lost-objects API failing ({self.failures} in a row), "
+                                   f"circuit open for {self.reset_timeout:.0f}s")
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class PersistenceOutbox:
+    """
+    SQLite outbox plus background sender for lost-object payloads
+
+    enqueue() stores payloads and wakes the sender; start() runs the sender
+    thread. Rows are deleted once the API accepts them; rows the API rejects
+    (non-retryable 4xx) or that run out of attempts are kept as 'dead' for
+    inspection until dead_retention seconds have passed.
+    """
+
+    def __init__(self, path: str = 'detection_outbox.db', url: str = DEFAULT_LOST_OBJECTS_URL,
+                 batch_size: int = 20, timeout: Tuple[float, float] = (2.0, 10.0),
+                 max_attempts: int = 10, backoff_base: float = 2.0, backoff_max: float = 300.0,
+                 poll_interval: float = 5.0, lease_seconds: float = 60.0, pool_size: int = 4,
+                 dead_retention: float = 7 * 24 * 3600,
+                 breaker: Optional[CircuitBreaker] = None,
+                 session: Optional[requests.Session] = None):
+        self.path = path
+        self.url = url
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.dead_retention = dead_retention
+        self.breaker = breaker or CircuitBreaker()
+        self.session = session or self._build_session(pool_size)
+
+        self.sent = 0
+        self.failed_attempts = 0
+        self.last_error: Optional[str] = None
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_cleanup = 0.0
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)')
+
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        # Retries are handled per row by the outbox, not by urllib3
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Content-Type': 'application/json'})
+        return session
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, sqlite3 connections are not shareable across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, payloads: List[Dict[str, Any]]) -> List[int]:
+        """Durably store payloads for delivery; returns their outbox ids"""
+        now = time.time()
+        rows = [(json.dumps(payload, default=str), now, now) for payload in payloads]
+        ids = []
+        with self._connect() as conn:
+            for row in rows:
+                cursor = conn.execute(
+                    'INSERT INTO outbox (payload, created_at, next_attempt_at) VALUES (?, ?, ?)', row
+                )
+                ids.append(cursor.lastrowid)
+        self._wake.set()
+        return ids
+
+    def _claim(self, now: float) -> List[Tuple[int, str, int]]:
+        """Lease a batch of due rows so other senders skip them while in flight"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                "SELECT id, payload, attempts FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT ?",
+                (now, self.batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany('UPDATE outbox SET next_attempt_at = ? WHERE id = ?',
+                                 [(now + self.lease_seconds, row[0]) for row in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return rows
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _post(self, payload: str) -> Tuple[bool, bool, Optional[str]]:
+        """(delivered, retryable, error) for one payload"""
+        try:
+            response = self.session.post(self.url, data=payload, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            return False, True, f"Network error: {e}"
+        if 200 <= response.status_code < 300:
+            return True, False, None
+        error = f"HTTP {response.status_code}: {response.text[:200]}"
+        retryable = response.status_code >= 500 or response.status_code in RETRYABLE_STATUSES
+        return False, retryable, error
+
+    def drain_once(self) -> int:
+        """Send one batch of due rows; returns how many were delivered"""
+        if not self.breaker.allow():
+            return 0
+        try:
+            return self._drain_batch()
+        finally:
+            # A half-open trial that ended without a verdict (no rows, an error) is given back
+            self.breaker.release()
+
+    def _drain_batch(self) -> int:
+        now = time.time()
+        rows = self._claim(now)
+        if not rows:
+            return 0
+
+        delivered, retry, dead = [], [], []
+        for index, (row_id, payload, attempts) in enumerate(rows):
+            ok, retryable, error = self._post(payload)
+            if ok:
+                delivered.append(row_id)
+                self.breaker.record_success()
+                continue
+            self.failed_attempts += 1
+            self.last_error = error
+            attempts += 1
+            if not retryable or attempts >= self.max_attempts:
+                dead.append((attempts, error, row_id))
+                logger.error(f"❌ Outbox row {row_id} dropped after {attempts} attempt(s): {error}")
+            else:
+                retry.append((attempts, time.time() + self._backoff(attempts), error, row_id))
+            if not retryable:
+                # The payload was rejected, but the API answered: it is up
+                self.breaker.record_success()
+                continue
+            self.breaker.record_failure()
+            if self.breaker.state != CircuitBreaker.CLOSED:
+                # Endpoint is down: release the rest of the batch untouched
+                retry.extend((a, now, None, rid) for rid, _, a in rows[index + 1:])
+                break
+
+        with self._connect() as conn:
+            if delivered:
+                conn.executemany('DELETE FROM outbox WHERE id = ?', [(row_id,) for row_id in delivered])
+            if retry:
+                conn.executemany(
+                    'UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = COALESCE(?, last_error) '
+                    'WHERE id = ?', retry)
+            if dead:
+                conn.executemany("UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                                 dead)
+        self.sent += len(delivered)
+        if delivered:
+            logger.info(f"✅ Delivered {len(delivered)} detection(s) from the outbox")
+        return len(delivered)
+
+    def _cleanup(self, now: float):
+        self._last_cleanup = now
+        with self._connect() as conn:
+            conn.execute("DELETE FROM outbox WHERE status = 'dead' AND created_at < ?",
+                         (now - self.dead_retention,))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                while self.drain_once() == self.batch_size and not self._stop.is_set():
+                    pass
+                now = time.time()
+                if now - self._last_cleanup > 3600:
+                    self._cleanup(now)
+            except Exception as e:
+                logger.error(f"❌ Outbox sender error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self) -> 'PersistenceOutbox':
+        """Start the background sender (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='persistence-outbox', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        counts = dict(self._connect().execute(
+            'SELECT status, COUNT(*) FROM outbox GROUP BY status'
+        ).fetchall())
+        return {
+            'path': self.path,
+            'url': self.url,
+            'pending': counts.get('pending', 0),
+            'dead': counts.get('dead', 0),
+            'sent': self.sent,
+            'failed_attempts': self.failed_attempts,
+            'circuit': self.breaker.state,
+            'last_error': self.last_error
+        }
+
+
+def create_persistence_outbox() -> PersistenceOutbox:
+    """Build the outbox configured through the environment"""
+    path = os.getenv('OUTBOX_DB_PATH', 'detection_outbox.db')
+    logger.info(f"Using persistence outbox: {path}")
+    return PersistenceOutbox(
+        path=path,
+        url=DEFAULT_LOST_OBJECTS_URL,
+        batch_size=int(os.getenv('OUTBOX_BATCH_SIZE', '20')),
+        timeout=(float(os.getenv('OUTBOX_CONNECT_TIMEOUT', '2')), float(os.getenv('OUTBOX_READ_TIMEOUT', '10'))),
+        max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10')),
+        backoff_max=float(os.getenv('OUTBOX_BACKOFF_MAX_SECONDS', '300')),
+        poll_interval=float(os.getenv('OUTBOX_POLL_SECONDS', '5')),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv('OUTBOX_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.getenv('OUTBOX_BREAKER_RESET_SECONDS', '30'))
+        )
+    )
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+🧮 INT8 QUANTIZATION TOOL
+Builds a statically quantized ONNX version of a YOLO model from local
+calibration frames, checks it against the FP32 model on held-out frames and
+only approves it for INFERENCE_BACKEND=onnx-int8 when detections agree.
+
+Usage: python quantize_model.py yolov8m.pt --images detected_objects --videos uploads
+"""
+
+import os
+import sys
+import glob
+import json
+import random
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from frame_sampler import FrameSampler
+from geometry import iou_matrix
+from inference_backends import (
+    EXPORT_IMAGE_SIZE, export_model, int8_manifest_path, int8_model_path
+)
+
+# Optional imports - graceful fallback if not available
+try:
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static
+    )
+    HAS_ONNXRUNTIME = True
+except ImportError:
+    CalibrationDataReader = object
+    HAS_ONNXRUNTIME = False
+
+try:
+    from ultralytics import YOLO
+    HAS_YOLO = True
+except ImportError:
+    HAS_YOLO = False
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+
+def collect_frames(image_dirs: List[str], video_paths: List[str], frames_per_video: int = 20,
+                   max_frames: int = 400) -> List[np.ndarray]:
+    """Load calibration frames from image folders and evenly sampled video frames"""
+    frames = []
+
+    for image_dir in image_dirs:
+        for path in sorted(glob.glob(os.path.join(image_dir, '**', '*'), recursive=True)):
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                image = cv2.imread(path)
+                if image is not None:
+                    frames.append(image)
+
+    videos = []
+    for video_path in video_paths:
+        if os.path.isdir(video_path):
+            videos.extend(p for p in sorted(glob.glob(os.path.join(video_path, '**', '*'), recursive=True))
+                          if p.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            videos.append(video_path)
+
+    for video in videos:
+        try:
+            with FrameSampler(video) as sampler:
+                step = max(1, sampler.total_frames // frames_per_video) if sampler.total_frames else 30
+                sampler.every_n_frames = step
+                sampler.max_frames = frames_per_video
+                frames.extend(sample.image for sample in sampler)
+        except ValueError as e:
+            logger.warning(f"⚠️ Skipping {video}: {e}")
+
+    random.Random(0).shuffle(frames)
+    return frames[:max_frames]
+
+
+def letterbox(image: np.ndarray, imgsz: int = EXPORT_IMAGE_SIZE) -> np.ndarray:
+    """Same resize/pad/normalize as the ultralytics predictor, as an NCHW float32 tensor"""
+    h, w = image.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - new_h) // 2
+    left = (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor[np.newaxis])
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    """Feeds preprocessed calibration frames to onnxruntime"""
+
+    def __init__(self, frames: List[np.ndarray], input_name: str, imgsz: int = EXPORT_IMAGE_SIZE):
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._frames = iter(frames)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        frame = next(self._frames, None)
+        if frame is None:
+            return None
+        return {self.input_name: letterbox(frame, self.imgsz)}
+
+
+def quantize_onnx(fp32_path: str, int8_path: str, frames: List[np.ndarray], imgsz: int = EXPORT_IMAGE_SIZE):
+    """Static QDQ INT8 quantization calibrated on the given frames"""
+    fp32_model = onnx.load(fp32_path)
+    input_name = fp32_model.graph.input[0].name
+
+    quantize_static(
+        fp32_path,
+        int8_path,
+        FrameCalibrationReader(frames, input_name, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax
+    )
+
+    # ultralytics reads class names, stride and imgsz from the ONNX metadata
+    int8_model = onnx.load(int8_path)
+    existing = {prop.key for prop in int8_model.metadata_props}
+    for prop in fp32_model.metadata_props:
+        if prop.key not in existing:
+            int8_model.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(int8_model, int8_path)
+
+
+def _boxes(result):
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4)), np.zeros((0,), dtype=int)
+    return boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy().astype(int)
+
+
+def compare_models(reference, candidate, frames: List[np.ndarray], conf: float = 0.25,
+                   match_iou: float = 0.5) -> Dict[str, float]:
+    """
+    Match candidate detections to reference detections per frame
+
+    agreement = matched pairs with the same class / max(reference, candidate)
+    detections, summed over all frames (1.0 when both find nothing).
+    """
+    matched = same_class = ref_total = cand_total = 0
+    ious = []
+
+    for frame in frames:
+        ref_boxes, ref_cls = _boxes(reference(frame, conf=conf, verbose=False)[0])
+        cand_boxes, cand_cls = _boxes(candidate(frame, conf=conf, verbose=False)[0])
+        ref_total += len(ref_boxes)
+        cand_total += len(cand_boxes)
+
+        iou = iou_matrix(ref_boxes, cand_boxes)
+        # Greedy one-to-one matching, best overlaps first
+        while iou.size and iou.max() >= match_iou:
+            i, j = np.unravel_index(np.argmax(iou), iou.shape)
+            matched += 1
+            ious.append(float(iou[i, j]))
+            if ref_cls[i] == cand_cls[j]:
+                same_class += 1
+            iou[i, :] = -1
+            iou[:, j] = -1
+
+    denominator = max(ref_total, cand_total)
+    return {
+        'frames': len(frames),
+        'reference_detections': ref_total,
+        'candidate_detections': cand_total,
+        'matched': matched,
+        'mean_iou': round(float(np.mean(ious)), 4) if ious else 0.0,
+        'class_agreement': round(same_class / matched, 4) if matched else 1.0,
+        'agreement': round(same_class / denominator, 4) if denominator else 1.0
+    }
+
+
+def build_int8_model(weights_path: str, image_dirs: List[str], video_paths: List[str],
+                     threshold: float = 0.9, holdout_fraction: float = 0.3,
+                     imgsz: int = EXPORT_IMAGE_SIZE) -> Dict:
+    """Quantize, evaluate and write the approval manifest next to the weights"""
+    if not HAS_ONNXRUNTIME:
+        raise RuntimeError("onnx and onnxruntime are required for quantization")
+    if not HAS_YOLO:
+        raise RuntimeError("ultralytics is not installed")
+
+    frames = collect_frames(image_dirs, video_paths)
+    if len(frames) < 10:
+        raise ValueError(f"Need at least 10 calibration frames, found {len(frames)}")
+    holdout_count = max(1, int(len(frames) * holdout_fraction))
+    holdout, calibration = frames[:holdout_count], frames[holdout_count:]
+    logger.info(f"📸 {len(calibration)} calibration frames, {len(holdout)} held-out frames")
+
+    fp32_path = export_model(weights_path, 'onnx', imgsz=imgsz)
+    int8_path = int8_model_path(weights_path)
+    logger.info(f"🧮 Quantizing {fp32_path} -> {int8_path}")
+    quantize_onnx(fp32_path, int8_path, calibration, imgsz)
+
+    logger.info("🔍 Comparing INT8 detections against FP32 on held-out frames...")
+    metrics = compare_models(
+        YOLO(fp32_path, task='detect'),
+        YOLO(int8_path, task='detect'),
+        holdout
+    )
+
+    manifest = {
+        'weights': weights_path,
+        'fp32_model': fp32_path,
+        'int8_model': int8_path,
+        'imgsz': imgsz,
+        'calibration_frames': len(calibration),
+        'metrics': metrics,
+        'threshold': threshold,
+        'approved': metrics['agreement'] >= threshold,
+        'created_at': datetime.now().isoformat()
+    }
+    with open(int8_manifest_path(weights_path), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and validate an INT8 ONNX version of a YOLO model')
+    parser.add_argument('weights', help='YOLO weights, e.g. yolov8m.pt')
+    parser.add_argument('--images', nargs='*', default=['detected_objects'], help='Folders of calibration images')
+    parser.add_argument('--videos', nargs='*', default=[], help='Videos or folders of videos to sample frames from')
+    parser.add_argument('--threshold', type=float, default=0.9, help='Minimum FP32/INT8 agreement to approve')
+    parser.add_argument('--holdout', type=float, default=0.3, help='Fraction of frames kept for evaluation')
+    parser.add_argument('--imgsz', type=int, default=EXPORT_IMAGE_SIZE)
+    args = parser.parse_args()
+
+    try:
+        manifest = build_int8_model(args.weights, args.images, args.videos,
+                                    threshold=args.threshold, holdout_fraction=args.holdout, imgsz=args.imgsz)
+    except Exception as e:
+        print(f"❌ Quantization failed: {e}")
+        return 1
+
+    metrics = manifest['metrics']
+    print(f"\n📊 INT8 vs FP32 on {metrics['frames']} held-out frames")
+    print(f"   Detections: {metrics['reference_detections']} FP32 / {metrics['candidate_detections']} INT8")
+    print(f"   Mean IoU: {metrics['mean_iou']:.3f}")
+    print(f"   Class agreement: {metrics['class_agreement']:.1%}")
+    print(f"   Overall agreement: {metrics['agreement']:.1%} (threshold {manifest['threshold']:.1%})")
+    if manifest['approved']:
+        print(f"✅ Approved - run with INFERENCE_BACKEND=onnx-int8 to use {manifest['int8_model']}")
+        return 0
+    print("⚠️ Not approved - the detection APIs will keep using the FP32 model")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Result Cache - reuse detection results for identical uploads
+Results are keyed by (upload content hash, endpoint, model id, effective
+config). The upload is hashed while it is being saved or decoded, so the
+key costs no extra pass over the data. The memory tier is a bounded LRU
+(session_store.MemorySessionStore); RESULT_CACHE_DB_PATH adds a SQLite tier
+that survives restarts. Identical requests that arrive while a result is
+being computed wait for it instead of running inference again.
+Cached responses reference crops in the artifact store, which has its own
+GC: a cached result whose artifacts are gone counts as a miss.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from werkzeug.datastructures import FileStorage
+
+from session_store import MemorySessionStore, SQLiteSessionStore
+from artifact_store import ARTIFACT_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Response fields holding the path of an artifact store file
+ARTIFACT_PATH_FIELDS = ('screenshot_path',)
+
+# get_or_compute() outcomes, also sent as the X-Cache response header
+HIT, MISS, COALESCED = 'HIT', 'MISS', 'COALESCED'
+
+
+def save_upload_hashed(file: FileStorage, path: str, chunk_size: int = UPLOAD_HASH_CHUNK_SIZE) -> str:
+    """Save an upload like FileStorage.save and return the SHA-256 of its content"""
+    digest = hashlib.sha256()
+    file.stream.seek(0)
+    with open(path, 'wb') as out:
+        while True:
+            chunk = file.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def result_key(upload_hash: str, endpoint: str, model_id: str, **config) -> str:
+    """Cache key for one upload run through one endpoint/model/configuration"""
+    payload = json.dumps([upload_hash, endpoint, model_id, config], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def detection_result_key(upload_hash: str, endpoint: str, model_path: str, backend: str,
+                         frame_gate: Dict[str, Any], **config) -> str:
+    """
+    result_key() for a detection endpoint: the loaded model file, the
+    inference backend (pytorch/onnx/openvino/onnx-int8 outputs differ) and
+    the FrameGate settings are always part of the key
+    """
+    return result_key(upload_hash, endpoint, f"{model_path}:{backend}", frame_gate=frame_gate, **config)
+
+
+def artifact_paths(result: Any) -> Iterator[str]:
+    """Artifact file paths referenced anywhere in a response body"""
+    if isinstance(result, dict):
+        for field, value in result.items():
+            if field in ARTIFACT_PATH_FIELDS and isinstance(value, str):
+                yield value
+            else:
+                yield from artifact_paths(value)
+    elif isinstance(result, list):
+        for item in result:
+            yield from artifact_paths(item)
+
+
+def artifacts_present(result: Dict[str, Any]) -> bool:
+    return all(os.path.isfile(path) for path in artifact_paths(result))
+
+
+class _InFlight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """
+    Two-tier result cache with request coalescing
+
+    get_or_compute(key, compute) returns (result, status): a cached result
+    (HIT), the result of a computation already running for the same key
+    (COALESCED), or compute()'s result, which is then cached (MISS).
+    Failures are not cached; coalesced callers see the same exception.
+    Cached results failing validate() (by default: an artifact they
+    reference was deleted) are recomputed.
+    """
+
+    def __init__(self, memory: MemorySessionStore, disk: Optional[SQLiteSessionStore] = None,
+                 enabled: bool = True,
+                 validate: Optional[Callable[[Dict[str, Any]], bool]] = artifacts_present):
+        self.memory = memory
+        self.disk = disk
+        self.enabled = enabled
+        self.validate = validate
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+        self._inflight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.memory.get(key)
+        if result is None and self.disk is not None:
+            result = self.disk.get(key)
+            if result is not None:
+                self.memory.put(key, result)
+        if result is not None and self.validate is not None and not self.validate(result):
+            # Recomputed by the caller; put() then replaces the entry in both tiers
+            self.stale += 1
+            return None
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        self.memory.put(key, result)
+        if self.disk is not None:
+            self.disk.put(key, result)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+        if not self.enabled:
+            return compute(), MISS
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                cached = self.get(key)
+                if cached is not None:
+                    self.hits += 1
+                    return cached, HIT
+                call = self._inflight[key] = _InFlight()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            with self._lock:
+                self.coalesced += 1
+            # Each caller gets its own copy, as on a cache hit
+            return json.loads(json.dumps(call.result, default=str)), COALESCED
+
+        try:
+            call.result = compute()
+            self.put(key, call.result)
+            with self._lock:
+                self.misses += 1
+            return call.result, MISS
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'stale': self.stale,
+            'in_flight': len(self._inflight),
+            'memory': self.memory.stats(),
+            'disk': self.disk.stats() if self.disk is not None else None
+        }
+
+
+def create_result_cache() -> ResultCache:
+    """Build the result cache configured through the environment"""
+    # Never outlive the artifacts the cached responses point to
+    ttl_seconds = int(min(float(os.getenv('RESULT_CACHE_TTL_SECONDS', '3600')), ARTIFACT_MAX_AGE))
+    memory = MemorySessionStore(
+        max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '256')),
+        max_bytes=int(os.getenv('RESULT_CACHE_MAX_MB', '64')) * 1024 * 1024,
+        ttl_seconds=ttl_seconds
+    )
+    disk = None
+    disk_path = os.getenv('RESULT_CACHE_DB_PATH')
+    if disk_path:
+        logger.info(f"Using SQLite result cache tier: {disk_path}")
+        disk = SQLiteSessionStore(path=disk_path, ttl_seconds=ttl_seconds,
+                                  max_entries=int(os.getenv('RESULT_CACHE_DB_MAX_ENTRIES', '10000')))
+    return ResultCache(memory, disk, enabled=os.getenv('RESULT_CACHE', 'true').lower() == 'true')
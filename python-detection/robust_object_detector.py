@@ -4,14 +4,20 @@
 Détecteur robuste pour tous types d'objets perdus avec filtrage intelligent
 """
 
-import cv2
 import numpy as np
 import json
 import logging
 import os
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from ultralytics import YOLO
+
+from frame_sampler import FrameSampler
+from frame_gate import FrameGate
+from model_registry import get_yolo_model
+from inference_executor import get_inference_executor
+from detection_logging import current_request_id
+from artifact_store import Artifact, ArtifactStore, get_artifact_store
+from taxonomy import ROBUST_CATEGORIES, ROBUST_KEYWORD_CATEGORIES, ClassTable, robust_classification
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -40,13 +46,9 @@ class RobustLostObjectDetector:
             if not os.path.exists(model_path):
                 logger.warning(f"Model file {model_path} not found, YOLO will download it")
             
-            self.model = YOLO(model_path)
-            logger.info("✅ YOLO model loaded successfully")
-            
-            # Test the model
-            test_frame = np.zeros((100, 100, 3), dtype=np.uint8)
-            results = self.model(test_frame, verbose=False)
-            logger.info("✅ Model test successful")
+            # Shared instance, loaded and test-run once per process
+            self.model = get_yolo_model(model_path)
+            logger.info("✅ YOLO model ready")
             
         except Exception as e:
             logger.error(f"❌ Could not initialize YOLO model: {e}")
@@ -56,82 +58,19 @@ class RobustLostObjectDetector:
     def _setup_categories(self):
         """Configure les catégories d'objets perdus avec classification intelligente"""
         
-        # Catégories principales avec leurs variantes YOLO
-        self.category_mapping = {
-            # Sacs et bagages
-            'BAGS': {
-                'keywords': ['suitcase', 'luggage', 'backpack', 'handbag', 'bag', 'purse', 'briefcase', 'duffel bag'],
-                'priority': 0.9,  # Priorité élevée pour les sacs
-                'min_size_ratio': 0.0001  # Taille minimum très petite
-            },
-            
-            # Électronique
-            'ELECTRONICS': {
-                'keywords': ['cell phone', 'mobile phone', 'laptop', 'tablet', 'camera', 'keyboard', 
-                           'mouse', 'headphones', 'charger', 'power bank'],
-                'priority': 0.95,  # Priorité très élevée
-                'min_size_ratio': 0.0005
-            },
-            
-            # Objets personnels
-            'PERSONAL': {
-                'keywords': ['wallet', 'keys', 'sunglasses', 'glasses', 'watch', 'jewelry', 
-                           'ring', 'necklace', 'bracelet'],
-                'priority': 0.9,
-                'min_size_ratio': 0.0002
-            },
-            
-            # Vêtements et accessoires
-            'CLOTHING': {
-                'keywords': ['hat', 'cap', 'jacket', 'coat', 'scarf', 'gloves', 'shoes', 
-                           'sneakers', 'boots', 'shirt', 'pants'],
-                'priority': 0.7,
-                'min_size_ratio': 0.002
-            },
-            
-            # Objets divers
-            'MISCELLANEOUS': {
-                'keywords': ['book', 'bottle', 'cup', 'umbrella', 'sports ball', 'teddy bear', 
-                           'toy', 'document', 'paper', 'folder', 'pen', 'pencil'],
-                'priority': 0.6,
-                'min_size_ratio': 0.0008
-            },
-            
-            # Cas spéciaux YOLO
-            'SPECIAL': {
-                'keywords': ['train'],  # YOLO confond parfois les valises avec des trains
-                'priority': 0.8,
-                'min_size_ratio': 0.001
-            }
-        }
+        # Catégories principales avec leurs variantes YOLO (taxonomy.py)
+        self.category_mapping = ROBUST_CATEGORIES
+        self.keyword_to_category = ROBUST_KEYWORD_CATEGORIES
         
-        # Créer un index de recherche rapide
-        self.keyword_to_category = {}
-        for category, config in self.category_mapping.items():
-            for keyword in config['keywords']:
-                self.keyword_to_category[keyword.lower()] = category
+        # Catégorie et priorité par classe du modèle, calculées une seule fois
+        self.class_table = ClassTable(self.model.names, 'robust')
     
     def _classify_object(self, class_name: str) -> Tuple[str, float]:
         """
         Classifie un objet détecté par YOLO
         Retourne: (category, priority)
         """
-        class_name_lower = class_name.lower()
-        
-        # Recherche exacte d'abord
-        if class_name_lower in self.keyword_to_category:
-            category = self.keyword_to_category[class_name_lower]
-            priority = self.category_mapping[category]['priority']
-            return category, priority
-        
-        # Recherche partielle si pas de correspondance exacte
-        for keyword, category in self.keyword_to_category.items():
-            if keyword in class_name_lower or class_name_lower in keyword:
-                priority = self.category_mapping[category]['priority']
-                return category, priority
-        
-        # Catégorie par défaut
-        return 'MISCELLANEOUS', 0.5
+        return robust_classification(class_name)
     
     def detect_lost_objects(self, video_path: str) -> Dict:
         """
@@ -151,12 +90,13 @@ class RobustLostObjectDetector:
         
         # Sélection du meilleur objet
         best_object = self._select_best_object(detected_objects)
+        if best_object:
+            best_object['image_artifact'] = self._save_object_image(best_object)
         
         # Génération du rapport
         report = self._generate_report(best_object, video_path, detected_objects)
         
         if best_object:
-            self._save_object_image(best_object)
             logger.info(f"🎉 Object detected successfully!")
             logger.info(f"📦 Category: {best_object['category']}")
             logger.info(f"📊 Confidence: {best_object['confidence']:.1%}")
@@ -190,55 +130,55 @@ class RobustLostObjectDetector:
     
     def _process_video_frames(self, video_path: str) -> List[Dict]:
         """Traite les frames de la vidéo et détecte les objets"""
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
+        sampler = FrameSampler(video_path, reuse_buffers=True)
         
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = sampler.fps
+        total_frames = sampler.total_frames
+        width = sampler.width
+        height = sampler.height
         
         logger.info(f"📹 Video: {width}x{height}, {fps:.1f}fps, {total_frames} frames")
         
         detected_objects = []
-        frame_count = 0
         
         # Traiter un échantillon de frames (pour optimiser les performances)
-        process_interval = max(1, min(10, int(fps // 2)))  # Maximum 2 frames par seconde
-        
-        try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+        sampler.every_n_frames = max(1, min(10, int(fps // 2)))  # Maximum 2 frames par seconde
+        # Les frames quasi identiques réutilisent les résultats YOLO précédents
+        gate = FrameGate()
+        
+        with sampler:
+            for sample in sampler:
+                frame_count = sample.frame_number
+                progress = (frame_count / total_frames) * 100 if total_frames else 0.0
+                logger.info(f"🔍 Analyzing frame {frame_count}/{total_frames} ({progress:.1f}%)")
                 
-                frame_count += 1
+                # Détection YOLO
+                frame_objects = self._detect_frame_objects(sample.image, frame_count, fps,
+                                                           gate=gate, timestamp=sample.timestamp)
+                detected_objects.extend(frame_objects)
                 
-                if frame_count % process_interval == 0:
-                    progress = (frame_count / total_frames) * 100
-                    logger.info(f"🔍 Analyzing frame {frame_count}/{total_frames} ({progress:.1f}%)")
-                    
-                    # Détection YOLO
-                    frame_objects = self._detect_frame_objects(frame, frame_count, fps)
-                    detected_objects.extend(frame_objects)
-                    
-                    # Arrêter si on a trouvé suffisamment d'objets avec haute confiance
-                    high_conf_objects = [obj for obj in detected_objects if obj['confidence'] > 0.8]
-                    if len(high_conf_objects) >= 3:
-                        logger.info(f"🎯 Found {len(high_conf_objects)} high-confidence objects, stopping early")
-                        break
-            
-        finally:
-            cap.release()
+                # Arrêter si on a trouvé suffisamment d'objets avec haute confiance
+                high_conf_objects = [obj for obj in detected_objects if obj['confidence'] > 0.8]
+                if len(high_conf_objects) >= 3:
+                    logger.info(f"🎯 Found {len(high_conf_objects)} high-confidence objects, stopping early")
+                    break
         
         logger.info(f"📊 Total objects detected: {len(detected_objects)}")
         return detected_objects
     
-    def _detect_frame_objects(self, frame: np.ndarray, frame_number: int, fps: float) -> List[Dict]:
-        """Détecte les objets dans une frame"""
+    def _run_model(self, frame: np.ndarray):
+        # Modèle partagé via le registre : il ne tourne que sur le thread de son exécuteur
+        return [get_inference_executor(self.model).infer(frame, verbose=False,
+                                                          classes=self.class_table.class_filter())]
+
+    def _detect_frame_objects(self, frame: np.ndarray, frame_number: int, fps: float,
+                              gate: Optional[FrameGate] = None, timestamp: float = 0.0) -> List[Dict]:
+        """Détecte les objets dans une frame (crops toujours pris sur la frame courante)"""
         try:
-            results = self.model(frame, verbose=False)
+            if gate is None:
+                results = self._run_model(frame)
+            else:
+                results = gate.detect(frame, timestamp, self._run_model)
             frame_objects = []
             
             for result in results:
@@ -248,13 +188,14 @@ class RobustLostObjectDetector:
                         confidence = float(box.conf[0])
                         class_id = int(box.cls[0])
                         class_name = self.model.names[class_id]
+                        class_info = self.class_table[class_id]
                         
                         if confidence < self.confidence_threshold:
                             logger.debug(f"⚠️ Object {class_name} filtered out - confidence {confidence:.2f} < {self.confidence_threshold}")
                             continue
                         
                         # Classification de l'objet
-                        category, priority = self._classify_object(class_name)
+                        category, priority = class_info.category, class_info.priority
                         
                         # Validation de la taille
                         bbox = box.xyxy[0].cpu().numpy()
@@ -380,7 +321,8 @@ class RobustLostObjectDetector:
             crop_x2 = min(frame_width, center_x + half_size)
             crop_y2 = min(frame_height, center_y + half_size)
         
-        cropped = frame[crop_y1:crop_y2, crop_x1:crop_x2]
+        # Copie pour survivre à la réutilisation du buffer de frame
+        cropped = frame[crop_y1:crop_y2, crop_x1:crop_x2].copy()
         
         logger.info(f"🖼️ Cropped object: {crop_x2-crop_x1}x{crop_y2-crop_y1} with {int(padding_factor*100)}% padding")
         return cropped
@@ -435,6 +377,7 @@ class RobustLostObjectDetector:
         }
         
         if best_object:
+            artifact = best_object.get('image_artifact')
             report['detected_object'] = {
                 'category': best_object['category'],
                 'class_name': best_object['class_name'],
@@ -444,7 +387,9 @@ class RobustLostObjectDetector:
                 'found_at_time': best_object['video_timestamp'],
                 'frame_number': best_object['frame_number'],
                 'bounding_box': best_object['bbox'],
-                'image_saved': 'robust_object_detection.jpg'
+                'image_saved': artifact.name if artifact else None,
+                'image_path': artifact.path if artifact else None,
+                'image_url': artifact.url if artifact else None
             }
             
             # Maintenir la compatibilité avec l'ancien format
@@ -452,22 +397,17 @@ class RobustLostObjectDetector:
         
         return report
     
-    def _save_object_image(self, obj: Dict):
-        """Sauvegarde l'image de l'objet détecté"""
+    def _save_object_image(self, obj: Dict) -> Optional[Artifact]:
+        """Sauvegarde l'image de l'objet détecté dans l'artifact store (un namespace par requête)"""
         try:
-            os.makedirs("strict_detections", exist_ok=True)
-            
-            output_path = "strict_detections/robust_object_detection.jpg"
-            cv2.imwrite(output_path, obj['cropped_image'], [cv2.IMWRITE_JPEG_QUALITY, 95])
-            
-            # Sauvegarder aussi avec l'ancien nom pour compatibilité
-            cv2.imwrite("strict_detections/strict_object_detection.jpg", 
-                       obj['cropped_image'], [cv2.IMWRITE_JPEG_QUALITY, 95])
-            
-            logger.info(f"💾 Object image saved: {output_path}")
-            
+            artifact = get_artifact_store().put_image(
+                obj['cropped_image'], ArtifactStore.new_namespace(current_request_id()))
         except Exception as e:
             logger.error(f"❌ Failed to save object image: {e}")
+            return None
+        
+        logger.info(f"💾 Object image saved: {artifact.path}")
+        return artifact
 
 
 def main():
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Session Store - bounded storage for detection session results
+In-memory LRU+TTL store with a byte budget, or a SQLite store shared by
+worker processes that survives restarts. Selected with SESSION_STORE.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """Interface used by the detection APIs"""
+
+    @abstractmethod
+    def put(self, session_id: str, result: Dict[str, Any]):
+        """Store a result, replacing any previous one for session_id"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """The stored result, or None if unknown or expired"""
+
+    def __setitem__(self, session_id: str, result: Dict[str, Any]):
+        self.put(session_id, result)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Backend, size and limits, for /health"""
+
+
+class MemorySessionStore(SessionStore):
+    """LRU store with per-entry TTL, entry cap and byte-size cap"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # session_id -> (expires_at, size, serialized result)
+        self.entries: 'OrderedDict[str, Tuple[float, int, str]]' = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def put(self, session_id: str, result: Dict[str, Any]):
+        # Stored serialized: the size is exact and callers cannot mutate stored results
+        payload = json.dumps(result, default=str)
+        size = len(payload)
+        if size > self.max_bytes:
+            logger.warning(f"Session {session_id} ({size} bytes) exceeds the store budget, not stored")
+            return
+
+        with self.lock:
+            self._remove(session_id)
+            self.entries[session_id] = (time.time() + self.ttl_seconds, size, payload)
+            self.total_bytes += size
+            self._evict()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._remove(session_id)
+                return None
+            self.entries.move_to_end(session_id)
+            payload = entry[2]
+        return json.loads(payload)
+
+    def _remove(self, session_id: str):
+        entry = self.entries.pop(session_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def _evict(self):
+        now = time.time()
+        for session_id in [sid for sid, entry in self.entries.items() if entry[0] < now]:
+            self._remove(session_id)
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """On-disk store, safe to share between worker processes"""
+
+    def __init__(self, path: str = 'sessions.db', ttl_seconds: int = 3600,
+                 max_entries: int = 10000, cleanup_interval: int = 60):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = 0.0
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, sqlite3 connections are not shareable across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def put(self, session_id: str, result: Dict[str, Any]):
+        now = time.time()
+        payload = json.dumps(result, default=str)
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (session_id, result, created_at, expires_at) VALUES (?, ?, ?, ?)',
+                (session_id, payload, now, now + self.ttl_seconds)
+            )
+        if now - self._last_cleanup > self.cleanup_interval:
+            self._cleanup(now)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            'SELECT result FROM sessions WHERE session_id = ? AND expires_at >= ?',
+            (session_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _cleanup(self, now: float):
+        self._last_cleanup = now
+        with self._connect() as conn:
+            conn.execute('DELETE FROM sessions WHERE expires_at < ?', (now,))
+            conn.execute('''
+                DELETE FROM sessions WHERE session_id IN (
+                    SELECT session_id FROM sessions ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def stats(self) -> Dict[str, Any]:
+        count = self._connect().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'entries': count,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds
+        }
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store configured through the environment"""
+    backend = os.getenv('SESSION_STORE', 'memory').lower()
+    ttl_seconds = int(os.getenv('SESSION_TTL_SECONDS', '3600'))
+
+    if backend == 'sqlite':
+        path = os.getenv('SESSION_DB_PATH', 'sessions.db')
+        logger.info(f"Using SQLite session store: {path}")
+        return SQLiteSessionStore(
+            path=path,
+            ttl_seconds=ttl_seconds,
+            max_entries=int(os.getenv('SESSION_MAX_ENTRIES', '10000'))
+        )
+    if backend != 'memory':
+        raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
+
+    return MemorySessionStore(
+        max_entries=int(os.getenv('SESSION_MAX_ENTRIES', '1000')),
+        max_bytes=int(os.getenv('SESSION_MAX_MB', '64')) * 1024 * 1024,
+        ttl_seconds=ttl_seconds
+    )
@@ -12,6 +12,11 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 from ultra_enhanced_detector import UltraEnhancedDetector
+from frame_sampler import FrameSampler
+from frame_gate import FrameGate
+from tracker import SortTracker
+from detection_logging import current_request_id
+from artifact_store import Artifact, ArtifactStore, get_artifact_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,6 +40,7 @@ class SingleObjectDetector:
         # Single object detection settings
         self.single_object_mode = True
         self.tracking_history = []
+        self.tracker = SortTracker(iou_threshold=0.3, max_age=4, bbox_format='xywh', label_key='category')
         
         logger.info("🎯 Single Object Detector initialized - Optimized for ONE primary object")
     
@@ -44,60 +50,61 @@ class SingleObjectDetector:
         """
         logger.info(f"🎬 Starting single object detection for: {video_path}")
         
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
+        sampler = FrameSampler(video_path, reuse_buffers=True)
         
         # Video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = sampler.fps
+        total_frames = sampler.total_frames
+        width = sampler.width
+        height = sampler.height
         
         logger.info(f"📹 Video: {width}x{height}, {fps}fps, {total_frames} frames")
         
         # Track ALL detections across frames to find the absolute best
         all_detections = []
-        frame_count = 0
-        process_interval = max(1, min(5, int(fps // 2)))  # Process every 5 frames max, or 2 times per second
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Process frames for the single object
-            if frame_count % process_interval == 0:
+        sampler.every_n_frames = max(1, min(5, int(fps // 2)))  # Process every 5 frames max, or 2 times per second
+        self.tracker.reset()
+        gate = FrameGate()  # near-duplicate frames reuse the last ensemble result
+        
+        with sampler:
+            for sample in sampler:
+                frame_count = sample.frame_number
+                frame = sample.image
                 logger.info(f"🔍 Analyzing frame {frame_count}/{total_frames}")
                 
-                # Get detections from ultra-enhanced detector
-                detections = self.detector.detect_objects_ensemble(frame)
+                # Get detections from ultra-enhanced detector, linked across frames
+                detections = self.tracker.update(
+                    gate.detect(frame, sample.timestamp, self.detector.detect_objects_ensemble), frame_count)
                 
                 if detections:
                     # Process each detection and score it
                     for detection in detections:
                         total_score = self._calculate_total_score(detection, frame, frame_count, fps)
-                        cropped_image = self.detector.smart_crop_with_context(frame, detection)
-                        timestamp = frame_count / fps
+                        timestamp = sample.timestamp
                         
                         detection_data = {
                             'frame_number': frame_count,
                             'timestamp': timestamp,
                             'video_timestamp': f"{int(timestamp//60):02d}:{int(timestamp%60):02d}",
                             'detection': detection,
-                            'cropped_image': cropped_image,
+                            'cropped_image': None,
                             'total_score': total_score,
                             'confidence': detection['confidence'],
                             'category': detection['category'],
                             'method': 'single_object_focused'
                         }
                         
+                        # Crop only when this is the best view of its track so far
+                        track = self.tracker.get(detection['track_id'])
+                        best = track.data.get('best')
+                        if not best or total_score > best['total_score']:
+                            detection_data['cropped_image'] = self.detector.smart_crop_with_context(frame, detection)
+                            if best:
+                                best['cropped_image'] = None
+                            track.data['best'] = detection_data
+                        
                         all_detections.append(detection_data)
         
-        cap.release()
-        
         # Find the ABSOLUTE best detection across all frames
         best_detection = None
         if all_detections:
@@ -120,13 +127,14 @@ class SingleObjectDetector:
             logger.info(f"⏱️  Found at: {best_detection['video_timestamp']}")
             logger.info(f"🏆 Total score: {best_detection['total_score']:.3f}")
         
+        if best_detection:
+            best_detection['image_artifact'] = self._save_best_detection(best_detection)
+        
         # Generate single object report with only the best detection
         frame_detections = [{'frame': d['frame_number'], 'detection': d['detection'], 'score': d['total_score']} for d in all_detections]
         report = self._generate_single_object_report(best_detection, frame_detections, video_path)
         
-        # Save the best detection image if found
         if best_detection:
-            self._save_best_detection(best_detection)
             logger.info(f"🎉 Single object detected successfully!")
         else:
             logger.warning("⚠️ No suitable object detected in the video")
@@ -246,13 +254,16 @@ class SingleObjectDetector:
         }
         
         if best_detection:
+            artifact = best_detection.get('image_artifact')
             report['best_detection'] = {
                 'category': best_detection['category'],
                 'confidence': f"{best_detection['confidence']:.1%}",
                 'total_score': f"{best_detection['total_score']:.3f}",
                 'found_at_time': best_detection['video_timestamp'],
                 'frame_number': best_detection['frame_number'],
-                'image_saved': f"single_object_detection.jpg",
+                'image_saved': artifact.name if artifact else None,
+                'image_path': artifact.path if artifact else None,
+                'image_url': artifact.url if artifact else None,
                 'bounding_box': best_detection['detection']['bbox']
             }
             
@@ -272,22 +283,20 @@ class SingleObjectDetector:
         
         return report
     
-    def _save_best_detection(self, detection: Dict):
+    def _save_best_detection(self, detection: Dict) -> Optional[Artifact]:
         """
-        Save the best detection image
+        Store the best detection image in the artifact store (namespaced per request)
         """
-        import os
-        os.makedirs("single_detections", exist_ok=True)
-        
-        output_path = "single_detections/single_object_detection.jpg"
-        
-        # Save with high quality
-        cv2.imwrite(output_path, detection['cropped_image'], [
-            cv2.IMWRITE_JPEG_QUALITY, 95,
-            cv2.IMWRITE_JPEG_OPTIMIZE, 1
-        ])
+        try:
+            artifact = get_artifact_store().put_image(
+                detection['cropped_image'], ArtifactStore.new_namespace(current_request_id()),
+                params=[cv2.IMWRITE_JPEG_QUALITY, 95, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+        except Exception as e:
+            logger.error(f"❌ Failed to store best detection image: {e}")
+            return None
         
-        logger.info(f"💾 Best detection saved: {output_path}")
+        logger.info(f"💾 Best detection saved: {artifact.path}")
+        return artifact
 
 
 def main():
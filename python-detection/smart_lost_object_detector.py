@@ -15,6 +15,10 @@ from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 import logging
 
+from frame_sampler import FrameSampler
+from detection_logging import current_request_id
+from artifact_store import ArtifactStore, get_artifact_store
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -55,32 +59,27 @@ class SmartLostObjectDetector:
         """
         Main detection pipeline - only detects ACTUALLY lost objects
         """
-        cap = cv2.VideoCapture(video_path)
         detections = []
-        frame_count = 0
         
         logger.info(f"📹 Processing video: {video_path}")
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            frame_count += 1
-            
-            # Process every 30th frame for efficiency
-            if frame_count % 30 == 0:
-                lost_objects = self._analyze_frame_for_lost_items(frame, frame_count)
+        # Crops of this run are stored together, apart from concurrent runs
+        namespace = ArtifactStore.new_namespace(current_request_id())
+        
+        # Process every 30th frame for efficiency
+        with FrameSampler(video_path, every_n_frames=30, reuse_buffers=True) as sampler:
+            for sample in sampler:
+                frame_count = sample.frame_number
+                lost_objects = self._analyze_frame_for_lost_items(sample.image, frame_count, namespace)
                 detections.extend(lost_objects)
                 
                 if lost_objects:
                     logger.info(f"✅ Frame {frame_count}: Found {len(lost_objects)} lost items")
         
-        cap.release()
         logger.info(f"🎯 Detection complete: {len(detections)} lost objects found")
         return detections
     
-    def _analyze_frame_for_lost_items(self, frame: np.ndarray, frame_num: int) -> List[Dict]:
+    def _analyze_frame_for_lost_items(self, frame: np.ndarray, frame_num: int,
+                                      namespace: Optional[str] = None) -> List[Dict]:
         """
         Intelligent frame analysis - only flags actually lost items
         """
@@ -103,14 +102,17 @@ class SmartLostObjectDetector:
                     'category': obj['category'],
                     'confidence': obj['confidence'],
                     'bbox': obj['bbox'],
-                    'cropped_image_path': f"detection_{frame_num}_{obj['category']}.jpg",
+                    'cropped_image_path': None,
+                    'cropped_image_url': None,
                     'context': obj['context'],
                     'abandonment_score': self._calculate_abandonment_score(obj),
                     'zoom_level': 'optimal'  # No excessive zoom
                 }
                 
                 # Save cropped image
-                self._save_cropped_image(cropped_img, detection['cropped_image_path'])
+                artifact = self._save_cropped_image(cropped_img, namespace or ArtifactStore.new_namespace())
+                detection['cropped_image_path'] = artifact.path
+                detection['cropped_image_url'] = artifact.url
                 lost_objects.append(detection)
         
         return lost_objects
@@ -466,19 +468,13 @@ class SmartLostObjectDetector:
         
         return min(base_score, 1.0)
     
-    def _save_cropped_image(self, cropped_img: np.ndarray, filename: str):
+    def _save_cropped_image(self, cropped_img: np.ndarray, namespace: str):
         """
-        Save cropped image with high quality
+        Store cropped image with high quality in the artifact store
         """
-        output_path = f"detections/{filename}"
-        
-        # Create directory if it doesn't exist
-        import os
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Save with high quality
-        cv2.imwrite(output_path, cropped_img, [cv2.IMWRITE_JPEG_QUALITY, 95])
-        logger.info(f"💾 Saved cropped image: {output_path}")
+        artifact = get_artifact_store().put_image(cropped_img, namespace)
+        logger.info(f"💾 Saved cropped image: {artifact.path}")
+        return artifact
     
     def process_video_stream(self, video_source: str) -> Dict:
         """
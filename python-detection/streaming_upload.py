@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Streaming Upload - decode a video while it is still being uploaded
+The request thread appends the raw body to a temp file while a detection job
+reads the same file through a blocking reader that waits for more bytes, so
+decoding (PyAV) starts with the first chunk instead of after the transfer.
+"""
+
+import io
+import os
+import struct
+import logging
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Optional, TypeVar
+
+from frame_sampler import DEFAULT_DECODE_BACKEND, HAS_PYAV, VideoOpenError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds the size limit"""
+
+
+class StreamingUpload:
+    """A temp file written by one thread and tailed by readers in others"""
+
+    def __init__(self, temp_dir: Optional[str] = None, suffix: str = '.mp4',
+                 stall_timeout: float = 60.0):
+        fd, self.path = tempfile.mkstemp(suffix=suffix, dir=temp_dir)
+        self._writer = os.fdopen(fd, 'wb')
+        self.stall_timeout = stall_timeout
+        self.bytes_written = 0
+        self.complete = False
+        self.error: Optional[str] = None
+        self._cond = threading.Condition()
+
+    def write(self, chunk: bytes):
+        self._writer.write(chunk)
+        self._writer.flush()
+        with self._cond:
+            self.bytes_written += len(chunk)
+            self._cond.notify_all()
+
+    def finish(self):
+        """Mark the upload complete; readers see EOF after the last byte"""
+        self._writer.close()
+        with self._cond:
+            self.complete = True
+            self._cond.notify_all()
+
+    def abort(self, error: str):
+        """Stop the upload; blocked readers raise instead of waiting"""
+        if not self._writer.closed:
+            self._writer.close()
+        with self._cond:
+            self.error = error
+            self.complete = True
+            self._cond.notify_all()
+
+    def copy_from(self, stream: BinaryIO, max_bytes: Optional[int] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+        """Copy a request body into the upload, then finish it; returns bytes copied"""
+        try:
+            while True:
+                if should_stop and should_stop():
+                    raise RuntimeError("Upload consumer stopped")
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                if max_bytes and self.bytes_written + len(chunk) > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes // (1024 * 1024)}MB")
+                self.write(chunk)
+        except Exception as e:
+            self.abort(str(e))
+            raise
+        self.finish()
+        return self.bytes_written
+
+    def wait_until(self, size: Optional[int] = None) -> int:
+        """
+        Block until size bytes are available (or the upload completed, if size is None)
+
+        Returns the number of bytes available. Raises IOError if the upload was
+        aborted or stalled for longer than stall_timeout.
+        """
+        with self._cond:
+            while not self.complete and (size is None or self.bytes_written < size):
+                if not self._cond.wait(self.stall_timeout):
+                    raise IOError(f"Upload stalled for {self.stall_timeout}s")
+            if self.error:
+                raise IOError(f"Upload aborted: {self.error}")
+            return self.bytes_written
+
+    def open_reader(self) -> 'GrowingFileReader':
+        return GrowingFileReader(self)
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        available = self.wait_until(offset + size)
+        if available < offset + size:
+            return b''
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def is_sequential(self) -> bool:
+        """
+        Whether the container can be demuxed front to back
+
+        MP4/MOV files need their 'moov' index before the media data; files that
+        were not written with faststart/fragmentation keep it at the end.
+        Other containers (MKV/WebM, AVI, MPEG-TS) are assumed sequential.
+        """
+        header = self._read_at(0, 8)
+        if header[4:8] != b'ftyp':
+            return True
+        offset = 0
+        while True:
+            header = self._read_at(offset, 16)
+            if len(header) < 8:
+                return False
+            size, box_type = struct.unpack('>I4s', header[:8])
+            if box_type == b'moov':
+                return True
+            if box_type == b'mdat' or size == 0:
+                return False
+            if size == 1:
+                size = struct.unpack('>Q', header[8:16])[0]
+            if size < 8:
+                return False
+            offset += size
+
+
+class GrowingFileReader(io.RawIOBase):
+    """
+    Non-seekable file object over a StreamingUpload that blocks for unwritten bytes
+
+    It is deliberately not seekable: demuxers then read sequentially instead of
+    asking for the file size or jumping to an index at the end, which would
+    stall until the whole upload has arrived.
+    """
+
+    def __init__(self, upload: StreamingUpload):
+        super().__init__()
+        self.upload = upload
+        self._file = open(upload.path, 'rb')
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        wanted = len(buffer)
+        if wanted == 0:
+            return 0
+        available = self.upload.wait_until(self._pos + 1)
+        count = min(wanted, available - self._pos)
+        if count <= 0:
+            return 0  # EOF: upload complete and fully read
+        self._file.seek(self._pos)
+        data = self._file.read(count)
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def decode_streaming(upload: StreamingUpload, decode: Callable[[Optional[BinaryIO]], T],
+                     backend: str = DEFAULT_DECODE_BACKEND) -> T:
+    """
+    Run decode(reader) on the upload while it is still arriving
+
+    Needs PyAV as the decode backend and a container that can be demuxed
+    front to back (MKV/WebM, fragmented or faststart MP4, AVI, MPEG-TS).
+    Otherwise - no PyAV, FRAME_DECODE_BACKEND=opencv, an MP4 whose index is
+    at the end, or a stream PyAV cannot open - waits for the upload to
+    complete and runs decode(None), meaning "decode upload.path".
+    """
+    if HAS_PYAV and backend in ('auto', 'pyav') and upload.is_sequential():
+        reader = upload.open_reader()
+        try:
+            return decode(reader)
+        except VideoOpenError as e:
+            logger.info(f"Cannot decode {upload.path} while streaming ({e}), decoding the complete file")
+        finally:
+            reader.close()
+    upload.wait_until()
+    return decode(None)
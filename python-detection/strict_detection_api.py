@@ -5,25 +5,41 @@ API endpoint for robust lost object detection - détecte tous types d'objets per
 avec filtrage intelligent et classification automatique
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
 import os
 import tempfile
-import base64
 import cv2
 import numpy as np
-import requests
-import json
+import time
 from strict_suitcase_detector import StrictSuitcaseDetector
+from inference_executor import get_inference_executor
+from image_ingest import decode_image_upload, make_spooled_request_class
+from metrics import observe_stage, register_metrics, stage_timer
+from detection_logging import diagnostics, init_request_logging, setup_logging
+from detection_jobs import JobManager, JobQueueFullError, create_jobs_blueprint, job_accepted_response
+from detection_stream import requested_stream_format, stream_response
+from taxonomy import ClassTable, realtime_category
+from persistence_outbox import create_persistence_outbox
+from thumbnails import ThumbnailCache, send_image
+from result_cache import create_result_cache, detection_result_key, save_upload_hashed
+from artifact_store import create_artifacts_blueprint, get_artifact_store
+from abandonment import AbandonmentMonitor, nearest_person_distances, people_boxes, proximity_thresholds
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Setup logging (console writes happen on a background thread)
+setup_logging(fmt='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 
+# Keep multipart uploads in memory up to UPLOAD_SPOOL_MAX_MB
+app.request_class = make_spooled_request_class()
+
+# Let a fronting web server send image files (X-Sendfile) when configured
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+
 # Initialize robust detector
 try:
     detector = StrictSuitcaseDetector(confidence_threshold=0.05)
@@ -32,13 +48,50 @@ except Exception as e:
     logger.error(f"❌ Failed to initialize detector: {e}")
     detector = None
 
+# Camera frame classification per model class id; person detections are kept for proximity checks
+if detector and detector.model:
+    realtime_classes = ClassTable(detector.model.names, 'realtime')
+    realtime_class_filter = realtime_classes.class_filter(realtime_classes.ids_for(['person']))
+else:
+    realtime_classes = realtime_class_filter = None
+
+# Background video detection jobs
+job_manager = JobManager.from_env()
+app.register_blueprint(create_jobs_blueprint(job_manager))
+
+# Durable outbox for lost-object saves, drained by a background sender
+persistence_outbox = create_persistence_outbox().start()
+
+# Content-addressed crops (/artifacts/<namespace>/<sha256>.jpg), GC'd by size and age
+app.register_blueprint(create_artifacts_blueprint(get_artifact_store()))
+
+# Results for re-uploaded videos, keyed by content hash + endpoint + model + config
+result_cache = create_result_cache()
+
+# Lazily generated thumbnails of saved detection images
+os.makedirs('detected_objects', exist_ok=True)
+thumbnail_cache = ThumbnailCache('detected_objects')
+
+# Per-camera temporal abandonment state for /detect/image frames sent with a camera_id
+abandonment_monitor = AbandonmentMonitor()
+
+# Prometheus metrics on /metrics
+register_metrics(app, 'strict_detection_api', job_pending_count=job_manager.pending_count)
+
+# Request ids, JSON request summaries and /debug/diagnostics
+init_request_logging(app, 'strict_detection_api')
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'service': 'strict_detection_api',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'persistence_outbox': persistence_outbox.stats(),
+        'thumbnail_cache': thumbnail_cache.stats(),
+        'artifact_store': get_artifact_store().stats(),
+        'result_cache': result_cache.stats()
     })
 
 @app.route('/detect/strict', methods=['POST'])
@@ -58,17 +111,10 @@ def detect_strict():
         if video_file.filename == '':
             return jsonify({'error': 'No video file selected'}), 400
         
-        # Validate file type
-        allowed_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv'}
-        file_extension = os.path.splitext(video_file.filename.lower())[1]
-        
-        if file_extension not in allowed_extensions:
-            return jsonify({'error': f'Unsupported video format: {file_extension}. Supported formats: {", ".join(allowed_extensions)}'}), 400
-        
-        # Save uploaded video temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_video:
-            video_file.save(temp_video.name)
-            temp_video_path = temp_video.name
+        # Validate file type and save uploaded video temporarily
+        temp_video_path, upload_hash, error = _save_video_upload(video_file)
+        if error:
+            return jsonify({'error': error}), 400
         
         logger.info(f"📹 Processing video: {video_file.filename}")
         logger.info(f"📁 Temp file size: {os.path.getsize(temp_video_path)} bytes")
@@ -77,76 +123,32 @@ def detect_strict():
         if not detector:
             return jsonify({'error': 'Detection model not available'}), 500
         
-        # Run strict suitcase detection
-        detection_result = detector.detect_main_suitcase(temp_video_path)
-        
-        # Convert result for API response
-        api_response = {
-            'success': True,
-            'method': 'strict_suitcase_detection',
-            'processing_info': {
-                'filename': video_file.filename,
-                'detection_method': 'Strict Suitcase Detection',
-                'total_detections': 1 if detection_result['detection_result']['object_found'] else 0,
-                'categories_detected': ['BAGS'] if detection_result['detection_result']['object_found'] else []
-            }
-        }
-        
-        if detection_result['detection_result']['object_found']:
-            detected_obj = detection_result['suitcase']
-            
-            # Convert cropped image to base64 (try multiple paths for compatibility)
-            cropped_image_path = None
-            for path in ['strict_detections/robust_object_detection.jpg', 
-                        'strict_detections/strict_object_detection.jpg']:
-                if os.path.exists(path):
-                    cropped_image_path = path
-                    break
-            
-            img_url = None
-            if cropped_image_path:
-                try:
-                    with open(cropped_image_path, 'rb') as img_file:
-                        img_data = img_file.read()
-                        img_base64 = base64.b64encode(img_data).decode('utf-8')
-                        img_url = f"data:image/jpeg;base64,{img_base64}"
-                except Exception as e:
-                    logger.error(f"❌ Failed to encode image: {e}")
-            
-            # Parse confidence (handle both percentage string and float)
-            confidence = detected_obj['confidence']
-            if isinstance(confidence, str) and '%' in confidence:
-                confidence_value = float(confidence.replace('%', '')) / 100
-            else:
-                confidence_value = float(confidence)
-            
-            api_response['objects'] = [{
-                'id': f'robust_object_{detected_obj["frame_number"]:03d}',
-                'category': detected_obj['category'],
-                'class_name': detected_obj.get('class_name', 'unknown'),
-                'confidence': confidence_value,
-                'bbox': detected_obj['bounding_box'],
-                'timestamp': detected_obj['found_at_time'],
-                'frame_number': detected_obj['frame_number'],
-                'cropped_image_url': img_url,
-                'detection_score': float(detected_obj['score'].replace('%', '')) if isinstance(detected_obj['score'], str) else float(detected_obj['score']),
-                'priority': detected_obj.get('priority', '0.5'),
-                'detection_notes': f'{detected_obj.get("class_name", "Object")} detected with robust filtering'
-            }]
-            api_response['total_objects'] = 1
-            
-            logger.info(f"✅ Robust detection successful: {detected_obj['confidence']} confidence, category: {detected_obj['category']}")
-        else:
-            api_response['objects'] = []
-            api_response['total_objects'] = 0
-            api_response['message'] = 'No objects detected with robust filtering'
+        filename = video_file.filename
+        stream_format = requested_stream_format(request)
+        if stream_format:
+            # Per-frame candidates as they are found, the usual response as the summary
+            def cleanup():
+                if os.path.exists(temp_video_path):
+                    os.unlink(temp_video_path)
             
-            logger.warning("⚠️ No objects detected with robust filtering")
+            return stream_response(stream_format, lambda stream: _build_strict_response(
+                detector.detect_main_suitcase(temp_video_path, progress_callback=stream.progress_callback,
+                                              frame_callback=stream.frame_callback), filename), cleanup=cleanup)
+        
+        # Run strict suitcase detection (re-uploads of the same video reuse the cached result)
+        key = detection_result_key(upload_hash, 'detect/strict', detector.model_path, detector.inference_backend,
+                                   detector.new_frame_gate().settings(), detector='strict',
+                                   confidence_threshold=detector.confidence_threshold)
+        api_response, cache_status = result_cache.get_or_compute(key, lambda: _build_strict_response(
+            detector.detect_main_suitcase(temp_video_path), filename))
+        api_response['processing_info']['filename'] = filename
         
         # Cleanup temp file
         os.unlink(temp_video_path)
         
-        return jsonify(api_response)
+        response = jsonify(api_response)
+        response.headers['X-Cache'] = cache_status
+        return response
         
     except Exception as e:
         logger.error(f"❌ Strict detection failed: {str(e)}")
@@ -164,10 +166,128 @@ def detect_strict():
             'method': 'strict_suitcase_detection'
         }), 500
 
+def _build_strict_response(detection_result, filename):
+    """
+    Convert a StrictSuitcaseDetector report into the /detect/strict response body
+    """
+    # Convert result for API response
+    api_response = {
+        'success': True,
+        'method': 'strict_suitcase_detection',
+        'processing_info': {
+            'filename': filename,
+            'detection_method': 'Strict Suitcase Detection',
+            'total_detections': 1 if detection_result['detection_result']['object_found'] else 0,
+            'categories_detected': ['BAGS'] if detection_result['detection_result']['object_found'] else []
+        }
+    }
+    
+    if detection_result['detection_result']['object_found']:
+        detected_obj = detection_result['suitcase']
+        
+        # Crops are served from the artifact store instead of being inlined as base64
+        img_url = detected_obj.get('image_url')
+        
+        # Parse confidence (handle both percentage string and float)
+        confidence = detected_obj['confidence']
+        if isinstance(confidence, str) and '%' in confidence:
+            confidence_value = float(confidence.replace('%', '')) / 100
+        else:
+            confidence_value = float(confidence)
+        
+        api_response['objects'] = [{
+            'id': f'robust_object_{detected_obj["frame_number"]:03d}',
+            'category': detected_obj['category'],
+            'class_name': detected_obj.get('class_name', 'unknown'),
+            'confidence': confidence_value,
+            'bbox': detected_obj['bounding_box'],
+            'timestamp': detected_obj['found_at_time'],
+            'frame_number': detected_obj['frame_number'],
+            'cropped_image_url': img_url,
+            'screenshot_path': detected_obj.get('image_path'),
+            'detection_score': float(detected_obj['score'].replace('%', '')) if isinstance(detected_obj['score'], str) else float(detected_obj['score']),
+            'priority': detected_obj.get('priority', '0.5'),
+            'detection_notes': f'{detected_obj.get("class_name", "Object")} detected with robust filtering'
+        }]
+        api_response['total_objects'] = 1
+        
+        logger.info(f"✅ Robust detection successful: {detected_obj['confidence']} confidence, category: {detected_obj['category']}")
+    else:
+        api_response['objects'] = []
+        api_response['total_objects'] = 0
+        api_response['message'] = 'No objects detected with robust filtering'
+        
+        logger.warning("⚠️ No objects detected with robust filtering")
+    
+    return api_response
+
+def _save_video_upload(video_file):
+    """Validate the extension and save an uploaded video to a temp file
+    
+    Returns (temp_path, content_hash, None), or (None, None, error message)
+    """
+    allowed_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv'}
+    file_extension = os.path.splitext(video_file.filename.lower())[1]
+    
+    if file_extension not in allowed_extensions:
+        return None, None, f'Unsupported video format: {file_extension}. Supported formats: {", ".join(allowed_extensions)}'
+    
+    with stage_timer('upload_save'), tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_video:
+        upload_hash = save_upload_hashed(video_file, temp_video.name)
+        return temp_video.name, upload_hash, None
+
+@app.route('/jobs/strict', methods=['POST'])
+def submit_strict_job():
+    """
+    Queue a strict detection job - returns a job id immediately,
+    poll /jobs/<id> for progress and /jobs/<id>/results for the result
+    """
+    try:
+        if 'video' not in request.files:
+            return jsonify({'error': 'No video file provided'}), 400
+        
+        video_file = request.files['video']
+        if video_file.filename == '':
+            return jsonify({'error': 'No video file selected'}), 400
+        
+        if not detector:
+            return jsonify({'error': 'Detection model not available'}), 500
+        
+        temp_video_path, _, error = _save_video_upload(video_file)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        filename = video_file.filename
+        try:
+            job = job_manager.submit(
+                'strict', filename,
+                lambda progress: _build_strict_response(
+                    detector.detect_main_suitcase(temp_video_path, progress_callback=progress), filename),
+                cleanup_path=temp_video_path
+            )
+        except JobQueueFullError as e:
+            os.unlink(temp_video_path)
+            return jsonify({'success': False, 'error': str(e)}), 503
+        
+        logger.info(f"📥 Queued strict detection job {job.id} for {filename}")
+        return job_accepted_response(job)
+        
+    except Exception as e:
+        logger.error(f"❌ Job submission failed: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Job submission failed: {str(e)}',
+            'method': 'strict_suitcase_detection'
+        }), 500
+
 @app.route('/detect/image', methods=['POST'])
 def detect_image():
     """
     Image detection endpoint for real-time camera frames
+    
+    With a camera_id (form field or X-Camera-Id header) objects are judged
+    over that camera's previous frames: they are only reported as abandoned,
+    and saved, once they stayed unattended and still long enough.
     """
     try:
         logger.info("🖼️ Received image detection request")
@@ -191,27 +311,26 @@ def detect_image():
         if not detector:
             return jsonify({'error': 'Detection model not available'}), 500
         
-        # Read image data
-        image_data = image_file.read()
-        
-        # Convert to OpenCV format
-        nparr = np.frombuffer(image_data, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Decode straight from the spooled upload to OpenCV format
+        with stage_timer('decode'):
+            image = decode_image_upload(image_file)
         
         if image is None:
             return jsonify({'error': 'Invalid image data'}), 400
         
         logger.info(f"📷 Processing image: {image_file.filename} ({image.shape})")
         
-        # Run detection on single frame
-        detections = detector.model(image, conf=detector.confidence_threshold, verbose=False)
+        # Run detection on single frame (micro-batched with concurrent camera requests)
+        result = get_inference_executor(detector.model).infer(image, conf=detector.confidence_threshold, verbose=False,
+                                                              classes=realtime_class_filter)
         
         # Process detections
+        postprocess_start = time.perf_counter()
         all_detections = []
         people_detections = []
         
-        if len(detections) > 0 and len(detections[0].boxes) > 0:
-            for box in detections[0].boxes:
+        if len(result.boxes) > 0:
+            for box in result.boxes:
                 conf = float(box.conf[0])
                 class_id = int(box.cls[0])
                 class_name = detector.model.names[class_id]
@@ -219,6 +338,7 @@ def detect_image():
                 
                 detection_obj = {
                     'class': class_name,
+                    'class_id': class_id,
                     'confidence': conf,
                     'bbox': [int(x1), int(y1), int(x2), int(y2)]
                 }
@@ -229,63 +349,68 @@ def detect_image():
                 else:
                     all_detections.append(detection_obj)
         
-        # Filter objects that are NOT near people (lost objects logic)
-        objects_detected = []
+        # Objects that pass the category and confidence filters
+        candidates = []
         
         for obj_detection in all_detections:
             class_name = obj_detection['class']
             conf = obj_detection['confidence']
             bbox = obj_detection['bbox']
             
-            # Apply category mapping
-            category = detector._map_category(class_name)
-            
-            # Additional validation for common misclassifications
-            category = _validate_and_correct_classification(class_name, category, conf)
-            
-            # Enhanced filtering: exclude people, furniture, vehicles and apply confidence thresholds
-            min_confidence = {
-                'BAGS': 0.5,           # Higher threshold for bags - better precision
-                'ELECTRONICS': 0.6,    # Higher threshold for electronics
-                'CLOTHING': 0.6,       # Higher threshold for clothing  
-                'PERSONAL': 0.7,       # Higher threshold for personal items
-                'MISCELLANEOUS': 0.7   # Higher threshold for misc items
-            }
+            # Category and per-category confidence threshold, resolved at model load (taxonomy.py)
+            class_info = realtime_classes[obj_detection['class_id']]
+            category = class_info.category
             
             # Check if object meets confidence and category requirements
-            if (category != 'EXCLUDED' and 
-                category in min_confidence and 
-                conf >= min_confidence[category]):
-                
-                # Check if object is near a person (not lost if near person)
-                is_near_person = _is_object_near_person(bbox, people_detections, image.shape[:2])
-                
-                if not is_near_person:  # Only add if NOT near a person (truly lost)
-                    logger.info(f"✅ Object {class_name} is ALONE - marking as potentially lost")
-                    objects_detected.append({
-                        'category': category,
-                        'class': class_name,
-                        'confidence': conf,
-                        'bbox': bbox,
-                        'source': 'yolo_realtime',
-                        'context': 'unattended'  # Object is unattended
-                    })
-                else:
-                    logger.info(f"⚠️ Object {class_name} is near person - NOT marking as lost")
+            if class_info.relevant and conf >= class_info.min_confidence:
+                candidates.append({
+                    'category': category,
+                    'class': class_name,
+                    'confidence': conf,
+                    'bbox': bbox,
+                    'source': 'yolo_realtime',
+                    'context': 'unattended'  # Object is unattended
+                })
+            elif category == 'EXCLUDED':
+                diagnostics.debug("🚫 Excluded %s from detection", class_name)
             else:
-                if category == 'EXCLUDED':
-                    logger.debug(f"🚫 Excluded {class_name} from detection")
-                else:
-                    logger.debug(f"❌ {class_name} failed confidence threshold ({conf:.3f} < {min_confidence.get(category, 0.5)})")
+                diagnostics.debug("❌ %s failed confidence threshold (%.3f < %s)", class_name, conf, class_info.min_confidence)
+        
+        camera_id = request.form.get('camera_id') or request.headers.get('X-Camera-Id')
+        if camera_id:
+            # Temporal decision: stationary, no owner nearby for long enough, still confident
+            timestamp = request.form.get('timestamp', type=float)
+            candidates, objects_to_save = abandonment_monitor.update(
+                camera_id, candidates, people_detections, image.shape[:2], timestamp)
+            objects_detected = [obj for obj in candidates if not obj['near_person']]
+            for obj in objects_detected:
+                if obj['abandoned']:
+                    obj['context'] = 'abandoned'
+        else:
+            # Filter objects that are NOT near people (lost objects logic)
+            near_person = _objects_near_people([obj['bbox'] for obj in candidates], people_detections, image.shape[:2])
+            objects_detected = [obj for obj, near in zip(candidates, near_person) if not near]
+            objects_to_save = objects_detected
+        
+        alone = {id(obj) for obj in objects_detected}
+        for obj in candidates:
+            if id(obj) in alone:
+                diagnostics.debug("✅ Object %s is ALONE - marking as potentially lost", obj['class'])
+            else:
+                diagnostics.debug("⚠️ Object %s is near person - NOT marking as lost", obj['class'])
         
+        observe_stage('postprocess', time.perf_counter() - postprocess_start)
         logger.info(f"🎯 Detected {len(objects_detected)} objects")
         
         # Save detected objects to database if any unattended objects found
+        # (with a camera_id, only objects that just became abandoned)
         db_save_result = None
-        if objects_detected and len(objects_detected) > 0:
+        if objects_to_save:
             # Save image with detections marked
-            saved_image_path = _save_detection_image(image, objects_detected, image_file.filename)
-            db_save_result = _save_detections_to_database(objects_detected, image_file.filename, saved_image_path)
+            with stage_timer('annotate'):
+                saved_image_path = _save_detection_image(image, objects_to_save, image_file.filename)
+            with stage_timer('persistence'):
+                db_save_result = _save_detections_to_database(objects_to_save, image_file.filename, saved_image_path)
         
         # Return detection results
         return jsonify({
@@ -301,7 +426,9 @@ def detect_image():
                 'people_detected': len(people_detections),
                 'total_objects_found': len(all_detections),
                 'objects_near_people': len(all_detections) - len(objects_detected),
-                'unattended_objects': len(objects_detected)
+                'unattended_objects': len(objects_detected),
+                'camera_id': camera_id,
+                'newly_abandoned': len(objects_to_save) if camera_id else None
             },
             'database_save': db_save_result
         })
@@ -326,193 +453,38 @@ def _is_object_near_person(object_bbox, people_detections, image_size):
     Returns:
         bool: True if object is near a person, False if object is alone/lost
     """
-    if not people_detections:
-        return False  # No people detected, object is alone
-    
-    obj_x1, obj_y1, obj_x2, obj_y2 = object_bbox
-    obj_center_x = (obj_x1 + obj_x2) / 2
-    obj_center_y = (obj_y1 + obj_y2) / 2
-    obj_width = obj_x2 - obj_x1
-    obj_height = obj_y2 - obj_y1
-    
-    # Dynamic proximity threshold based on image size and object size
-    img_height, img_width = image_size
-    base_threshold = min(img_width, img_height) * 0.2  # 20% of image dimension
-    object_size_factor = max(obj_width, obj_height) * 2  # 2x object size
-    proximity_threshold = max(base_threshold, object_size_factor)
+    return bool(_objects_near_people([object_bbox], people_detections, image_size)[0])
+
+def _objects_near_people(object_bboxes, people_detections, image_size):
+    """
+    Vectorized _is_object_near_person for all objects of a frame
     
-    logger.debug(f"🔍 Checking proximity: object at ({obj_center_x:.0f}, {obj_center_y:.0f}), threshold: {proximity_threshold:.0f}px")
+    An object is near a person when a confident person's center is within
+    20% of the image's shorter side, or twice the object size, of its center.
     
-    for person in people_detections:
-        person_bbox = person['bbox']
-        person_conf = person['confidence']
-        
-        # Only consider high-confidence person detections
-        if person_conf < 0.5:
-            continue
-            
-        p_x1, p_y1, p_x2, p_y2 = person_bbox
-        person_center_x = (p_x1 + p_x2) / 2
-        person_center_y = (p_y1 + p_y2) / 2
-        
-        # Calculate distance between object and person centers
-        distance = ((obj_center_x - person_center_x) ** 2 + (obj_center_y - person_center_y) ** 2) ** 0.5
-        
-        logger.debug(f"👤 Person at ({person_center_x:.0f}, {person_center_y:.0f}), distance: {distance:.0f}px")
-        
-        # Check if object is within proximity of this person
-        if distance <= proximity_threshold:
-            logger.info(f"🤝 Object is within {distance:.0f}px of person (threshold: {proximity_threshold:.0f}px) - ATTENDED")
-            return True
+    Returns:
+        np.ndarray: one bool per object
+    """
+    if not object_bboxes:
+        return np.zeros(0, dtype=bool)
     
-    logger.info(f"🏃 Object is alone - no person within {proximity_threshold:.0f}px - UNATTENDED")
-    return False
+    distances = nearest_person_distances(object_bboxes, people_boxes(people_detections))
+    thresholds = proximity_thresholds(object_bboxes, image_size, radius=0.2)
+    near = distances <= thresholds
+    diagnostics.debug("🔍 Nearest person distances %s, thresholds %s", distances, thresholds)
+    return near
 
 def _validate_and_correct_classification(class_name, category, confidence):
     """
     COMPREHENSIVE YOLO class validation and correction
-    Fixes ALL naming problems and misclassifications
+    Fixes ALL naming problems and misclassifications (mapping in taxonomy.py)
     """
-    class_name_lower = class_name.lower()
-    
-    # COMPLETE YOLO CLASSES MAPPING - Based on YOLO v8 80 classes
-    yolo_class_mapping = {
-        # === LOST ITEMS CATEGORIES ===
-        
-        # BAGS & LUGGAGE
-        'suitcase': 'BAGS',
-        'handbag': 'BAGS', 
-        'backpack': 'BAGS',
-        'umbrella': 'BAGS',  # Often carried with bags
-        
-        # ELECTRONICS  
-        'cell phone': 'ELECTRONICS',
-        'laptop': 'ELECTRONICS',
-        'mouse': 'ELECTRONICS',
-        'remote': 'ELECTRONICS',
-        'keyboard': 'ELECTRONICS',
-        'tv': 'ELECTRONICS',
-        'microwave': 'ELECTRONICS',
-        'toaster': 'ELECTRONICS',
-        'hair drier': 'ELECTRONICS',
-        
-        # PERSONAL ITEMS
-        'book': 'PERSONAL',
-        'scissors': 'PERSONAL',
-        'teddy bear': 'PERSONAL',
-        'hair drier': 'PERSONAL',
-        'toothbrush': 'PERSONAL',
-        
-        # CLOTHING & ACCESSORIES
-        'tie': 'CLOTHING',
-        
-        # SPORTS & RECREATION
-        'sports ball': 'PERSONAL',
-        'baseball bat': 'PERSONAL',
-        'baseball glove': 'PERSONAL',
-        'skateboard': 'PERSONAL',
-        'surfboard': 'PERSONAL',
-        'tennis racket': 'PERSONAL',
-        'frisbee': 'PERSONAL',
-        'skis': 'PERSONAL',
-        'snowboard': 'PERSONAL',
-        'kite': 'PERSONAL',
-        
-        # MISCELLANEOUS LOST ITEMS
-        'bottle': 'MISCELLANEOUS',
-        'wine glass': 'MISCELLANEOUS',
-        'cup': 'MISCELLANEOUS',
-        'fork': 'MISCELLANEOUS',
-        'knife': 'MISCELLANEOUS',
-        'spoon': 'MISCELLANEOUS',
-        'bowl': 'MISCELLANEOUS',
-        'banana': 'MISCELLANEOUS',
-        'apple': 'MISCELLANEOUS',
-        'sandwich': 'MISCELLANEOUS',
-        'orange': 'MISCELLANEOUS',
-        'broccoli': 'MISCELLANEOUS',
-        'carrot': 'MISCELLANEOUS',
-        'hot dog': 'MISCELLANEOUS',
-        'pizza': 'MISCELLANEOUS',
-        'donut': 'MISCELLANEOUS',
-        'cake': 'MISCELLANEOUS',
-        'clock': 'MISCELLANEOUS',
-        'vase': 'MISCELLANEOUS',
-        
-        # === EXCLUDED CLASSES (NOT LOST ITEMS) ===
-        
-        # PEOPLE
-        'person': 'EXCLUDED',
-        
-        # ANIMALS (Often confused with bags/objects)
-        'bird': 'EXCLUDED',
-        'cat': 'EXCLUDED',        # Often confused with bags!
-        'dog': 'EXCLUDED',        # Often confused with bags!
-        'horse': 'EXCLUDED',
-        'sheep': 'EXCLUDED', 
-        'cow': 'EXCLUDED',
-        'elephant': 'EXCLUDED',
-        'bear': 'EXCLUDED',       # Often confused with teddy bears
-        'zebra': 'EXCLUDED',
-        'giraffe': 'EXCLUDED',
-        
-        # VEHICLES
-        'bicycle': 'EXCLUDED',
-        'car': 'EXCLUDED', 
-        'motorbike': 'EXCLUDED',
-        'aeroplane': 'EXCLUDED',
-        'bus': 'EXCLUDED',
-        'train': 'EXCLUDED',
-        'truck': 'EXCLUDED',
-        'boat': 'EXCLUDED',
-        
-        # TRAFFIC & INFRASTRUCTURE  
-        'traffic light': 'EXCLUDED',
-        'fire hydrant': 'EXCLUDED',
-        'stop sign': 'EXCLUDED',
-        'parking meter': 'EXCLUDED',
-        
-        # FURNITURE & FIXTURES
-        'bench': 'EXCLUDED',
-        'chair': 'EXCLUDED',
-        'couch': 'EXCLUDED', 
-        'potted plant': 'EXCLUDED',
-        'bed': 'EXCLUDED',
-        'dining table': 'EXCLUDED',
-        'toilet': 'EXCLUDED',
-        'sink': 'EXCLUDED',
-        'refrigerator': 'EXCLUDED',
-        'oven': 'EXCLUDED',
-    }
-    
-    # Direct mapping from YOLO class name
-    if class_name_lower in yolo_class_mapping:
-        mapped_category = yolo_class_mapping[class_name_lower]
-        if mapped_category == 'EXCLUDED':
-            logger.info(f"🚫 EXCLUDED: {class_name} - not a lost item")
-            return 'EXCLUDED'
-        else:
-            logger.info(f"✅ MAPPED: {class_name} → {mapped_category}")
-            return mapped_category
-    
-    # Special confidence-based validation for problematic classes
-    if class_name_lower in ['cat', 'dog'] and confidence < 0.85:
-        logger.warning(f"⚠️ Low confidence {class_name} ({confidence:.2f}) - likely bag misclassification, EXCLUDING")
-        return 'EXCLUDED'
-    
-    # Check for partial matches in class names
-    for yolo_class, mapped_cat in yolo_class_mapping.items():
-        if yolo_class in class_name_lower or class_name_lower in yolo_class:
-            if mapped_cat == 'EXCLUDED':
-                logger.info(f"🚫 PARTIAL MATCH EXCLUDED: {class_name} matches {yolo_class}")
-                return 'EXCLUDED'
-            else:
-                logger.info(f"✅ PARTIAL MATCH: {class_name} matches {yolo_class} → {mapped_cat}")
-                return mapped_cat
-    
-    # If we get here, it's an unknown class - be conservative and exclude
-    logger.warning(f"❓ UNKNOWN CLASS: {class_name} - excluding for safety")
-    return 'EXCLUDED'
+    mapped_category = realtime_category(class_name)
+    if mapped_category == 'EXCLUDED':
+        logger.info(f"🚫 EXCLUDED: {class_name} - not a lost item")
+    else:
+        logger.info(f"✅ MAPPED: {class_name} → {mapped_category}")
+    return mapped_category
 
 def _save_detection_image(image, objects_detected, original_filename):
     """
@@ -579,104 +551,69 @@ def _save_detection_image(image, objects_detected, original_filename):
         logger.error(f"❌ Error saving detection image: {str(e)}")
         return None
 
+# Lost-object category names used by the Next.js API
+LOST_OBJECT_CATEGORIES = {
+    'BAGS': 'bags',
+    'ELECTRONICS': 'electronics',
+    'CLOTHING': 'clothing',
+    'PERSONAL': 'accessories',
+    'MISCELLANEOUS': 'other'
+}
+
+def _lost_object_payload(obj, image_url):
+    """Detected object in the format expected by the lost-objects API"""
+    return {
+        'name': f"{obj['class'].capitalize()} détecté automatiquement",
+        'description': f"Objet détecté par IA: {obj['class']} avec {round(obj['confidence']*100)}% de confiance. Détection automatique par caméra de surveillance. Statut: non surveillé. Coordonnées de détection: [{obj['bbox'][0]}, {obj['bbox'][1]}, {obj['bbox'][2]}, {obj['bbox'][3]}]",
+        'category': LOST_OBJECT_CATEGORIES.get(obj['category'], 'other'),
+        'location': 'Caméra de surveillance - Position détectée automatiquement',
+        'coordinates': {
+            'lat': 43.2965,  # Default to Marseille coordinates
+            'lng': 5.3698
+        },
+        'image': image_url,  # Use saved detection image
+        'contactInformation': 'admin@recovr.com', # System contact
+        'date': '2025-06-27',
+        'time': '12:00'
+    }
+
 def _save_detections_to_database(objects_detected, filename, image_path=None):
     """
-    Save detected unattended objects to database via Next.js API
+    Queue detected unattended objects for the database (Next.js lost-objects API)
+    
+    Objects are written to the local persistence outbox; its background
+    sender delivers them, so the request never waits on the web tier.
     
     Args:
         objects_detected: List of detected objects
         filename: Original image filename
     
     Returns:
-        dict: Save operation result
+        dict: Queue operation result
     """
     try:
-        saved_count = 0
-        saved_objects = []
-        errors = []
+        image_url = '/placeholder.svg'  # Default
+        if image_path:
+            # Convert local path to URL accessible by frontend
+            image_filename = os.path.basename(image_path)
+            image_url = f'http://localhost:5002/static/detected_objects/{image_filename}'
         
-        # Save each detected object individually
-        for obj in objects_detected:
-            # Category mapping from detection to lost-objects format
-            category_mapping = {
-                'BAGS': 'bags',
-                'ELECTRONICS': 'electronics', 
-                'CLOTHING': 'clothing',
-                'PERSONAL': 'accessories',
-                'MISCELLANEOUS': 'other'
-            }
-            
-            # Determine image URL
-            image_url = '/placeholder.svg'  # Default
-            if image_path:
-                # Convert local path to URL accessible by frontend
-                image_filename = os.path.basename(image_path)
-                image_url = f'http://localhost:5002/static/detected_objects/{image_filename}'
-            
-            # Prepare data in the format expected by lost-objects API
-            save_data = {
-                'name': f"{obj['class'].capitalize()} détecté automatiquement",
-                'description': f"Objet détecté par IA: {obj['class']} avec {round(obj['confidence']*100)}% de confiance. Détection automatique par caméra de surveillance. Statut: non surveillé. Coordonnées de détection: [{obj['bbox'][0]}, {obj['bbox'][1]}, {obj['bbox'][2]}, {obj['bbox'][3]}]",
-                'category': category_mapping.get(obj['category'], 'other'),
-                'location': 'Caméra de surveillance - Position détectée automatiquement',
-                'coordinates': {
-                    'lat': 43.2965,  # Default to Marseille coordinates
-                    'lng': 5.3698
-                },
-                'image': image_url,  # Use saved detection image
-                'contactInformation': 'admin@recovr.com', # System contact
-                'date': '2025-06-27',
-                'time': '12:00'
-            }
+        outbox_ids = persistence_outbox.enqueue([_lost_object_payload(obj, image_url) for obj in objects_detected])
+        logger.info(f"📥 Queued {len(outbox_ids)} objects from {filename} for database delivery")
         
-            # Call Next.js API to save to database (use lost-objects endpoint which handles auth)
-            nextjs_api_url = 'http://localhost:3000/api/lost-objects'
-            
-            try:
-                response = requests.post(
-                    nextjs_api_url,
-                    json=save_data,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get('success'):
-                        saved_count += 1
-                        saved_objects.append(result.get('object', {}))
-                        logger.info(f"✅ Successfully saved {obj['class']} to database")
-                    else:
-                        errors.append(f"Failed to save {obj['class']}: {result.get('error', 'Unknown error')}")
-                else:
-                    errors.append(f"Failed to save {obj['class']}: HTTP {response.status_code}")
-                    logger.error(f"❌ Failed to save {obj['class']}: {response.status_code} - {response.text}")
-                    
-            except requests.exceptions.RequestException as e:
-                errors.append(f"Network error saving {obj['class']}: {str(e)}")
-                logger.error(f"❌ Network error saving {obj['class']}: {str(e)}")
-        
-        # Return overall result
         return {
             'success': True,
-            'saved_objects': saved_count,
+            'queued_objects': len(outbox_ids),
             'total_objects': len(objects_detected),
-            'message': f'Processed {len(objects_detected)} objects, saved {saved_count}',
-            'objects': saved_objects,
-            'errors': errors if errors else None
+            'message': f'Queued {len(outbox_ids)} objects for database delivery',
+            'outbox_ids': outbox_ids
         }
             
-    except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Network error saving to database: {str(e)}")
-        return {
-            'success': False,
-            'error': f'Network error: {str(e)}'
-        }
     except Exception as e:
-        logger.error(f"❌ Unexpected error saving to database: {str(e)}")
+        logger.error(f"❌ Error queueing detections for database: {str(e)}")
         return {
             'success': False,
-            'error': f'Unexpected error: {str(e)}'
+            'error': f'Outbox error: {str(e)}'
         }
 
 @app.route('/detect', methods=['POST'])
@@ -720,18 +657,29 @@ def detection_info():
         },
         'endpoints': {
             '/health': 'Health check',
-            '/detect/strict': 'Strict suitcase detection (POST with video file)',
-            '/detect/image': 'Real-time image detection (POST with image file)',
+            '/detect/strict': 'Strict suitcase detection (POST with video file, stream=ndjson|sse for per-frame events)',
+            '/detect/image': 'Real-time image detection (POST with image file, camera_id for temporal abandonment)',
             '/detect': 'Generic detection (POST with image or video file)',
-            '/detect/info': 'Service information'
+            '/detect/info': 'Service information',
+            '/jobs/strict': 'Queue strict detection as a background job (POST with video file)',
+            '/jobs': 'List detection jobs',
+            '/jobs/<id>': 'Job status and progress',
+            '/jobs/<id>/results': 'Job result once completed',
+            '/metrics': 'Prometheus metrics',
+            '/debug/diagnostics': 'Recent per-box diagnostics (request_id, limit)',
+            '/static/detected_objects/<filename>': 'Saved detection image (size, format=jpeg|webp|png for a thumbnail)',
+            '/artifacts/<namespace>/<name>': 'Stored detection crops (content-addressed, immutable)'
         }
     })
 
 @app.route('/static/detected_objects/<filename>')
 def serve_detected_image(filename):
-    """Serve detected object images"""
+    """Serve detected object images (?size=128&format=webp for a cached thumbnail)"""
     try:
-        return send_from_directory('detected_objects', filename)
+        return send_image(thumbnail_cache, filename,
+                          size=request.args.get('size', type=int), fmt=request.args.get('format'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"❌ Error serving image {filename}: {str(e)}")
         return jsonify({'error': 'Image not found'}), 404
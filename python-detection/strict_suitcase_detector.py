@@ -4,13 +4,11 @@
 Only detects the main suitcase, ignores small parts like handles, zippers, etc.
 """
 
-import cv2
 import numpy as np
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
-from ultralytics import YOLO
+from typing import Callable, Dict, List, Optional
 import torch
 from ultralytics.nn.tasks import DetectionModel
 from torch.nn.modules.container import Sequential, ModuleList
@@ -27,6 +25,16 @@ from ultralytics.nn.modules.conv import Concat
 from ultralytics.nn.modules.head import Detect
 from ultralytics.nn.modules.block import DFL
 
+from frame_sampler import FrameSampler
+from frame_gate import FrameGate
+from geometry import to_xywh
+from detection_logging import current_request_id, diagnostics
+from artifact_store import Artifact, ArtifactStore, get_artifact_store
+from taxonomy import LOST_OBJECT_KEYWORDS, ClassTable, strict_category
+from model_registry import get_yolo_model
+from inference_executor import get_inference_executor
+from inference_backends import DEFAULT_INFERENCE_BACKEND
+
 # Patch for PyTorch 2.6+ and Ultralytics YOLO
 try:
     torch.serialization.add_safe_globals([DetectionModel])
@@ -56,116 +64,44 @@ class StrictSuitcaseDetector:
     Ignores small components like handles, zippers, wheels
     """
     
-    def __init__(self, confidence_threshold: float = 0.05):
+    def __init__(self, confidence_threshold: float = 0.05, model_path: str = 'yolov8m.pt',
+                 inference_backend: str = DEFAULT_INFERENCE_BACKEND):
         self.confidence_threshold = confidence_threshold
+        self.model_path = model_path
+        self.inference_backend = inference_backend
         
         # Load YOLO model with improved accuracy
         try:
-            self.model = YOLO('yolov8m.pt')
+            self.model = get_yolo_model(model_path, backend=inference_backend)
             logger.info("✅ YOLOv8m model loaded successfully (enhanced accuracy)")
         except Exception as e:
             logger.error(f"❌ Could not load YOLO: {e}")
             self.model = None
         
         # SIGNIFICANTLY EXPANDED categories for lost objects - much more comprehensive
-        self.lost_object_categories = {
-            # Bags and luggage
-            'suitcase', 'luggage', 'backpack', 'handbag', 'bag', 'purse', 'briefcase',
-            'duffel bag', 'tote bag', 'shopping bag', 'messenger bag', 'laptop bag',
-            'diaper bag', 'gym bag', 'travel bag', 'duffle', 'clutch', 'pouch',
-            
-            # Electronics
-            'cell phone', 'mobile phone', 'laptop', 'tablet', 'camera', 'keyboard', 
-            'mouse', 'headphones', 'earphones', 'charger', 'power bank', 'iphone',
-            'ipad', 'smartphone', 'computer', 'monitor', 'tv', 'remote',
-            
-            # Personal items
-            'wallet', 'keys', 'sunglasses', 'glasses', 'watch', 'jewelry', 'ring',
-            'necklace', 'bracelet', 'earrings', 'card', 'passport', 'id',
-            
-            # Clothing and accessories
-            'hat', 'cap', 'jacket', 'coat', 'scarf', 'gloves', 'shoes', 'sneakers',
-            'boots', 'shirt', 'pants', 'dress', 'skirt', 'tie', 'belt', 'sock',
-            
-            # Common lost items
-            'umbrella', 'book', 'bottle', 'cup', 'sports ball', 'teddy bear', 'toy',
-            'pen', 'pencil', 'notebook', 'folder', 'document', 'paper', 'magazine',
-            'scissors', 'tool', 'coin', 'money',
-            
-            # Transportation items (YOLO sometimes classifies bags as these)
-            'train', 'car', 'truck', 'bus', 'motorcycle', 'bicycle',
-            
-            # Miscellaneous objects that could be lost
-            'clock', 'vase', 'bowl', 'plate', 'knife', 'fork', 'spoon',
-            'toothbrush', 'hair', 'comb', 'brush', 'mirror', 'towel',
-            'pillow', 'blanket', 'chair', 'table', 'desk', 'shelf'
-        }
+        self.lost_object_categories = LOST_OBJECT_KEYWORDS
+        
+        # Category, relevance and size rules per model class id, resolved once
+        self.class_table = ClassTable(self.model.names, 'strict') if self.model else None
         
         logger.info("🎯 Enhanced Robust Detector initialized - DETECTS ALL LOST OBJECTS")
     
+    def new_frame_gate(self) -> FrameGate:
+        """Near-duplicate frame gate for one video (environment-configured)"""
+        return FrameGate()
+    
     def _map_category(self, class_name: str) -> str:
-        """Enhanced category mapping - much more comprehensive"""
-        class_name = class_name.lower()
-        
-        # Bags and luggage - high priority
-        if any(cat in class_name for cat in ['suitcase', 'luggage', 'backpack', 'handbag', 'bag', 'purse', 'briefcase', 'duffle', 'tote', 'clutch', 'pouch']):
-            return 'BAGS'
-        
-        # Electronics - high priority
-        elif any(cat in class_name for cat in ['cell phone', 'phone', 'mobile', 'iphone', 'smartphone']):
-            return 'ELECTRONICS'
-        elif any(cat in class_name for cat in ['laptop', 'tablet', 'camera', 'keyboard', 'mouse', 'computer', 'ipad', 'monitor']):
-            return 'ELECTRONICS'
-        elif any(cat in class_name for cat in ['headphones', 'earphones', 'charger', 'power bank', 'remote', 'tv']):
-            return 'ELECTRONICS'
-        
-        # Personal items - high priority
-        elif any(cat in class_name for cat in ['wallet', 'keys', 'sunglasses', 'glasses', 'watch', 'jewelry', 'ring', 'necklace', 'bracelet']):
-            return 'PERSONAL'
-        elif any(cat in class_name for cat in ['card', 'passport', 'id', 'earrings']):
-            return 'PERSONAL'
-        
-        # Clothing and accessories
-        elif any(cat in class_name for cat in ['hat', 'cap', 'jacket', 'coat', 'scarf', 'gloves', 'shoes', 'sneakers', 'boots']):
-            return 'CLOTHING'
-        elif any(cat in class_name for cat in ['shirt', 'pants', 'dress', 'skirt', 'tie', 'belt', 'sock']):
-            return 'CLOTHING'
-        
-        # People (should NOT be classified as lost items)
-        elif any(cat in class_name for cat in ['person', 'people', 'human', 'face', 'body']):
-            return 'EXCLUDED'  # Exclude people from lost items
-        
-        # Animals (should NOT be classified as lost items - often confused with bags)
-        elif any(cat in class_name for cat in ['cat', 'dog', 'bird', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe']):
-            return 'EXCLUDED'  # Exclude animals - YOLO often confuses cats with bags
-        
-        # Transportation (should NOT be classified as lost items)
-        elif any(cat in class_name for cat in ['train', 'car', 'truck', 'bus', 'motorcycle', 'bicycle']):
-            return 'EXCLUDED'  # Exclude vehicles
-        
-        # Furniture/Environment (should NOT be classified as lost items)
-        elif any(cat in class_name for cat in ['toilet', 'sink', 'chair', 'table', 'bed', 'sofa', 'couch', 'bench', 'refrigerator']):
-            return 'EXCLUDED'  # Exclude furniture
-        
-        # Common lost items
-        elif any(cat in class_name for cat in ['book', 'bottle', 'cup', 'umbrella', 'pen', 'pencil', 'notebook']):
-            return 'MISCELLANEOUS'
-        elif any(cat in class_name for cat in ['teddy bear', 'toy', 'folder', 'document', 'paper', 'magazine']):
-            return 'MISCELLANEOUS'
-        elif any(cat in class_name for cat in ['scissors', 'tool', 'coin', 'money', 'clock', 'vase', 'bowl']):
-            return 'MISCELLANEOUS'
-        elif any(cat in class_name for cat in ['plate', 'knife', 'fork', 'spoon', 'mirror', 'towel', 'pillow', 'blanket']):
-            return 'MISCELLANEOUS'
-        elif any(cat in class_name for cat in ['chair', 'bench', 'remote', 'mouse', 'keyboard']):
-            return 'MISCELLANEOUS'
-        
-        # Default to EXCLUDED for anything else - be conservative about unknown objects
-        else:
-            return 'EXCLUDED'
+        """Enhanced category mapping - much more comprehensive (see taxonomy.py)"""
+        return strict_category(class_name)
     
-    def detect_main_suitcase(self, video_path: str) -> Dict:
+    def detect_main_suitcase(self, video_path: str,
+                             progress_callback: Optional[Callable[[int, int], None]] = None,
+                             frame_callback: Optional[Callable[[int, float, List[Dict]], None]] = None) -> Dict:
         """
         Detect only the main suitcase, ignore small parts
+        
+        progress_callback is called as (frames_decoded, total_frames) after each analyzed frame,
+        frame_callback as (frame_number, timestamp, suitcase_candidates)
         """
         logger.info(f"🎬 Processing video: {video_path}")
         
@@ -180,37 +116,38 @@ class StrictSuitcaseDetector:
         
         logger.info(f"📁 Video file size: {file_size} bytes")
         
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        try:
+            sampler = FrameSampler(video_path, reuse_buffers=True)
+        except ValueError:
             raise ValueError(f"Cannot open video: {video_path}. File size: {file_size} bytes. Possible format issue or corruption.")
         
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = sampler.fps
+        total_frames = sampler.total_frames
+        width = sampler.width
+        height = sampler.height
         
         logger.info(f"📹 Video: {width}x{height}, {fps}fps, {total_frames} frames")
         
         best_suitcase = None
         best_score = 0.0
-        frame_count = 0
         process_interval = max(1, min(10, int(fps // 1)))  # Process every 10 frames max
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            if frame_count % process_interval == 0:
-                logger.info(f"🔍 Analyzing frame {frame_count}/{total_frames}")
+        sampler.every_n_frames = process_interval
+        # Near-duplicate frames (static camera, nothing moving) reuse the last detections
+        gate = self.new_frame_gate()
+        
+        with sampler:
+            for sample in sampler:
+                frame_count = sample.frame_number
+                frame = sample.image
+                diagnostics.debug("🔍 Analyzing frame %d/%d", frame_count, total_frames)
                 
                 # Get YOLO detections
-                detections = self._get_yolo_detections(frame)
+                detections = gate.detect(frame, sample.timestamp, self._get_yolo_detections)
                 
                 # Filter to only suitcase-like objects
                 suitcase_candidates = self._filter_suitcase_candidates(detections, frame)
+                if frame_callback:
+                    frame_callback(frame_count, sample.timestamp, suitcase_candidates)
                 
                 if suitcase_candidates:
                     # Find the best (largest, most centered) suitcase
@@ -224,7 +161,7 @@ class StrictSuitcaseDetector:
                             
                             # Create cropped image with lots of context
                             cropped_image = self._crop_with_maximum_context(frame, frame_best)
-                            timestamp = frame_count / fps
+                            timestamp = sample.timestamp
                             
                             best_suitcase = {
                                 'frame_number': frame_count,
@@ -240,14 +177,20 @@ class StrictSuitcaseDetector:
                             }
                             
                             logger.info(f"🎯 New best suitcase found: {frame_best['confidence']:.1%} confidence, score: {score:.3f}")
+                
+                if progress_callback:
+                    progress_callback(sampler.frames_read, total_frames)
         
-        cap.release()
+        if progress_callback:
+            progress_callback(sampler.frames_read, total_frames)
+        
+        if best_suitcase:
+            best_suitcase['image_artifact'] = self._save_suitcase_image(best_suitcase)
         
         # Generate report
         report = self._generate_report(best_suitcase, video_path)
         
         if best_suitcase:
-            self._save_suitcase_image(best_suitcase)
             logger.info(f"🎉 Main suitcase detected successfully!")
             logger.info(f"📊 Confidence: {best_suitcase['confidence']:.1%}")
             logger.info(f"⏱️  Found at: {best_suitcase['video_timestamp']}")
@@ -261,27 +204,34 @@ class StrictSuitcaseDetector:
         if not self.model:
             return []
         try:
-            # Use very low confidence for YOLO detection to catch everything
-            results = self.model(frame, verbose=False, conf=0.01)
+            # Use very low confidence for YOLO detection to catch everything,
+            # but only for classes that can be suitcase candidates. The model is shared
+            # through the registry, so it only runs on its executor's worker thread
+            results = [get_inference_executor(self.model).infer(
+                frame, verbose=False, conf=0.01, classes=self.class_table.class_filter())]
             detections = []
             for result in results:
                 boxes = result.boxes
-                if boxes is not None:
-                    logger.info(f"[YOLO] Frame: {frame.shape}, Raw detections: {len(boxes)}")
-                    for box in boxes:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        class_name = result.names[class_id]
-                        logger.info(f"[YOLO] Detected {class_name} ({confidence:.3f}) at [{int(x1)},{int(y1)},{int(x2)},{int(y2)}]")
-                        if confidence > self.confidence_threshold:
-                            detection = {
-                                'bbox': [int(x1), int(y1), int(x2-x1), int(y2-y1)],
-                                'confidence': float(confidence),
-                                'class_name': class_name,
-                                'class_id': class_id
-                            }
-                            detections.append(detection)
+                if boxes is None or len(boxes) == 0:
+                    continue
+                diagnostics.debug("[YOLO] Frame: %s, Raw detections: %d", frame.shape, len(boxes))
+                
+                # One device->host copy per tensor instead of per box (conf=0.01 yields hundreds)
+                xyxy = boxes.xyxy.cpu().numpy()
+                confidences = boxes.conf.cpu().numpy()
+                class_ids = boxes.cls.cpu().numpy().astype(int)
+                keep = np.flatnonzero(confidences > self.confidence_threshold)
+                xywh = to_xywh(xyxy[keep]).astype(int)
+                
+                for i, bbox in zip(keep.tolist(), xywh.tolist()):
+                    class_name = result.names[class_ids[i]]
+                    diagnostics.debug("[YOLO] Detected %s (%.3f) at %s", class_name, confidences[i], bbox)
+                    detections.append({
+                        'bbox': bbox,
+                        'confidence': float(confidences[i]),
+                        'class_name': class_name,
+                        'class_id': int(class_ids[i])
+                    })
             return detections
         except Exception as e:
             logger.error(f"YOLO detection failed: {e}")
@@ -295,69 +245,55 @@ class StrictSuitcaseDetector:
         for detection in detections:
             class_name = detection['class_name'].lower()
             x, y, w, h = detection['bbox']
+            class_info = (self.class_table[detection['class_id']] if 'class_id' in detection
+                          else self.class_table.by_name(class_name))
             
             # 1. VERY PERMISSIVE category check - accept almost anything that could be a lost object
-            # Accept explicit lost object categories OR common misclassifications
-            lost_object_match = any(cat in class_name for cat in self.lost_object_categories)
-            misclassification_match = any(cat in class_name for cat in [
-                'sports ball', 'traffic light', 'bottle', 'cup', 'bowl', 'chair', 
-                'bench', 'clock', 'vase', 'book', 'remote', 'mouse', 'keyboard'
-            ])
-            
-            if not (lost_object_match or misclassification_match):
-                logger.debug(f"Rejected {class_name}: not a recognized lost object category")
+            # (explicit lost object categories OR common misclassifications, see taxonomy.py)
+            if not class_info.relevant:
+                diagnostics.debug("Rejected %s: not a recognized lost object category", class_name)
                 continue
             
-            # For debugging: log what we're accepting
-            if misclassification_match:
-                logger.info(f"🔄 Accepting potential misclassified object: {class_name} (might be a lost item)")
-            
             # 2. MUCH MORE PERMISSIVE size validation - allow small objects
             area_ratio = (w * h) / (frame_width * frame_height)
             
-            # Very permissive size requirements
-            if class_name == 'train':
-                min_area = 0.001  # Much smaller minimum for trains (suitcases)
-            elif any(term in class_name for term in ['phone', 'cell', 'mobile', 'watch', 'keys', 'wallet']):
-                min_area = 0.0001  # Very small items can be tiny
-            else:
-                min_area = 0.0005  # General minimum - very small
-            
+            # Very permissive size requirements (per class)
+            min_area = class_info.min_area_ratio
             if area_ratio < min_area:
-                logger.debug(f"Rejected {class_name}: too small ({area_ratio:.4f} < {min_area})")
+                diagnostics.debug("Rejected %s: too small (%.4f < %s)", class_name, area_ratio, min_area)
                 continue
             
-            if area_ratio > 0.9:  # More permissive upper limit
-                logger.debug(f"Rejected {class_name}: too large ({area_ratio:.3f})")
+            if area_ratio > class_info.max_area_ratio:  # More permissive upper limit
+                diagnostics.debug("Rejected %s: too large (%.3f)", class_name, area_ratio)
                 continue
             
             # 3. VERY PERMISSIVE aspect ratio (allow almost anything)
             aspect_ratio = w / h if h > 0 else 0
             if aspect_ratio < 0.1 or aspect_ratio > 10.0:  # Much more permissive
-                logger.debug(f"Rejected {class_name}: bad aspect ratio ({aspect_ratio:.2f})")
+                diagnostics.debug("Rejected %s: bad aspect ratio (%.2f)", class_name, aspect_ratio)
                 continue
             
             # 4. VERY PERMISSIVE position validation (allow objects anywhere)
             center_y = y + h // 2
             # Only reject if it's in the very top edge of frame
             if center_y < frame_height * 0.1:  # Only top 10% = unlikely
-                logger.debug(f"Rejected {class_name}: too high up")
+                diagnostics.debug("Rejected %s: too high up", class_name)
                 continue
             
             # 5. VERY PERMISSIVE height requirements
             if h < frame_height * 0.02:  # Only reject very tiny objects (2%)
-                logger.debug(f"Rejected {class_name}: too short ({h} < {frame_height * 0.02:.1f})")
+                diagnostics.debug("Rejected %s: too short (%d < %.1f)", class_name, h, frame_height * 0.02)
                 continue
             
             # 6. VERY PERMISSIVE width requirements  
             if w < frame_width * 0.02:  # Only reject very tiny objects (2%)
-                logger.debug(f"Rejected {class_name}: too narrow ({w} < {frame_width * 0.02:.1f})")
+                diagnostics.debug("Rejected %s: too narrow (%d < %.1f)", class_name, w, frame_width * 0.02)
                 continue
             
             candidates.append(detection)
-            logger.debug(f"✅ Accepted {class_name}: {w}x{h} ({area_ratio:.3f} of frame)")
+            diagnostics.debug("✅ Accepted %s: %dx%d (%.3f of frame)", class_name, w, h, area_ratio)
         
-        logger.info(f"🔍 Filtered {len(detections)} detections → {len(candidates)} suitcase candidates")
+        diagnostics.debug("🔍 Filtered %d detections → %d suitcase candidates", len(detections), len(candidates))
         return candidates
     
     def _select_best_suitcase(self, candidates: List[Dict], frame: np.ndarray) -> Optional[Dict]:
@@ -453,7 +389,8 @@ class StrictSuitcaseDetector:
             crop_x2 = min(frame_width, center_x + half_size)
             crop_y2 = min(frame_height, center_y + half_size)
         
-        cropped = frame[crop_y1:crop_y2, crop_x1:crop_x2]
+        # Copy so the crop outlives the sampler's reused frame buffer
+        cropped = frame[crop_y1:crop_y2, crop_x1:crop_x2].copy()
         
         final_size = f"{crop_x2-crop_x1}x{crop_y2-crop_y1}"
         logger.info(f"🖼️ Cropped suitcase: {final_size} with {int(padding_factor*100)}% padding")
@@ -476,6 +413,7 @@ class StrictSuitcaseDetector:
         }
         
         if suitcase:
+            artifact = suitcase.get('image_artifact')
             report['detected_object'] = {
                 'category': suitcase['category'],
                 'confidence': f"{suitcase['confidence']:.1%}",
@@ -483,7 +421,9 @@ class StrictSuitcaseDetector:
                 'found_at_time': suitcase['video_timestamp'],
                 'frame_number': suitcase['frame_number'],
                 'bounding_box': suitcase['bbox'],
-                'image_saved': 'strict_object_detection.jpg',
+                'image_saved': artifact.name if artifact else None,
+                'image_path': artifact.path if artifact else None,
+                'image_url': artifact.url if artifact else None,
                 'class_name': suitcase.get('class_name', 'unknown')
             }
             # Also include legacy format for compatibility
@@ -491,15 +431,17 @@ class StrictSuitcaseDetector:
         
         return report
     
-    def _save_suitcase_image(self, suitcase: Dict):
-        """Save the suitcase detection image"""
-        import os
-        os.makedirs("strict_detections", exist_ok=True)
-        
-        output_path = "strict_detections/strict_object_detection.jpg"
-        cv2.imwrite(output_path, suitcase['cropped_image'], [cv2.IMWRITE_JPEG_QUALITY, 95])
+    def _save_suitcase_image(self, suitcase: Dict) -> Optional[Artifact]:
+        """Store the suitcase crop in the artifact store (namespaced per request)"""
+        try:
+            artifact = get_artifact_store().put_image(
+                suitcase['cropped_image'], ArtifactStore.new_namespace(current_request_id()))
+        except Exception as e:
+            logger.error(f"❌ Failed to store suitcase image: {e}")
+            return None
         
-        logger.info(f"💾 Suitcase image saved: {output_path}")
+        logger.info(f"💾 Suitcase image saved: {artifact.path}")
+        return artifact
 
 
 def main():
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Class Taxonomy - lost-object categories resolved once per model class id
+The keyword rules each detector used to scan per box live here as profiles
+('strict', 'realtime', 'ultra', 'robust'). ClassTable applies a profile to a
+model's names at load time, so detections are classified with a dict lookup,
+and class_filter() gives the ids to pass as the model's `classes` argument so
+irrelevant classes are dropped inside inference instead of post-processed.
+"""
+
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+EXCLUDED = 'EXCLUDED'
+
+
+class ClassInfo(NamedTuple):
+    """How one model class is treated by a detector profile"""
+    class_id: int
+    name: str
+    category: str           # BAGS, ELECTRONICS, ... or EXCLUDED
+    relevant: bool          # whether the detector looks at this class at all
+    priority: float
+    min_confidence: float
+    min_area_ratio: float   # box area / frame area bounds
+    max_area_ratio: float
+
+
+# (category, relevant, priority, min_confidence, min_area_ratio, max_area_ratio)
+Rule = Tuple[str, bool, float, float, float, float]
+
+
+# --- 'strict': StrictSuitcaseDetector -------------------------------------
+
+# First match wins, as in the original if/elif chain
+STRICT_CATEGORY_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    # Bags and luggage - high priority
+    ('BAGS', ('suitcase', 'luggage', 'backpack', 'handbag', 'bag', 'purse', 'briefcase', 'duffle', 'tote', 'clutch', 'pouch')),
+    # Electronics - high priority
+    ('ELECTRONICS', ('cell phone', 'phone', 'mobile', 'iphone', 'smartphone')),
+    ('ELECTRONICS', ('laptop', 'tablet', 'camera', 'keyboard', 'mouse', 'computer', 'ipad', 'monitor')),
+    ('ELECTRONICS', ('headphones', 'earphones', 'charger', 'power bank', 'remote', 'tv')),
+    # Personal items - high priority
+    ('PERSONAL', ('wallet', 'keys', 'sunglasses', 'glasses', 'watch', 'jewelry', 'ring', 'necklace', 'bracelet')),
+    ('PERSONAL', ('card', 'passport', 'id', 'earrings')),
+    # Clothing and accessories
+    ('CLOTHING', ('hat', 'cap', 'jacket', 'coat', 'scarf', 'gloves', 'shoes', 'sneakers', 'boots')),
+    ('CLOTHING', ('shirt', 'pants', 'dress', 'skirt', 'tie', 'belt', 'sock')),
+    # People (should NOT be classified as lost items)
+    (EXCLUDED, ('person', 'people', 'human', 'face', 'body')),
+    # Animals (often confused with bags)
+    (EXCLUDED, ('cat', 'dog', 'bird', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe')),
+    # Transportation
+    (EXCLUDED, ('train', 'car', 'truck', 'bus', 'motorcycle', 'bicycle')),
+    # Furniture/Environment
+    (EXCLUDED, ('toilet', 'sink', 'chair', 'table', 'bed', 'sofa', 'couch', 'bench', 'refrigerator')),
+    # Common lost items
+    ('MISCELLANEOUS', ('book', 'bottle', 'cup', 'umbrella', 'pen', 'pencil', 'notebook')),
+    ('MISCELLANEOUS', ('teddy bear', 'toy', 'folder', 'document', 'paper', 'magazine')),
+    ('MISCELLANEOUS', ('scissors', 'tool', 'coin', 'money', 'clock', 'vase', 'bowl')),
+    ('MISCELLANEOUS', ('plate', 'knife', 'fork', 'spoon', 'mirror', 'towel', 'pillow', 'blanket')),
+]
+
+# Anything that could be a lost object, including what YOLO mistakes suitcases for
+LOST_OBJECT_KEYWORDS = frozenset({
+    # Bags and luggage
+    'suitcase', 'luggage', 'backpack', 'handbag', 'bag', 'purse', 'briefcase',
+    'duffel bag', 'tote bag', 'shopping bag', 'messenger bag', 'laptop bag',
+    'diaper bag', 'gym bag', 'travel bag', 'duffle', 'clutch', 'pouch',
+    # Electronics
+    'cell phone', 'mobile phone', 'laptop', 'tablet', 'camera', 'keyboard',
+    'mouse', 'headphones', 'earphones', 'charger', 'power bank', 'iphone',
+    'ipad', 'smartphone', 'computer', 'monitor', 'tv', 'remote',
+    # Personal items
+    'wallet', 'keys', 'sunglasses', 'glasses', 'watch', 'jewelry', 'ring',
+    'necklace', 'bracelet', 'earrings', 'card', 'passport', 'id',
+    # Clothing and accessories
+    'hat', 'cap', 'jacket', 'coat', 'scarf', 'gloves', 'shoes', 'sneakers',
+    'boots', 'shirt', 'pants', 'dress', 'skirt', 'tie', 'belt', 'sock',
+    # Common lost items
+    'umbrella', 'book', 'bottle', 'cup', 'sports ball', 'teddy bear', 'toy',
+    'pen', 'pencil', 'notebook', 'folder', 'document', 'paper', 'magazine',
+    'scissors', 'tool', 'coin', 'money',
+    # Transportation items (YOLO sometimes classifies bags as these)
+    'train', 'car', 'truck', 'bus', 'motorcycle', 'bicycle',
+    # Miscellaneous objects that could be lost
+    'clock', 'vase', 'bowl', 'plate', 'knife', 'fork', 'spoon',
+    'toothbrush', 'hair', 'comb', 'brush', 'mirror', 'towel',
+    'pillow', 'blanket', 'chair', 'table', 'desk', 'shelf'
+})
+
+MISCLASSIFIED_LOST_OBJECTS = (
+    'sports ball', 'traffic light', 'bottle', 'cup', 'bowl', 'chair',
+    'bench', 'clock', 'vase', 'book', 'remote', 'mouse', 'keyboard'
+)
+
+
+def strict_category(class_name: str) -> str:
+    """StrictSuitcaseDetector category of a class name (EXCLUDED when unknown)"""
+    class_name = class_name.lower()
+    for category, keywords in STRICT_CATEGORY_KEYWORDS:
+        if any(keyword in class_name for keyword in keywords):
+            return category
+    return EXCLUDED
+
+
+def is_misclassified_lost_object(class_name: str) -> bool:
+    """Classes YOLO often reports for lost items (accepted as suitcase candidates)"""
+    class_name = class_name.lower()
+    return any(keyword in class_name for keyword in MISCLASSIFIED_LOST_OBJECTS)
+
+
+def _strict_rule(class_name: str) -> Rule:
+    name = class_name.lower()
+    relevant = (any(keyword in name for keyword in LOST_OBJECT_KEYWORDS)
+                or is_misclassified_lost_object(name))
+    if name == 'train':
+        min_area = 0.001  # Much smaller minimum for trains (suitcases)
+    elif any(term in name for term in ['phone', 'cell', 'mobile', 'watch', 'keys', 'wallet']):
+        min_area = 0.0001  # Very small items can be tiny
+    else:
+        min_area = 0.0005  # General minimum - very small
+    return strict_category(name), relevant, 1.0, 0.0, min_area, 0.9
+
+
+# --- 'realtime': strict_detection_api /detect/image ---------------------
+
+# YOLOv8 COCO classes; partial matches are tried in this order
+YOLO_CLASS_CATEGORIES: Dict[str, str] = {
+    # Bags & luggage
+    'suitcase': 'BAGS',
+    'handbag': 'BAGS',
+    'backpack': 'BAGS',
+    'umbrella': 'BAGS',  # Often carried with bags
+    # Electronics
+    'cell phone': 'ELECTRONICS',
+    'laptop': 'ELECTRONICS',
+    'mouse': 'ELECTRONICS',
+    'remote': 'ELECTRONICS',
+    'keyboard': 'ELECTRONICS',
+    'tv': 'ELECTRONICS',
+    'microwave': 'ELECTRONICS',
+    'toaster': 'ELECTRONICS',
+    # Personal items
+    'hair drier': 'PERSONAL',
+    'book': 'PERSONAL',
+    'scissors': 'PERSONAL',
+    'teddy bear': 'PERSONAL',
+    'toothbrush': 'PERSONAL',
+    # Clothing & accessories
+    'tie': 'CLOTHING',
+    # Sports & recreation
+    'sports ball': 'PERSONAL',
+    'baseball bat': 'PERSONAL',
+    'baseball glove': 'PERSONAL',
+    'skateboard': 'PERSONAL',
+    'surfboard': 'PERSONAL',
+    'tennis racket': 'PERSONAL',
+    'frisbee': 'PERSONAL',
+    'skis': 'PERSONAL',
+    'snowboard': 'PERSONAL',
+    'kite': 'PERSONAL',
+    # Miscellaneous lost items
+    'bottle': 'MISCELLANEOUS',
+    'wine glass': 'MISCELLANEOUS',
+    'cup': 'MISCELLANEOUS',
+    'fork': 'MISCELLANEOUS',
+    'knife': 'MISCELLANEOUS',
+    'spoon': 'MISCELLANEOUS',
+    'bowl': 'MISCELLANEOUS',
+    'banana': 'MISCELLANEOUS',
+    'apple': 'MISCELLANEOUS',
+    'sandwich': 'MISCELLANEOUS',
+    'orange': 'MISCELLANEOUS',
+    'broccoli': 'MISCELLANEOUS',
+    'carrot': 'MISCELLANEOUS',
+    'hot dog': 'MISCELLANEOUS',
+    'pizza': 'MISCELLANEOUS',
+    'donut': 'MISCELLANEOUS',
+    'cake': 'MISCELLANEOUS',
+    'clock': 'MISCELLANEOUS',
+    'vase': 'MISCELLANEOUS',
+    # People
+    'person': EXCLUDED,
+    # Animals (often confused with bags/objects)
+    'bird': EXCLUDED,
+    'cat': EXCLUDED,
+    'dog': EXCLUDED,
+    'horse': EXCLUDED,
+    'sheep': EXCLUDED,
+    'cow': EXCLUDED,
+    'elephant': EXCLUDED,
+    'bear': EXCLUDED,       # Often confused with teddy bears
+    'zebra': EXCLUDED,
+    'giraffe': EXCLUDED,
+    # Vehicles
+    'bicycle': EXCLUDED,
+    'car': EXCLUDED,
+    'motorbike': EXCLUDED,
+    'aeroplane': EXCLUDED,
+    'bus': EXCLUDED,
+    'train': EXCLUDED,
+    'truck': EXCLUDED,
+    'boat': EXCLUDED,
+    # Traffic & infrastructure
+    'traffic light': EXCLUDED,
+    'fire hydrant': EXCLUDED,
+    'stop sign': EXCLUDED,
+    'parking meter': EXCLUDED,
+    # Furniture & fixtures
+    'bench': EXCLUDED,
+    'chair': EXCLUDED,
+    'couch': EXCLUDED,
+    'potted plant': EXCLUDED,
+    'bed': EXCLUDED,
+    'dining table': EXCLUDED,
+    'toilet': EXCLUDED,
+    'sink': EXCLUDED,
+    'refrigerator': EXCLUDED,
+    'oven': EXCLUDED,
+}
+
+# Per-category confidence needed to report an object from a camera frame
+REALTIME_MIN_CONFIDENCE = {
+    'BAGS': 0.5,           # Higher threshold for bags - better precision
+    'ELECTRONICS': 0.6,    # Higher threshold for electronics
+    'CLOTHING': 0.6,       # Higher threshold for clothing
+    'PERSONAL': 0.7,       # Higher threshold for personal items
+    'MISCELLANEOUS': 0.7   # Higher threshold for misc items
+}
+
+
+def realtime_category(class_name: str) -> str:
+    """Category of a YOLO class name: exact match, then partial match, else EXCLUDED"""
+    name = class_name.lower()
+    if name in YOLO_CLASS_CATEGORIES:
+        return YOLO_CLASS_CATEGORIES[name]
+    for yolo_class, category in YOLO_CLASS_CATEGORIES.items():
+        if yolo_class in name or name in yolo_class:
+            return category
+    # Unknown class - be conservative and exclude
+    return EXCLUDED
+
+
+def _realtime_rule(class_name: str) -> Rule:
+    category = realtime_category(class_name)
+    relevant = category in REALTIME_MIN_CONFIDENCE
+    return category, relevant, 1.0, REALTIME_MIN_CONFIDENCE.get(category, 1.0), 0.0, 1.0
+
+
+# --- 'ultra': UltraEnhancedDetector --------------------------------------
+
+ULTRA_RELEVANT_KEYWORDS = (
+    'suitcase', 'backpack', 'handbag', 'luggage', 'bag',
+    'laptop', 'cell phone', 'book', 'bottle', 'cup',
+    'umbrella', 'clock', 'keyboard', 'mouse'
+)
+ULTRA_BAG_KEYWORDS = ('suitcase', 'backpack', 'handbag', 'luggage', 'bag')
+ULTRA_ELECTRONICS_KEYWORDS = ('laptop', 'cell phone', 'phone', 'keyboard', 'mouse')
+
+
+def ultra_category(class_name: str) -> str:
+    name = class_name.lower()
+    if any(term in name for term in ULTRA_BAG_KEYWORDS):
+        return 'BAGS'
+    if any(term in name for term in ULTRA_ELECTRONICS_KEYWORDS):
+        return 'ELECTRONICS'
+    return 'MISCELLANEOUS'
+
+
+def _ultra_rule(class_name: str) -> Rule:
+    relevant = any(keyword in class_name.lower() for keyword in ULTRA_RELEVANT_KEYWORDS)
+    return ultra_category(class_name), relevant, 1.0, 0.0, 0.0, 1.0
+
+
+# --- 'robust': RobustLostObjectDetector ----------------------------------
+
+ROBUST_CATEGORIES: Dict[str, Dict] = {
+    # Bags and luggage
+    'BAGS': {
+        'keywords': ['suitcase', 'luggage', 'backpack', 'handbag', 'bag', 'purse', 'briefcase', 'duffel bag'],
+        'priority': 0.9,
+        'min_size_ratio': 0.0001
+    },
+    # Electronics
+    'ELECTRONICS': {
+        'keywords': ['cell phone', 'mobile phone', 'laptop', 'tablet', 'camera', 'keyboard',
+                     'mouse', 'headphones', 'charger', 'power bank'],
+        'priority': 0.95,
+        'min_size_ratio': 0.0005
+    },
+    # Personal items
+    'PERSONAL': {
+        'keywords': ['wallet', 'keys', 'sunglasses', 'glasses', 'watch', 'jewelry',
+                     'ring', 'necklace', 'bracelet'],
+        'priority': 0.9,
+        'min_size_ratio': 0.0002
+    },
+    # Clothing and accessories
+    'CLOTHING': {
+        'keywords': ['hat', 'cap', 'jacket', 'coat', 'scarf', 'gloves', 'shoes',
+                     'sneakers', 'boots', 'shirt', 'pants'],
+        'priority': 0.7,
+        'min_size_ratio': 0.002
+    },
+    # Miscellaneous objects
+    'MISCELLANEOUS': {
+        'keywords': ['book', 'bottle', 'cup', 'umbrella', 'sports ball', 'teddy bear',
+                     'toy', 'document', 'paper', 'folder', 'pen', 'pencil'],
+        'priority': 0.6,
+        'min_size_ratio': 0.0008
+    },
+    # YOLO sometimes mistakes suitcases for trains
+    'SPECIAL': {
+        'keywords': ['train'],
+        'priority': 0.8,
+        'min_size_ratio': 0.001
+    }
+}
+
+ROBUST_KEYWORD_CATEGORIES = {keyword.lower(): category
+                             for category, rules in ROBUST_CATEGORIES.items()
+                             for keyword in rules['keywords']}
+
+
+def robust_classification(class_name: str) -> Tuple[str, float]:
+    """(category, priority): exact keyword, then partial keyword, else MISCELLANEOUS"""
+    name = class_name.lower()
+    category = ROBUST_KEYWORD_CATEGORIES.get(name)
+    if category is None:
+        category = next((category for keyword, category in ROBUST_KEYWORD_CATEGORIES.items()
+                         if keyword in name or name in keyword), None)
+    if category is None:
+        return 'MISCELLANEOUS', 0.5
+    return category, ROBUST_CATEGORIES[category]['priority']
+
+
+def _robust_rule(class_name: str) -> Rule:
+    category, priority = robust_classification(class_name)
+    min_area = ROBUST_CATEGORIES.get(category, {}).get('min_size_ratio', 0.001)
+    return category, True, priority, 0.0, min_area, 0.8
+
+
+PROFILES: Dict[str, Callable[[str], Rule]] = {
+    'strict': _strict_rule,
+    'realtime': _realtime_rule,
+    'ultra': _ultra_rule,
+    'robust': _robust_rule,
+}
+
+
+class ClassTable:
+    """A profile applied to every class of a model, indexed by class id"""
+
+    def __init__(self, names: Union[Mapping[int, str], Sequence[str]], profile: str):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown taxonomy profile: {profile}")
+        self.profile = profile
+        self._rule = PROFILES[profile]
+        items = names.items() if isinstance(names, Mapping) else enumerate(names)
+        self.classes: Dict[int, ClassInfo] = {int(class_id): self._info(int(class_id), name)
+                                              for class_id, name in items}
+        self._by_name = {info.name.lower(): info for info in self.classes.values()}
+        self.relevant_ids = sorted(class_id for class_id, info in self.classes.items() if info.relevant)
+
+    def _info(self, class_id: int, name: str) -> ClassInfo:
+        return ClassInfo(class_id, name, *self._rule(name))
+
+    def __getitem__(self, class_id: int) -> ClassInfo:
+        return self.classes[int(class_id)]
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def by_name(self, name: str) -> ClassInfo:
+        """Lookup by class name (classified on the fly for names the model does not have)"""
+        info = self._by_name.get(name.lower())
+        return info if info is not None else self._info(-1, name)
+
+    def ids_for(self, names: Iterable[str]) -> List[int]:
+        wanted = {name.lower() for name in names}
+        return sorted(class_id for class_id, info in self.classes.items() if info.name.lower() in wanted)
+
+    def class_filter(self, extra_ids: Iterable[int] = ()) -> Optional[List[int]]:
+        """Class ids for the model's `classes` argument, or None when every class is relevant"""
+        ids = sorted(set(self.relevant_ids) | set(extra_ids))
+        return None if len(ids) == len(self.classes) else ids
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The detection modules are flat files in python-detection/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
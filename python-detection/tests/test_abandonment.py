@@ -0,0 +1,84 @@
+import abandonment
+from abandonment import AbandonmentEngine, AbandonmentMonitor
+
+IMAGE_SIZE = (480, 640)
+
+
+def bag():
+    return {'class': 'suitcase', 'bbox': [300, 300, 360, 380], 'confidence': 0.9}
+
+
+def person(x):
+    return {'class': 'person', 'bbox': [x, 200, x + 60, 400], 'confidence': 0.9}
+
+
+def make_engine(**kwargs):
+    options = dict(stationary_frames=3, min_observation_time=10, max_tracking_time=60)
+    options.update(kwargs)
+    return AbandonmentEngine(**options)
+
+
+def run(engine, timestamps, people=()):
+    events = []
+    for timestamp in timestamps:
+        _, frame_events = engine.update([bag()], list(people), IMAGE_SIZE, timestamp)
+        events.extend((timestamp, e) for e in frame_events)
+    return events
+
+
+def test_alerts_once_after_unattended_and_stationary():
+    engine = make_engine()
+    events = run(engine, range(0, 40))
+    assert [t for t, _ in events] == [10]
+    assert events[0][1]['abandoned'] and events[0][1]['unattended_seconds'] == 10
+
+
+def test_no_alert_while_owner_is_near():
+    engine = make_engine()
+    assert run(engine, range(0, 40), people=[person(380)]) == []
+
+
+def test_no_repeat_alert_after_tracking_window():
+    engine = make_engine(max_tracking_time=30)
+    events = run(engine, range(0, 200, 2))
+    assert [t for t, _ in events] == [10]
+    objects, _ = engine.update([bag()], [], IMAGE_SIZE, 202)
+    assert objects[0]['abandoned']
+
+
+def test_monitor_expiry_ignores_other_cameras_clocks(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(abandonment.time, 'monotonic', lambda: clock[0])
+    monitor = AbandonmentMonitor(idle_timeout=60, stationary_frames=3, min_observation_time=10)
+
+    monitor.update('video', [bag()], [], IMAGE_SIZE, timestamp=5.0)
+    # A wall-clock camera must not make the video-time camera look idle
+    monitor.update('wall', [bag()], [], IMAGE_SIZE, timestamp=1.7e9)
+    assert sorted(monitor.cameras) == ['video', 'wall']
+
+    clock[0] += 30
+    monitor.update('video', [bag()], [], IMAGE_SIZE, timestamp=6.0)
+    clock[0] += 45
+    # 'wall' was last heard from 75s ago, 'video' 45s ago
+    monitor.update('video', [bag()], [], IMAGE_SIZE, timestamp=7.0)
+    assert monitor.cameras == ['video']
+
+
+def test_monitor_keeps_per_camera_state():
+    monitor = AbandonmentMonitor(stationary_frames=3, min_observation_time=10)
+    events = []
+    for t in range(0, 20):
+        events += monitor.update('a', [bag()], [], IMAGE_SIZE, timestamp=t)[1]
+        events += monitor.update('b', [bag()], [person(380)], IMAGE_SIZE, timestamp=t)[1]
+    assert len(events) == 1
+
+
+def test_long_lived_camera_does_not_accumulate_tracks():
+    monitor = AbandonmentMonitor(stationary_frames=3, min_observation_time=10)
+    for frame in range(3000):
+        # A new object every 10 frames, each seen for 5 frames at its own spot
+        x = (frame // 10) % 10 * 60
+        objects = [{'class': 'suitcase', 'bbox': [x, 300, x + 50, 380], 'confidence': 0.9}] if frame % 10 < 5 else []
+        monitor.update('lobby', objects, [], IMAGE_SIZE, timestamp=frame / 10)
+    tracker = monitor._engines['lobby'].tracker
+    assert len(tracker.all_tracks()) <= 2
@@ -0,0 +1,73 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from artifact_store import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(root=str(tmp_path / 'artifacts'), base_url='http://host/artifacts/',
+                         max_bytes=10_000, max_age=3600)
+
+
+def test_put_is_content_addressed_and_atomic(store):
+    first = store.put_bytes(b'crop', 'req1')
+    again = store.put_bytes(b'crop', 'req1')
+    assert first == again
+    assert first.url == f"http://host/artifacts/req1/{first.name}"
+    assert open(first.path, 'rb').read() == b'crop'
+    # No temporary files are left behind
+    assert os.listdir(os.path.dirname(first.path)) == [first.name]
+    assert store.path('req1', first.name) == first.path
+
+
+def test_put_image_encodes_jpeg(store):
+    artifact = store.put_image(np.zeros((10, 10, 3), np.uint8), 'req1')
+    assert artifact.name.endswith('.jpg')
+    assert open(artifact.path, 'rb').read(2) == b'\xff\xd8'
+
+
+def test_namespaces(store):
+    assert ArtifactStore.new_namespace('req-1_a') == 'req-1_a'
+    generated = ArtifactStore.new_namespace('../etc')
+    assert generated != '../etc' and len(generated) == 32
+    with pytest.raises(ValueError):
+        store.put_bytes(b'x', '../escape')
+
+
+@pytest.mark.parametrize('namespace, name', [
+    ('..', 'a' * 64 + '.jpg'),
+    ('req1', '../../secret.jpg'),
+    ('req1', 'notahash.jpg'),
+    ('req1', 'b' * 64 + '.jpg'),  # well-formed but missing
+])
+def test_path_rejects_bad_or_unknown_names(store, namespace, name):
+    store.put_bytes(b'crop', 'req1')
+    with pytest.raises(FileNotFoundError):
+        store.path(namespace, name)
+
+
+def set_age(store, namespace, mtime):
+    directory = os.path.join(store.root, namespace)
+    for name in os.listdir(directory):
+        os.utime(os.path.join(directory, name), (mtime, mtime))
+    os.utime(directory, (mtime, mtime))
+
+
+def test_gc_removes_expired_then_oldest_until_under_quota(store):
+    now = time.time()
+    for i, namespace in enumerate(['expired', 'old', 'mid', 'new']):
+        store.put_bytes(bytes([i]) * 4000, namespace)
+    set_age(store, 'expired', now - 7200)
+    set_age(store, 'old', now - 300)
+    set_age(store, 'mid', now - 200)
+    set_age(store, 'new', now - 100)
+
+    result = store.gc(now)
+    # 'expired' goes for its age, 'old' to get 12000 bytes under the 10000 byte quota
+    assert result == {'removed_namespaces': 2, 'freed_bytes': 8000, 'bytes': 8000}
+    assert sorted(os.listdir(store.root)) == ['mid', 'new']
+    assert store.gc(now)['removed_namespaces'] == 0
@@ -0,0 +1,40 @@
+from dedup import DetectionDeduplicator, deduplicate_detections
+
+
+def detection(x, timestamp, confidence=0.8, label='suitcase'):
+    return {'class': label, 'bbox': [x, 100, x + 50, 200], 'confidence': confidence,
+            'frame_timestamp': timestamp, 'frame_number': int(timestamp * 30)}
+
+
+def test_same_object_over_time_is_merged_keeping_best_view():
+    dedup = DetectionDeduplicator(iou_threshold=0.5, time_window=30)
+    for t, confidence in [(0, 0.6), (1, 0.9), (2, 0.7)]:
+        dedup.add(detection(100, t, confidence))
+    [merged] = dedup.results()
+    assert merged['confidence'] == 0.9
+    assert (merged['first_seen'], merged['last_seen'], merged['occurrences']) == (0, 2, 3)
+    assert (merged['first_frame'], merged['last_frame']) == (0, 60)
+
+
+def test_best_returns_the_current_best_detection():
+    dedup = DetectionDeduplicator()
+    low, high = detection(100, 0, 0.5), detection(100, 1, 0.9)
+    cluster = dedup.add(low)
+    assert dedup.add(high) == cluster
+    assert dedup.best(cluster) is high
+
+
+def test_different_place_class_or_time_stay_separate():
+    dedup = DetectionDeduplicator(iou_threshold=0.5, time_window=30)
+    dedup.add(detection(100, 0))
+    dedup.add(detection(400, 0))
+    dedup.add(detection(100, 0, label='backpack'))
+    dedup.add(detection(100, 100))
+    assert len(dedup.results()) == 4
+
+
+def test_merged_results_can_be_fed_back():
+    first = deduplicate_detections([detection(100, 0), detection(100, 5)])
+    again = deduplicate_detections(first + [detection(100, 10)])
+    assert len(again) == 1
+    assert (again[0]['first_seen'], again[0]['last_seen'], again[0]['occurrences']) == (0, 10, 3)
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+import frame_gate
+from frame_gate import FrameGate
+
+
+def scene(seed=0):
+    return np.random.RandomState(seed).randint(0, 255, (240, 320, 3), np.uint8)
+
+
+@pytest.mark.skipif('FRAME_GATE' in os.environ, reason='FRAME_GATE is set')
+def test_disabled_by_default():
+    assert frame_gate.FRAME_GATE_ENABLED is False
+    gate = FrameGate()
+    frame = scene()
+    assert [gate.check(frame, t) for t in range(3)] == [False, False, False]
+
+
+def test_near_duplicates_reuse_until_refresh():
+    gate = FrameGate(enabled=True, refresh_seconds=5)
+    frame = scene()
+    noisy = np.clip(frame.astype(int) + np.random.RandomState(1).randint(-3, 4, frame.shape), 0, 255)
+    brighter = np.clip(frame.astype(int) + 20, 0, 255)
+    assert gate.check(frame, 0) is False
+    assert gate.check(noisy.astype(np.uint8), 1) is True
+    assert gate.check(brighter.astype(np.uint8), 2) is True
+    assert gate.check(frame, 5) is False  # refresh interval reached
+    assert gate.stats() == {'frames': 4, 'skipped': 2, 'skip_ratio': 0.5}
+
+
+def test_changed_frame_is_recomputed():
+    gate = FrameGate(enabled=True)
+    frame = scene()
+    assert gate.check(frame, 0) is False
+    assert gate.check(np.roll(frame, 10, axis=1), 1) is False
+
+
+def test_new_object_in_static_scene_is_detected():
+    gate = FrameGate(enabled=True)
+    frame = np.full((480, 640, 3), 90, np.uint8)
+    with_bag = frame.copy()
+    with_bag[300:340, 400:440] = 200  # 40x40 bag on a 640x480 frame
+    assert gate.check(frame, 0) is False
+    assert gate.check(with_bag, 1) is False
+
+
+def test_detect_computes_once_and_returns_copies():
+    gate = FrameGate(enabled=True)
+    frame = scene()
+    calls = []
+
+    def compute(image):
+        calls.append(1)
+        return [{'class': 'suitcase', 'bbox': [1, 2, 3, 4]}]
+
+    first = gate.detect(frame, 0, compute)
+    first[0]['track_id'] = 7
+    second = gate.detect(frame, 1, compute)
+    second[0]['class'] = 'changed'
+    third = gate.detect(frame, 2, compute)
+    assert len(calls) == 1
+    assert third == [{'class': 'suitcase', 'bbox': [1, 2, 3, 4]}]
+
+
+def test_detect_without_gate_always_computes():
+    gate = FrameGate(enabled=False)
+    frame = scene()
+    results = [gate.detect(frame, t, lambda image, t=t: [{'t': t}]) for t in range(3)]
+    assert results == [[{'t': 0}], [{'t': 1}], [{'t': 2}]]
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from geometry import as_boxes, box_iou, group_overlapping, iou_matrix, nms, to_xywh
+
+
+def test_formats_round_trip():
+    boxes = as_boxes([[10, 20, 30, 40]], 'xywh')
+    assert boxes.tolist() == [[10, 20, 40, 60]]
+    assert to_xywh(boxes).tolist() == [[10, 20, 30, 40]]
+
+
+def test_iou():
+    assert box_iou([0, 0, 10, 10], [0, 0, 10, 10]) == pytest.approx(1.0)
+    assert box_iou([0, 0, 10, 10], [5, 0, 15, 10]) == pytest.approx(50 / 150)
+    assert box_iou([0, 0, 10, 10], [20, 20, 30, 30]) == 0.0
+    assert iou_matrix([[0, 0, 10, 10]] * 2, [[0, 0, 10, 10]] * 3).shape == (2, 3)
+    assert iou_matrix(np.zeros((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+
+
+def test_nms_keeps_best_of_each_overlap_group():
+    boxes = [[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]]
+    assert nms(boxes, [0.6, 0.9, 0.5]).tolist() == [1, 2]
+    assert len(nms(np.zeros((0, 4)), [])) == 0
+
+
+def test_nms_with_labels_only_suppresses_same_label():
+    boxes = [[0, 0, 10, 10], [1, 1, 11, 11]]
+    assert sorted(nms(boxes, [0.9, 0.8], labels=['bag', 'person']).tolist()) == [0, 1]
+
+
+def test_group_overlapping():
+    groups = group_overlapping([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]])
+    assert sorted(sorted(g) for g in groups) == [[0, 1], [2]]
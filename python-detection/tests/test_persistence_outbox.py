@@ -0,0 +1,118 @@
+import time
+
+import requests
+
+from persistence_outbox import CircuitBreaker, PersistenceOutbox
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ''
+
+
+class FakeSession:
+    """Answers posts with the scripted status codes (an exception is raised)"""
+
+    def __init__(self):
+        self.replies = []
+        self.posted = []
+
+    def post(self, url, data=None, timeout=None):
+        self.posted.append(data)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return FakeResponse(reply)
+
+
+def make_outbox(tmp_path, failure_threshold=1, reset_timeout=0.05):
+    session = FakeSession()
+    outbox = PersistenceOutbox(path=str(tmp_path / 'outbox.db'), url='http://api/lost-objects',
+                               backoff_base=0, session=session,
+                               breaker=CircuitBreaker(failure_threshold, reset_timeout))
+    return outbox, session
+
+
+def test_breaker_opens_and_half_open_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_delivered_rows_are_removed(tmp_path):
+    outbox, session = make_outbox(tmp_path)
+    outbox.enqueue([{'name': 'bag'}, {'name': 'phone'}])
+    session.replies = [201, 201]
+    assert outbox.drain_once() == 2
+    assert outbox.stats()['pending'] == 0
+    assert outbox.drain_once() == 0
+
+
+def test_rejected_payload_in_half_open_trial_closes_breaker(tmp_path):
+    outbox, session = make_outbox(tmp_path)
+    outbox.enqueue([{'name': 'bag'}])
+    session.replies = [503]
+    assert outbox.drain_once() == 0
+    assert outbox.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    session.replies = [400]
+    assert outbox.drain_once() == 0
+    assert outbox.stats()['dead'] == 1
+    assert outbox.breaker.state == CircuitBreaker.CLOSED
+
+    outbox.enqueue([{'name': 'phone'}])
+    session.replies = [201]
+    assert outbox.drain_once() == 1
+
+
+def test_half_open_trial_is_released_when_sending_raises(tmp_path):
+    outbox, session = make_outbox(tmp_path)
+    outbox.enqueue([{'name': 'bag'}])
+    session.replies = [503]
+    outbox.drain_once()
+    time.sleep(0.06)
+
+    outbox._claim = lambda now: 1 / 0
+    try:
+        outbox.drain_once()
+    except ZeroDivisionError:
+        pass
+    del outbox._claim
+    assert outbox.breaker.allow()
+
+
+def test_network_errors_retry_then_go_dead(tmp_path):
+    outbox, session = make_outbox(tmp_path, failure_threshold=100)
+    outbox.max_attempts = 2
+    outbox.enqueue([{'name': 'bag'}])
+    session.replies = [requests.exceptions.ConnectionError('down')]
+    outbox.drain_once()
+    assert outbox.stats()['pending'] == 1
+    session.replies = [requests.exceptions.ConnectionError('down')]
+    outbox.drain_once()
+    assert outbox.stats()['dead'] == 1
+
+
+def test_open_breaker_leaves_rest_of_batch_pending(tmp_path):
+    outbox, session = make_outbox(tmp_path)
+    outbox.enqueue([{'n': 1}, {'n': 2}, {'n': 3}])
+    session.replies = [503]
+    assert outbox.drain_once() == 0
+    assert len(session.posted) == 1
+    assert outbox.stats()['pending'] == 3
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from frame_gate import FrameGate
+from result_cache import COALESCED, HIT, MISS, ResultCache, detection_result_key, result_key
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def strict_key(**overrides):
+    options = dict(upload_hash='abc', endpoint='detect/strict', model_path='yolov8m.pt', backend='pytorch',
+                   frame_gate=FrameGate(enabled=True).settings(), confidence_threshold=0.05)
+    options.update(overrides)
+    return detection_result_key(**options)
+
+
+def test_key_is_stable():
+    assert strict_key() == strict_key()
+    assert result_key('abc', 'e', 'm', a=1, b=2) == result_key('abc', 'e', 'm', b=2, a=1)
+
+
+@pytest.mark.parametrize('change', [
+    {'upload_hash': 'def'},
+    {'endpoint': 'detect/video'},
+    {'model_path': 'yolov8n.pt'},
+    {'backend': 'onnx-int8'},
+    {'backend': 'openvino'},
+    {'confidence_threshold': 0.25},
+    {'frame_gate': FrameGate(enabled=False).settings()},
+    {'frame_gate': FrameGate(enabled=True, max_changed=0.01).settings()},
+    {'frame_gate': FrameGate(enabled=True, refresh_seconds=1).settings()},
+    {'frame_gate': FrameGate(enabled=True, pixel_delta=30).settings()},
+])
+def test_key_changes_with_everything_that_changes_output(change):
+    assert strict_key(**change) != strict_key()
+
+
+def test_gate_settings_cover_every_parameter():
+    gate = FrameGate(enabled=False, pixel_delta=7, max_changed=0.5, refresh_seconds=2, signature_size=(32, 18))
+    assert gate.settings() == {'enabled': False, 'pixel_delta': 7, 'max_changed': 0.5,
+                               'refresh_seconds': 2, 'signature_size': [32, 18]}
+
+
+def test_miss_then_hit_and_errors_are_not_cached():
+    cache = ResultCache(MemorySessionStore())
+    assert cache.get_or_compute('k', lambda: {'n': 1}) == ({'n': 1}, MISS)
+    assert cache.get_or_compute('k', lambda: {'n': 2}) == ({'n': 1}, HIT)
+
+    def fail():
+        raise RuntimeError('inference failed')
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('bad', fail)
+    assert cache.get_or_compute('bad', lambda: {'n': 3}) == ({'n': 3}, MISS)
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = ResultCache(MemorySessionStore())
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'objects': []}
+
+    statuses = []
+    leader = threading.Thread(target=lambda: statuses.append(cache.get_or_compute('k', compute)[1]))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: statuses.append(cache.get_or_compute('k', compute)[1]))
+                 for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.1)  # followers are waiting on the leader's computation
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(statuses) == [COALESCED] * 3 + [MISS]
+
+def test_disk_tier_survives_a_new_memory_tier(tmp_path):
+    disk = SQLiteSessionStore(path=str(tmp_path / 'results.db'))
+    ResultCache(MemorySessionStore(), disk).get_or_compute('k', lambda: {'n': 1})
+    cache = ResultCache(MemorySessionStore(), disk)
+    assert cache.get_or_compute('k', lambda: {'n': 2}) == ({'n': 1}, HIT)
+
+
+def test_result_with_deleted_artifact_is_recomputed(tmp_path):
+    crop = tmp_path / 'crop.jpg'
+    crop.write_bytes(b'jpeg')
+    response = {'objects': [{'class': 'suitcase', 'screenshot_path': str(crop)}]}
+    disk = SQLiteSessionStore(path=str(tmp_path / 'results.db'))
+    cache = ResultCache(MemorySessionStore(), disk)
+    cache.get_or_compute('k', lambda: response)
+    assert cache.get_or_compute('k', lambda: {'objects': []})[1] == HIT
+
+    crop.unlink()  # removed by the artifact store GC
+    assert cache.get_or_compute('k', lambda: {'objects': []}) == ({'objects': []}, MISS)
+    assert cache.stats()['stale'] == 1
+    assert cache.get_or_compute('k', lambda: response) == ({'objects': []}, HIT)
+
+
+def test_results_without_artifacts_stay_valid():
+    cache = ResultCache(MemorySessionStore())
+    cache.get_or_compute('k', lambda: {'objects': [{'screenshot_path': None}]})
+    assert cache.get_or_compute('k', lambda: {})[1] == HIT
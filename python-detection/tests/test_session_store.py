@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+import session_store
+from session_store import MemorySessionStore, SessionStore, SQLiteSessionStore, create_session_store
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, 'time', clock.time)
+    return clock
+
+
+def test_incomplete_backend_fails_when_built():
+    class NoStats(SessionStore):
+        def put(self, session_id, result):
+            pass
+
+        def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        NoStats()
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_memory_store_round_trip_returns_copies():
+    store = MemorySessionStore()
+    store['a'] = {'objects': [1]}
+    result = store.get('a')
+    result['objects'].append(2)
+    assert store.get('a') == {'objects': [1]}
+    assert 'a' in store and 'b' not in store
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_entries=2)
+    store.put('a', {'n': 1})
+    store.put('b', {'n': 2})
+    store.get('a')
+    store.put('c', {'n': 3})
+    assert store.get('b') is None
+    assert store.get('a') == {'n': 1} and store.get('c') == {'n': 3}
+
+
+def test_memory_store_byte_budget():
+    entry = {'data': 'x' * 100}
+    size = len(json.dumps(entry))
+    store = MemorySessionStore(max_bytes=size * 2 + 1)
+    for key in 'abc':
+        store.put(key, entry)
+    assert store.stats()['entries'] == 2 and store.stats()['bytes'] == size * 2
+    assert store.get('a') is None
+
+    store.put('huge', {'data': 'x' * 1000})
+    assert store.get('huge') is None
+
+
+def test_memory_store_ttl(clock):
+    store = MemorySessionStore(ttl_seconds=10)
+    store.put('a', {'n': 1})
+    clock.now += 9
+    assert store.get('a') == {'n': 1}
+    clock.now += 2
+    assert store.get('a') is None
+    assert store.stats()['entries'] == 0
+
+
+def test_sqlite_store_persists_and_expires(tmp_path, clock):
+    path = str(tmp_path / 'sessions.db')
+    SQLiteSessionStore(path=path, ttl_seconds=10).put('a', {'n': 1})
+    store = SQLiteSessionStore(path=path, ttl_seconds=10)
+    assert store.get('a') == {'n': 1}
+    clock.now += 11
+    assert store.get('a') is None
+
+
+def test_sqlite_store_caps_entries(tmp_path, clock):
+    store = SQLiteSessionStore(path=str(tmp_path / 'sessions.db'), max_entries=2, cleanup_interval=0)
+    for i, key in enumerate('abc'):
+        clock.now += 1
+        store.put(key, {'n': i})
+    assert store.stats()['entries'] == 2
+    assert store.get('a') is None and store.get('c') == {'n': 2}
+
+
+def test_create_session_store(monkeypatch, tmp_path):
+    monkeypatch.setenv('SESSION_STORE', 'sqlite')
+    monkeypatch.setenv('SESSION_DB_PATH', str(tmp_path / 's.db'))
+    assert isinstance(create_session_store(), SQLiteSessionStore)
+    monkeypatch.setenv('SESSION_STORE', 'redis')
+    with pytest.raises(ValueError):
+        create_session_store()
@@ -0,0 +1,84 @@
+import io
+import struct
+import threading
+
+import pytest
+
+import streaming_upload
+from frame_sampler import open_decode_backend
+from streaming_upload import StreamingUpload, UploadTooLargeError, decode_streaming
+
+
+def box(box_type, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+@pytest.fixture
+def upload(tmp_path):
+    upload = StreamingUpload(temp_dir=str(tmp_path), stall_timeout=2)
+    yield upload
+    if not upload.complete:
+        upload.abort('test finished')
+
+
+def test_reader_sees_bytes_while_upload_arrives(upload):
+    reader = upload.open_reader()
+    upload.write(b'abc')
+    assert reader.read(3) == b'abc'
+    writer = threading.Timer(0.05, lambda: (upload.write(b'def'), upload.finish()))
+    writer.start()
+    assert reader.read() == b'def'
+    assert reader.read() == b''
+    reader.close()
+
+
+def test_copy_from_enforces_size_limit_and_aborts(upload):
+    with pytest.raises(UploadTooLargeError):
+        upload.copy_from(io.BytesIO(b'x' * 100), max_bytes=10, chunk_size=8)
+    with pytest.raises(IOError):
+        upload.wait_until()
+
+
+def test_stalled_upload_raises(tmp_path):
+    upload = StreamingUpload(temp_dir=str(tmp_path), stall_timeout=0.05)
+    with pytest.raises(IOError):
+        upload.wait_until(1)
+    upload.abort('done')
+
+
+@pytest.mark.parametrize('boxes, sequential', [
+    ([box(b'ftyp', b'isom'), box(b'moov'), box(b'mdat', b'data')], True),
+    ([box(b'ftyp', b'isom'), box(b'mdat', b'data'), box(b'moov')], False),
+    ([b'\x1aE\xdf\xa3' + b'\x00' * 12], True),  # Matroska
+])
+def test_is_sequential(upload, boxes, sequential):
+    upload.copy_from(io.BytesIO(b''.join(boxes)))
+    assert upload.is_sequential() is sequential
+
+
+def mkv_upload(upload):
+    upload.copy_from(io.BytesIO(b'\x1aE\xdf\xa3' + b'\x00' * 12))
+    return upload
+
+
+def test_opencv_backend_decodes_the_complete_file(upload, monkeypatch):
+    monkeypatch.setattr(streaming_upload, 'HAS_PYAV', True)
+    sources = []
+    assert decode_streaming(mkv_upload(upload), lambda source: sources.append(source) or 'ok',
+                            backend='opencv') == 'ok'
+    assert sources == [None]
+
+
+def test_reader_rejected_by_backend_falls_back_to_path(upload, monkeypatch):
+    monkeypatch.setattr(streaming_upload, 'HAS_PYAV', True)
+    sources = []
+
+    def decode(source):
+        sources.append(source)
+        if source is not None:
+            # What the OpenCV backend does with a file object
+            return open_decode_backend(source, backend='opencv')
+        return 'ok'
+
+    assert decode_streaming(mkv_upload(upload), decode, backend='pyav') == 'ok'
+    assert sources[-1] is None and len(sources) == 2
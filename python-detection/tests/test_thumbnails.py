@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from thumbnails import ThumbnailCache
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    directory = tmp_path / 'detected_objects'
+    directory.mkdir()
+    rng = np.random.RandomState(0)
+    for name in ('a.jpg', 'b.jpg', 'c.jpg'):
+        cv2.imwrite(str(directory / name), rng.randint(0, 255, (400, 600, 3), np.uint8))
+    return directory
+
+
+def test_derivative_is_resized_and_cached(source_dir):
+    cache = ThumbnailCache(str(source_dir), sizes=(128, 256))
+    path, mimetype = cache.path('a.jpg', 100, 'webp')
+    assert mimetype == 'image/webp'
+    assert max(cv2.imread(path).shape[:2]) == 128  # snapped up to an allowed size
+    assert cache.path('a.jpg', 128, 'webp')[0] == path
+    assert (cache.stats()['generated'], cache.stats()['hits']) == (1, 1)
+
+
+def test_rejects_unknown_sources_and_formats(source_dir):
+    cache = ThumbnailCache(str(source_dir))
+    with pytest.raises(FileNotFoundError):
+        cache.path('../a.jpg', 128)
+    with pytest.raises(ValueError):
+        cache.path('a.jpg', 128, 'gif')
+    with pytest.raises(ValueError):
+        cache.path('a.jpg', 0)
+
+
+def test_concurrent_requests_generate_once(source_dir, monkeypatch):
+    cache = ThumbnailCache(str(source_dir))
+    generate = ThumbnailCache._generate
+    calls = []
+
+    def slow_generate(*args):
+        calls.append(1)
+        time.sleep(0.05)
+        return generate(*args)
+
+    monkeypatch.setattr(ThumbnailCache, '_generate', staticmethod(slow_generate))
+    paths = []
+    threads = [threading.Thread(target=lambda: paths.append(cache.path('a.jpg', 256)[0])) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len(set(paths)) == 1
+    # Requests after the generation finished are hits, not new generations
+    for _ in range(3):
+        cache.path('a.jpg', 256)
+    assert len(calls) == 1
+    assert cache._key_locks == {}
+
+
+def test_lru_budget_evicts_least_recently_used(source_dir):
+    probe = ThumbnailCache(str(source_dir), cache_dir=str(source_dir / 'probe'))
+    size = os.path.getsize(probe.path('a.jpg', 256)[0])
+    cache = ThumbnailCache(str(source_dir), max_bytes=int(size * 2.5))
+    a = cache.path('a.jpg', 256)[0]
+    b = cache.path('b.jpg', 256)[0]
+    cache.path('a.jpg', 256)  # a is now the most recently used
+    cache.path('c.jpg', 256)
+    assert os.path.exists(a) and not os.path.exists(b)
+    assert cache.stats()['evicted'] == 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
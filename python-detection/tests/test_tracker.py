@@ -0,0 +1,47 @@
+from tracker import SortTracker
+
+
+def box(x, label='suitcase'):
+    return {'class': label, 'bbox': [x, 100, x + 50, 200]}
+
+
+def test_moving_object_keeps_its_track_id():
+    tracker = SortTracker()
+    ids = [tracker.update([box(100 + 5 * frame)], frame)[0]['track_id'] for frame in range(10)]
+    assert set(ids) == {1}
+    assert tracker.get(1).hits == 10
+
+
+def test_separate_objects_and_labels_get_separate_tracks():
+    tracker = SortTracker()
+    first = tracker.update([box(0), box(300), box(0, 'person')], 0)
+    assert len({d['track_id'] for d in first}) == 3
+    second = tracker.update([box(302), box(2)], 1)
+    assert [d['track_id'] for d in second] == [first[1]['track_id'], first[0]['track_id']]
+
+
+def test_tracks_expire_after_max_age():
+    tracker = SortTracker(max_age=2)
+    tracker.update([box(0)], 0)
+    for frame in range(1, 4):
+        tracker.update([], frame)
+    assert tracker.tracks == []
+    assert [t.id for t in tracker.all_tracks()] == [1]
+    assert tracker.update([box(0)], 4)[0]['track_id'] == 2
+
+
+def test_reset_restarts_ids():
+    tracker = SortTracker()
+    tracker.update([box(0)], 0)
+    tracker.reset()
+    assert tracker.update([box(0)], 0)[0]['track_id'] == 1
+
+
+def test_finished_tracks_can_be_dropped():
+    tracker = SortTracker(max_age=1, keep_finished=False)
+    for frame in range(0, 100, 4):
+        tracker.update([box(frame * 10 % 500)], frame)
+        tracker.update([], frame + 1)
+        tracker.update([], frame + 2)
+    assert tracker.finished_tracks == []
+    assert len(tracker.tracks) <= 1
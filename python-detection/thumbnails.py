@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Thumbnails - lazily generated, disk-cached derivatives of detection images
+A derivative (longest side <= size, JPEG/WebP/PNG) is generated once on first
+request and kept in a cache directory under an LRU byte budget. Cache names
+include the source's mtime, so a rewritten source gets fresh derivatives and
+the stale ones age out. Files are served with send_file: ETag/Last-Modified
+revalidation, Range requests, and the WSGI file wrapper (sendfile) for the
+body, or X-Sendfile when USE_X_SENDFILE is set.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = tuple(sorted(int(s) for s in os.getenv('THUMBNAIL_SIZES', '64,128,256,512,1024').split(',')))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_MAX_MB', '256')) * 1024 * 1024
+THUMBNAIL_MAX_AGE = int(os.getenv('THUMBNAIL_MAX_AGE', '3600'))
+
+# format -> (file extension, mimetype, cv2 encode params)
+THUMBNAIL_FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg', [cv2.IMWRITE_JPEG_QUALITY, 85]),
+    'webp': ('.webp', 'image/webp', [cv2.IMWRITE_WEBP_QUALITY, 80]),
+    'png': ('.png', 'image/png', [cv2.IMWRITE_PNG_COMPRESSION, 6]),
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+
+
+class ThumbnailCache:
+    """
+    Derivative cache for the images in source_dir
+
+    path() returns the cached file for (filename, size, format), generating
+    it if needed. Requested sizes are snapped up to the nearest allowed size
+    so the number of derivatives per image stays bounded.
+    """
+
+    def __init__(self, source_dir: str, cache_dir: Optional[str] = None,
+                 max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES, sizes: Tuple[int, ...] = THUMBNAIL_SIZES):
+        self.source_dir = os.path.abspath(source_dir)
+        self.cache_dir = os.path.abspath(cache_dir or os.path.join(source_dir, '.thumbnails'))
+        self.max_bytes = max_bytes
+        self.sizes = tuple(sorted(sizes))
+        self.hits = 0
+        self.generated = 0
+        self.evicted = 0
+        # cache file name -> size in bytes, least recently used first
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from the files already on disk (oldest access first)"""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                files.append((stat.st_atime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    def snap_size(self, size: int) -> int:
+        if size <= 0:
+            raise ValueError(f"Invalid thumbnail size: {size}")
+        for allowed in self.sizes:
+            if allowed >= size:
+                return allowed
+        return self.sizes[-1]
+
+    @staticmethod
+    def normalize_format(fmt: str) -> str:
+        fmt = FORMAT_ALIASES.get(fmt.lower(), fmt.lower())
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Unsupported thumbnail format: {fmt}")
+        return fmt
+
+    def source_path(self, filename: str) -> str:
+        """Absolute path of a source image; rejects names that leave source_dir"""
+        path = os.path.abspath(os.path.join(self.source_dir, filename))
+        if os.path.dirname(path) != self.source_dir or not os.path.isfile(path):
+            raise FileNotFoundError(filename)
+        return path
+
+    def _cache_name(self, filename: str, mtime_ns: int, size: int, fmt: str) -> str:
+        digest = hashlib.sha1(f"{filename}:{mtime_ns}".encode()).hexdigest()[:16]
+        stem = os.path.splitext(filename)[0][:64]
+        return f"{stem}.{digest}.{size}{THUMBNAIL_FORMATS[fmt][0]}"
+
+    def path(self, filename: str, size: int, fmt: str = 'jpeg') -> Tuple[str, str]:
+        """(cached derivative path, mimetype), generated on first use"""
+        fmt = self.normalize_format(fmt)
+        size = self.snap_size(size)
+        source = self.source_path(filename)
+        name = self._cache_name(filename, os.stat(source).st_mtime_ns, size, fmt)
+        path = os.path.join(self.cache_dir, name)
+        mimetype = THUMBNAIL_FORMATS[fmt][1]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(name, threading.Lock())
+        # One generation per derivative; concurrent requests wait for it
+        with key_lock:
+            with self._lock:
+                if name in self._entries and os.path.exists(path):
+                    self._key_locks.pop(name, None)
+                    self._entries.move_to_end(name)
+                    self.hits += 1
+                    return path, mimetype
+            try:
+                nbytes = self._generate(source, path, size, fmt)
+            except BaseException:
+                with self._lock:
+                    self._key_locks.pop(name, None)
+                raise
+            # Recorded before the key lock goes away, so later requests see a hit
+            with self._lock:
+                self._total_bytes += nbytes - self._entries.pop(name, 0)
+                self._entries[name] = nbytes
+                self.generated += 1
+                self._evict(keep=name)
+                self._key_locks.pop(name, None)
+        return path, mimetype
+
+    @staticmethod
+    def _generate(source: str, path: str, size: int, fmt: str) -> int:
+        image = cv2.imread(source, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError(f"Could not decode image: {os.path.basename(source)}")
+        height, width = image.shape[:2]
+        scale = size / max(height, width)
+        if scale < 1:
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        extension, _, params = THUMBNAIL_FORMATS[fmt]
+        ok, encoded = cv2.imencode(extension, image, params)
+        if not ok:
+            raise ValueError(f"Could not encode {fmt} thumbnail")
+        # Written under a temporary name so readers never see a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encoded.tobytes())
+        os.replace(tmp_path, path)
+        return len(encoded)
+
+    def _evict(self, keep: str):
+        """Delete least recently used derivatives until the cache fits its budget"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, nbytes = next(iter(self._entries.items()))
+            if name == keep:
+                self._entries.move_to_end(name)
+                continue
+            del self._entries[name]
+            self._total_bytes -= nbytes
+            self.evicted += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'generated': self.generated,
+                'evicted': self.evicted
+            }
+
+
+def send_image(cache: ThumbnailCache, filename: str, size: Optional[int] = None,
+               fmt: Optional[str] = None, max_age: int = THUMBNAIL_MAX_AGE):
+    """
+    Flask response for a source image, or its derivative when size/format is given
+
+    Raises FileNotFoundError for unknown images and ValueError for bad
+    size/format values.
+    """
+    from flask import send_file
+
+    if size is None and fmt is None:
+        path, mimetype = cache.source_path(filename), None
+    else:
+        path, mimetype = cache.path(filename, size or cache.sizes[-1], fmt or 'jpeg')
+    # conditional=True answers If-None-Match/If-Modified-Since with 304 and handles Range
+    return send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=max_age)
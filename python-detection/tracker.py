@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Multi-Object Tracker - SORT-style IoU + Kalman tracking for the video detectors
+Each track carries a constant-velocity Kalman filter over its box; every frame
+the predicted boxes are matched to the new detections on a geometry.py IoU
+matrix (Hungarian assignment with scipy, greedy otherwise). Stable track ids
+let detectors crop/enhance/save once per object instead of once per frame.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geometry import BOX_FORMATS, as_boxes, iou_matrix
+
+# Optional imports - graceful fallback if not available
+try:
+    from scipy.optimize import linear_sum_assignment
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+logger = logging.getLogger(__name__)
+
+def associate(iou: np.ndarray, iou_threshold: float) -> Tuple[List[Tuple[int, int]], List[int], List[int]]:
+    """
+    Match rows (detections) to columns (tracks) on an IoU matrix
+
+    Returns (matches, unmatched_rows, unmatched_cols); pairs below
+    iou_threshold are never matched.
+    """
+    rows, cols = iou.shape
+    if rows == 0 or cols == 0:
+        return [], list(range(rows)), list(range(cols))
+
+    if HAS_SCIPY:
+        row_idx, col_idx = linear_sum_assignment(-iou)
+        candidates = zip(row_idx.tolist(), col_idx.tolist())
+    else:
+        # Greedy: best remaining pair first
+        order = np.argsort(-iou, axis=None)
+        used_rows, used_cols, candidates = set(), set(), []
+        for flat in order.tolist():
+            r, c = divmod(flat, cols)
+            if iou[r, c] < iou_threshold:
+                break
+            if r in used_rows or c in used_cols:
+                continue
+            used_rows.add(r)
+            used_cols.add(c)
+            candidates.append((r, c))
+
+    matches = [(r, c) for r, c in candidates if iou[r, c] >= iou_threshold]
+    matched_rows = {r for r, _ in matches}
+    matched_cols = {c for _, c in matches}
+    return (matches,
+            [r for r in range(rows) if r not in matched_rows],
+            [c for c in range(cols) if c not in matched_cols])
+
+
+def _xyxy_to_z(box: np.ndarray) -> np.ndarray:
+    """[x1, y1, x2, y2] -> measurement [cx, cy, area, aspect]"""
+    w = box[2] - box[0]
+    h = box[3] - box[1]
+    return np.array([box[0] + w / 2.0, box[1] + h / 2.0, w * h, w / max(h, 1e-6)])
+
+
+def _x_to_xyxy(x: np.ndarray) -> np.ndarray:
+    """Kalman state [cx, cy, area, aspect, ...] -> [x1, y1, x2, y2]"""
+    area = max(float(x[2]), 0.0)
+    w = np.sqrt(area * max(float(x[3]), 1e-6))
+    h = area / w if w > 0 else 0.0
+    return np.array([x[0] - w / 2.0, x[1] - h / 2.0, x[0] + w / 2.0, x[1] + h / 2.0])
+
+
+class KalmanBoxFilter:
+    """Constant-velocity Kalman filter over (cx, cy, area, aspect), as in SORT"""
+
+    # State transition: position += velocity (aspect ratio is constant)
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1.0
+    H = np.eye(4, 7)
+
+    def __init__(self, box: np.ndarray):
+        self.x = np.zeros(7)
+        self.x[:4] = _xyxy_to_z(box)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+        self.Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 1e-4])
+        self.R = np.diag([1.0, 1.0, 10.0, 10.0])
+
+    def predict(self) -> np.ndarray:
+        # Keep the predicted area positive
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return _x_to_xyxy(self.x)
+
+    def update(self, box: np.ndarray):
+        y = _xyxy_to_z(box) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+
+    @property
+    def box(self) -> np.ndarray:
+        return _x_to_xyxy(self.x)
+
+
+class Track:
+    """One tracked object"""
+
+    def __init__(self, track_id: int, box: np.ndarray, detection: Dict[str, Any],
+                 frame_number: Optional[int], label: Any = None):
+        self.id = track_id
+        self.filter = KalmanBoxFilter(box)
+        self.label = label
+        self.hits = 1
+        self.time_since_update = 0
+        self.first_frame = frame_number
+        self.last_frame = frame_number
+        self.last_detection = detection
+        # Free for callers, e.g. the best crop seen so far for this object
+        self.data: Dict[str, Any] = {}
+
+    @property
+    def box(self) -> np.ndarray:
+        return self.filter.box
+
+
+class SortTracker:
+    """
+    SORT multi-object tracker over detection dicts
+
+    update() stamps each detection with 'track_id' (int) and 'track_hits'.
+    Tracks unmatched for more than max_age frames are dropped (and kept for
+    all_tracks() only with keep_finished); with match_labels, detections
+    only match tracks of the same label_key value.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 5, min_hits: int = 1,
+                 bbox_format: str = 'xyxy', bbox_key: str = 'bbox',
+                 label_key: Optional[str] = 'class', match_labels: bool = True,
+                 keep_finished: bool = True):
+        if bbox_format not in BOX_FORMATS:
+            raise ValueError(f"Unknown bbox format: {bbox_format}")
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.bbox_format = bbox_format
+        self.bbox_key = bbox_key
+        self.label_key = label_key
+        self.match_labels = match_labels and label_key is not None
+        # Long-lived trackers (live cameras) must not keep every track ever seen
+        self.keep_finished = keep_finished
+        self.reset()
+
+    def reset(self):
+        """Forget all tracks (call before each new video)"""
+        self.tracks: List[Track] = []
+        self.finished_tracks: List[Track] = []
+        self._next_id = 1
+
+    def update(self, detections: List[Dict[str, Any]], frame_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Advance one frame; returns the same detections with track ids set"""
+        predicted = np.array([track.filter.predict() for track in self.tracks]).reshape(-1, 4)
+        boxes = as_boxes([d[self.bbox_key] for d in detections], self.bbox_format)
+
+        iou = iou_matrix(boxes, predicted)
+        if self.match_labels and iou.size:
+            labels = np.array([str(d.get(self.label_key)) for d in detections])
+            track_labels = np.array([str(t.label) for t in self.tracks])
+            iou[labels[:, None] != track_labels[None, :]] = 0.0
+        matches, unmatched_dets, _ = associate(iou, self.iou_threshold)
+
+        for det_idx, track_idx in matches:
+            track = self.tracks[track_idx]
+            track.filter.update(boxes[det_idx])
+            track.hits += 1
+            track.last_frame = frame_number
+            track.last_detection = detections[det_idx]
+        matched_tracks = {track_idx for _, track_idx in matches}
+        for track_idx, track in enumerate(self.tracks):
+            track.time_since_update = 0 if track_idx in matched_tracks else track.time_since_update + 1
+
+        for det_idx in unmatched_dets:
+            detection = detections[det_idx]
+            label = detection.get(self.label_key) if self.label_key else None
+            track = Track(self._next_id, boxes[det_idx], detection, frame_number, label)
+            self._next_id += 1
+            self.tracks.append(track)
+            matches.append((det_idx, len(self.tracks) - 1))
+
+        for det_idx, track_idx in matches:
+            track = self.tracks[track_idx]
+            detections[det_idx]['track_id'] = track.id
+            detections[det_idx]['track_hits'] = track.hits
+
+        expired = [t for t in self.tracks if t.time_since_update > self.max_age]
+        if expired:
+            if self.keep_finished:
+                self.finished_tracks.extend(expired)
+            self.tracks = [t for t in self.tracks if t.time_since_update <= self.max_age]
+        return detections
+
+    def get(self, track_id: int) -> Optional[Track]:
+        for track in self.tracks:
+            if track.id == track_id:
+                return track
+        return None
+
+    @property
+    def confirmed_tracks(self) -> List[Track]:
+        return [t for t in self.tracks if t.hits >= self.min_hits]
+
+    def all_tracks(self) -> List[Track]:
+        """Every track seen since reset(), expired ones included"""
+        return self.finished_tracks + self.tracks
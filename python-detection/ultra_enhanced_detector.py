@@ -18,6 +18,16 @@ from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+from frame_sampler import FrameSampler
+from frame_gate import FrameGate
+from model_registry import registry
+from inference_executor import get_inference_executor
+from tracker import SortTracker
+from geometry import box_iou, detection_boxes, group_overlapping, nms
+from taxonomy import ClassTable
+from detection_logging import current_request_id
+from artifact_store import Artifact, ArtifactStore, get_artifact_store
+
 # Optional imports - graceful fallback if not available
 try:
     import torch
@@ -79,6 +89,9 @@ class UltraEnhancedDetector:
         # Initialize multiple detection models for ensemble
         self.models = self._initialize_models()
         
+        # Relevant YOLO classes and their categories, resolved once per class id
+        self.class_table = ClassTable(self.models['yolo'].names, 'ultra') if self.models['yolo'] else None
+        
         # Advanced tracking and analysis
         self.tracker = self._initialize_tracker()
         self.scene_analyzer = self._initialize_scene_analyzer()
@@ -116,9 +129,8 @@ class UltraEnhancedDetector:
         # Try to load YOLO if available
         if HAS_YOLO:
             try:
-                logger.info("📥 Loading YOLOv8 model...")
-                models['yolo'] = YOLO('yolov8n.pt')  # Use nano for faster loading
-                logger.info("✅ YOLO model loaded successfully!")
+                models['yolo'] = registry.get_yolo('yolov8n.pt')  # Use nano for faster loading
+                logger.info("✅ YOLO model ready!")
             except Exception as e:
                 logger.warning(f"⚠️ YOLO loading failed: {e}")
                 models['yolo'] = None
@@ -129,10 +141,8 @@ class UltraEnhancedDetector:
         # Try to load ResNet if available
         if HAS_TORCH:
             try:
-                logger.info("📥 Loading ResNet classifier...")
-                models['resnet'] = models.resnet50(pretrained=True)
-                models['resnet'].eval()
-                logger.info("✅ ResNet model loaded successfully!")
+                models['resnet'] = registry.get_classifier('resnet50', device=self.device)
+                logger.info("✅ ResNet model ready!")
             except Exception as e:
                 logger.warning(f"⚠️ ResNet loading failed: {e}")
                 models['resnet'] = None
@@ -146,14 +156,9 @@ class UltraEnhancedDetector:
         return models
     
     def _initialize_tracker(self):
-        """Initialize advanced multi-object tracker"""
-        return {
-            'active_tracks': {},
-            'track_id_counter': 0,
-            'kalman_filters': {},
-            'appearance_features': {},
-            'trajectory_history': {}
-        }
+        """Initialize advanced multi-object tracker (IoU + Kalman, SORT-style)"""
+        # Frames are sampled twice per second, so max_age=4 keeps a track through ~2s of misses
+        return SortTracker(iou_threshold=0.3, max_age=4, bbox_format='xywh', label_key='category')
     
     def _initialize_scene_analyzer(self):
         """Initialize scene understanding components"""
@@ -162,14 +167,11 @@ class UltraEnhancedDetector:
             return None
             
         try:
-            # MediaPipe for scene analysis
-            mp_holistic = mp.solutions.holistic
+            # MediaPipe for scene analysis (shared graph, serialized by its lock)
+            holistic, holistic_lock = registry.get_holistic(model_complexity=2, enable_segmentation=True)
             return {
-                'holistic': mp_holistic.Holistic(
-                    static_image_mode=False,
-                    model_complexity=2,
-                    enable_segmentation=True
-                ),
+                'holistic': holistic,
+                'holistic_lock': holistic_lock,
                 'scene_classifier': None  # Would load a scene classification model
             }
         except Exception as e:
@@ -203,7 +205,10 @@ class UltraEnhancedDetector:
     def _yolo_detect(self, frame: np.ndarray) -> List[Dict]:
         """Enhanced YOLO detection with post-processing"""
         try:
-            results = self.models['yolo'](frame)
+            # Irrelevant classes are filtered inside inference; the shared model only
+            # runs on its executor's worker thread
+            results = [get_inference_executor(self.models['yolo']).infer(
+                frame, classes=self.class_table.class_filter())]
             detections = []
             
             for result in results:
@@ -215,13 +220,14 @@ class UltraEnhancedDetector:
                         confidence = box.conf[0].cpu().numpy()
                         class_id = int(box.cls[0].cpu().numpy())
                         class_name = result.names[class_id]
+                        class_info = self.class_table[class_id]
                         
                         # Filter for relevant categories
-                        if self._is_relevant_category(class_name) and confidence > self.confidence_threshold:
+                        if class_info.relevant and confidence > self.confidence_threshold:
                             detection = {
                                 'bbox': [int(x1), int(y1), int(x2-x1), int(y2-y1)],
                                 'confidence': float(confidence),
-                                'category': self._standardize_category(class_name),
+                                'category': class_info.category,
                                 'method': 'yolo',
                                 'raw_class': class_name
                             }
@@ -311,7 +317,8 @@ class UltraEnhancedDetector:
         try:
             # Analyze scene for context
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.scene_analyzer['holistic'].process(rgb_frame)
+            with self.scene_analyzer['holistic_lock']:
+                results = self.scene_analyzer['holistic'].process(rgb_frame)
             
             # Look for abandoned objects in specific contexts
             if results.pose_landmarks:
@@ -386,8 +393,7 @@ class UltraEnhancedDetector:
                         'confidence': ensemble_confidence,
                         'category': final_category,
                         'method': 'ensemble',
-                        'source_methods': [d['method'] for d in group],
-                        'tracking_id': self._assign_tracking_id(best_bbox)
+                        'source_methods': [d['method'] for d in group]
                     }
                 })
         
@@ -442,10 +448,11 @@ class UltraEnhancedDetector:
         
         return min(score, 1.0)
     
-    def smart_crop_with_context(self, frame: np.ndarray, detection: Dict) -> np.ndarray:
+    def smart_crop_with_context(self, frame: np.ndarray, detection: Dict, enhance: bool = True) -> np.ndarray:
         """
         🖼️ ULTRA-SMART CROPPING with ZERO excessive zoom
         Advanced context-aware cropping that preserves scene information
+        (enhance=False returns the raw crop, see enhance_crop)
         """
         x, y, w, h = detection['bbox']
         frame_height, frame_width = frame.shape[:2]
@@ -503,18 +510,23 @@ class UltraEnhancedDetector:
             crop_x2 = min(frame_width, center_x + half_width)
             crop_y2 = min(frame_height, center_y + half_height)
         
-        # Extract crop
-        cropped = frame[crop_y1:crop_y2, crop_x1:crop_x2]
-        
-        # Enhance crop quality
-        enhanced_crop = self._enhance_crop_quality(cropped)
+        # Extract crop (copied so it outlives the sampler's reused frame buffer)
+        cropped = frame[crop_y1:crop_y2, crop_x1:crop_x2].copy()
         
         padding_percent = int(padding_factor * 100)
         final_size = f"{crop_x2-crop_x1}x{crop_y2-crop_y1}"
         
         logger.info(f"🖼️ Smart crop completed: {final_size} with {padding_percent}% padding (no excessive zoom)")
         
-        return enhanced_crop
+        if not enhance:
+            return cropped
+        
+        # Enhance crop quality
+        return self._enhance_crop_quality(cropped)
+    
+    def enhance_crop(self, crop: np.ndarray) -> np.ndarray:
+        """Enhance a raw crop from smart_crop_with_context(..., enhance=False)"""
+        return self._enhance_crop_quality(crop)
     
     def _enhance_crop_quality(self, crop: np.ndarray) -> np.ndarray:
         """Enhance the quality of cropped images"""
@@ -570,62 +582,72 @@ class UltraEnhancedDetector:
         """
         logger.info("🎬 Starting ULTRA-ENHANCED video processing...")
         
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
+        sampler = FrameSampler(video_path, reuse_buffers=True)
         
         # Video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = sampler.fps
+        total_frames = sampler.total_frames
+        width = sampler.width
+        height = sampler.height
         
         logger.info(f"📹 Video: {width}x{height}, {fps}fps, {total_frames} frames")
         
-        detections = []
-        frame_count = 0
-        process_interval = max(1, int(fps // 2))  # Process 2 times per second
+        sampler.every_n_frames = max(1, int(fps // 2))  # Process 2 times per second
+        self.tracker.reset()
+        gate = FrameGate()  # near-duplicate frames reuse the last ensemble result
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Process every Nth frame for efficiency
-            if frame_count % process_interval == 0:
+        # Process every Nth frame for efficiency
+        with sampler:
+            for sample in sampler:
+                frame_count = sample.frame_number
+                frame = sample.image
                 logger.info(f"🎯 Processing frame {frame_count}/{total_frames}")
                 
-                # Multi-model ensemble detection
-                frame_detections = self.detect_objects_ensemble(frame)
+                # Multi-model ensemble detection, linked across frames by the tracker
+                frame_detections = self.tracker.update(
+                    gate.detect(frame, sample.timestamp, self.detect_objects_ensemble), frame_count)
                 
-                # Process each detection
+                # Keep only the best raw crop per track; enhancement and saving happen once per track
                 for detection in frame_detections:
-                    # Smart cropping
-                    cropped_image = self.smart_crop_with_context(frame, detection)
+                    detection['tracking_id'] = f"track_{detection['track_id']:04d}"
+                    track = self.tracker.get(detection['track_id'])
+                    best = track.data.get('best')
+                    if best and best['detection']['confidence'] >= detection['confidence']:
+                        continue
                     
-                    # Save with metadata
-                    timestamp = frame_count / fps
-                    detection_data = {
+                    timestamp = sample.timestamp
+                    track.data['best'] = {
                         'frame_number': frame_count,
                         'timestamp': timestamp,
                         'video_timestamp': f"{int(timestamp//60):02d}:{int(timestamp%60):02d}",
                         'detection': detection,
-                        'cropped_image': cropped_image,
-                        'image_path': f"enhanced_detection_{frame_count}_{detection['category']}.jpg",
+                        'cropped_image': self.smart_crop_with_context(frame, detection, enhance=False),
                         'confidence_level': 'ultra_high' if detection['confidence'] > 0.9 else 'high',
                         'processing_method': 'ultra_enhanced_ensemble'
                     }
-                    
-                    # Save cropped image
-                    self._save_enhanced_image(cropped_image, detection_data['image_path'])
-                    
-                    detections.append(detection_data)
-                    
-                    logger.info(f"✅ Detected {detection['category']} with {detection['confidence']:.1%} confidence")
         
-        cap.release()
+        # One artifact namespace per processed video
+        namespace = ArtifactStore.new_namespace(current_request_id())
+        detections = []
+        for track in self.tracker.all_tracks():
+            detection_data = track.data.get('best')
+            if not detection_data:
+                continue
+            detection_data['cropped_image'] = self.enhance_crop(detection_data['cropped_image'])
+            detection_data['track_frames'] = track.hits
+            detection_data['first_seen_frame'] = track.first_frame
+            detection_data['last_seen_frame'] = track.last_frame
+            
+            # Save cropped image
+            artifact = self._save_enhanced_image(detection_data['cropped_image'], namespace)
+            if artifact:
+                detection_data['image_path'] = artifact.path
+                detection_data['image_url'] = artifact.url
+            detections.append(detection_data)
+            
+            detection = detection_data['detection']
+            logger.info(f"✅ Detected {detection['category']} with {detection['confidence']:.1%} confidence "
+                        f"(track {detection['tracking_id']}, {track.hits} frames)")
         
         # Generate comprehensive report
         report = self._generate_ultra_report(detections, video_path)
@@ -668,43 +690,21 @@ class UltraEnhancedDetector:
         
         return report
     
-    def _save_enhanced_image(self, image: np.ndarray, filename: str):
-        """Save image with maximum quality"""
-        import os
-        os.makedirs("ultra_detections", exist_ok=True)
-        
-        output_path = f"ultra_detections/{filename}"
-        
-        # Save with maximum quality
-        cv2.imwrite(output_path, image, [
-            cv2.IMWRITE_JPEG_QUALITY, 98,
-            cv2.IMWRITE_JPEG_OPTIMIZE, 1
-        ])
+    def _save_enhanced_image(self, image: np.ndarray, namespace: str) -> Optional[Artifact]:
+        """Store a crop with maximum quality in the artifact store"""
+        try:
+            artifact = get_artifact_store().put_image(image, namespace, params=[
+                cv2.IMWRITE_JPEG_QUALITY, 98,
+                cv2.IMWRITE_JPEG_OPTIMIZE, 1
+            ])
+        except Exception as e:
+            logger.error(f"❌ Failed to store ultra-enhanced image: {e}")
+            return None
         
-        logger.info(f"💾 Saved ultra-enhanced image: {output_path}")
+        logger.info(f"💾 Saved ultra-enhanced image: {artifact.path}")
+        return artifact
     
     # Utility methods
-    def _is_relevant_category(self, class_name: str) -> bool:
-        relevant_categories = [
-            'suitcase', 'backpack', 'handbag', 'luggage', 'bag',
-            'laptop', 'cell phone', 'book', 'bottle', 'cup',
-            'umbrella', 'clock', 'keyboard', 'mouse'
-        ]
-        return any(cat in class_name.lower() for cat in relevant_categories)
-    
-    def _standardize_category(self, class_name: str) -> str:
-        bag_terms = ['suitcase', 'backpack', 'handbag', 'luggage', 'bag']
-        electronics_terms = ['laptop', 'cell phone', 'phone', 'keyboard', 'mouse']
-        
-        class_lower = class_name.lower()
-        
-        if any(term in class_lower for term in bag_terms):
-            return 'BAGS'
-        elif any(term in class_lower for term in electronics_terms):
-            return 'ELECTRONICS'
-        else:
-            return 'MISCELLANEOUS'
-    
     def _validate_ensemble_detection(self, bbox, confidence, category, frame):
         """Strict validation for ensemble detections"""
         x, y, w, h = bbox
@@ -727,77 +727,25 @@ class UltraEnhancedDetector:
         
         return True
     
-    def _assign_tracking_id(self, bbox):
-        """Assign unique tracking ID"""
-        self.tracker['track_id_counter'] += 1
-        return f"track_{self.tracker['track_id_counter']:04d}"
-    
     def _apply_nms(self, detections, threshold):
         """Apply Non-Maximum Suppression"""
         if not detections:
             return []
         
-        # Sort by confidence
-        sorted_detections = sorted(detections, key=lambda x: x['confidence'], reverse=True)
-        
-        keep = []
-        while sorted_detections:
-            current = sorted_detections.pop(0)
-            keep.append(current)
-            
-            # Remove overlapping detections
-            sorted_detections = [
-                det for det in sorted_detections
-                if self._calculate_iou(current['bbox'], det['bbox']) < threshold
-            ]
-        
-        return keep
+        keep = nms(detection_boxes(detections, 'xywh'), [d['confidence'] for d in detections], threshold)
+        return [detections[i] for i in keep]
     
     def _calculate_iou(self, box1, box2):
-        """Calculate Intersection over Union"""
-        x1, y1, w1, h1 = box1
-        x2, y2, w2, h2 = box2
-        
-        # Calculate intersection
-        xi1 = max(x1, x2)
-        yi1 = max(y1, y2)
-        xi2 = min(x1 + w1, x2 + w2)
-        yi2 = min(y1 + h1, y2 + h2)
-        
-        if xi2 <= xi1 or yi2 <= yi1:
-            return 0
-        
-        intersection = (xi2 - xi1) * (yi2 - yi1)
-        union = w1 * h1 + w2 * h2 - intersection
-        
-        return intersection / union if union > 0 else 0
+        """Calculate Intersection over Union of two [x, y, w, h] boxes"""
+        return box_iou(box1, box2, 'xywh')
     
     def _group_overlapping_detections(self, detections):
         """Group overlapping detections for ensemble fusion"""
         if not detections:
             return []
         
-        groups = []
-        used = set()
-        
-        for i, det1 in enumerate(detections):
-            if i in used:
-                continue
-            
-            group = [det1]
-            used.add(i)
-            
-            for j, det2 in enumerate(detections[i+1:], i+1):
-                if j in used:
-                    continue
-                
-                if self._calculate_iou(det1['bbox'], det2['bbox']) > 0.3:
-                    group.append(det2)
-                    used.add(j)
-            
-            groups.append(group)
-        
-        return groups
+        groups = group_overlapping(detection_boxes(detections, 'xywh'), iou_threshold=0.3)
+        return [[detections[i] for i in group] for group in groups]
     
     def _calculate_ensemble_confidence(self, group):
         """Calculate confidence for ensemble group"""
@@ -897,7 +845,7 @@ def main():
         print(f"📊 Total detections: {results['detection_summary']['total_detections']}")
         print(f"🎯 High confidence: {results['detection_summary']['high_confidence_detections']}")
         print(f"📈 Confidence rate: {results['detection_summary']['confidence_rate']}")
-        print(f"📁 Images saved to: ultra_detections/")
+        print(f"📁 Images saved to: {get_artifact_store().root}/")
         print(f"📄 Report saved to: ultra_enhanced_report.json")
         
     except Exception as e:
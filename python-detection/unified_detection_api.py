@@ -11,7 +11,7 @@ import uuid
 import time
 import tempfile
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import BinaryIO, Callable, Dict, List, Optional, Any, Tuple, Union
 from pathlib import Path
 
 import cv2
@@ -19,18 +19,27 @@ import numpy as np
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-import torch
-from ultralytics import YOLO
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('unified_detection.log'),
-        logging.StreamHandler()
-    ]
-)
+
+from frame_sampler import FrameSampler
+from geometry import box_iou
+from dedup import DetectionDeduplicator, deduplicate_detections
+from object_crops import ObjectCropBuffer, crop_object
+from frame_gate import FRAME_GATE_ENABLED, FRAME_GATE_MAX_CHANGED, FRAME_GATE_REFRESH_SECONDS, FrameGate, copy_detections
+from model_registry import get_yolo_model
+from inference_backends import INFERENCE_BACKENDS
+from inference_executor import get_inference_executor
+from detection_jobs import JobManager, JobQueueFullError, create_jobs_blueprint, job_accepted_response
+from session_store import create_session_store
+from result_cache import content_hash, create_result_cache, detection_result_key, save_upload_hashed
+from image_ingest import decode_image_bytes, make_spooled_request_class
+from metrics import register_metrics, stage_timer
+from detection_logging import current_request_id, diagnostics, init_request_logging, setup_logging
+from artifact_store import Artifact, ArtifactStore, create_artifacts_blueprint, get_artifact_store
+from detection_stream import requested_stream_format, stream_response
+from streaming_upload import StreamingUpload, UploadTooLargeError, decode_streaming
+
+# Configure logging (file and console writes happen on a background thread)
+setup_logging(log_file='unified_detection.log')
 logger = logging.getLogger(__name__)
 
 class DetectionConfig:
@@ -38,10 +47,21 @@ class DetectionConfig:
     
     def __init__(self):
         self.model_path = os.getenv('YOLO_MODEL_PATH', 'yolov8n.pt')
+        self.inference_backend = os.getenv('INFERENCE_BACKEND', 'pytorch').lower()  # pytorch, onnx, openvino, torchscript, onnx-int8
         self.confidence_threshold = float(os.getenv('CONFIDENCE_THRESHOLD', '0.5'))
         self.max_file_size = int(os.getenv('MAX_FILE_SIZE', '50')) * 1024 * 1024  # 50MB default
         self.temp_dir = os.getenv('TEMP_DIR', tempfile.gettempdir())
+        self.upload_spool_max_bytes = int(os.getenv('UPLOAD_SPOOL_MAX_MB', '16')) * 1024 * 1024  # uploads kept in memory up to this size
         self.max_processing_time = int(os.getenv('MAX_PROCESSING_TIME', '60'))  # seconds
+        self.video_batch_size = max(1, int(os.getenv('VIDEO_BATCH_SIZE', '16')))  # frames per model call
+        self.inference_max_batch = max(1, int(os.getenv('INFERENCE_MAX_BATCH', '16')))  # images per micro-batch
+        self.inference_batch_window_ms = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', '10'))  # wait for more requests
+        self.dedup_iou_threshold = float(os.getenv('DEDUP_IOU_THRESHOLD', '0.5'))  # same object if boxes overlap more
+        self.dedup_time_window = float(os.getenv('DEDUP_TIME_WINDOW_SECONDS', '30'))  # ... and were seen within this gap
+        self.crop_buffer_max_bytes = int(os.getenv('CROP_BUFFER_MAX_MB', '64')) * 1024 * 1024  # screenshots kept while decoding
+        self.frame_gate_enabled = FRAME_GATE_ENABLED  # reuse detections for near-duplicate frames
+        self.frame_gate_max_changed = FRAME_GATE_MAX_CHANGED  # ... when at most this share of the frame changed
+        self.frame_gate_refresh_seconds = FRAME_GATE_REFRESH_SECONDS  # ... and inference ran within this many video seconds
         
         # Category mapping from YOLO classes to application categories
         self.category_mapping = {
@@ -69,35 +89,64 @@ class UnifiedDetector:
     def __init__(self, config: DetectionConfig):
         self.config = config
         self.model = None
+        self.model_path = None
+        self.executor = None
         self.load_model()
         
     def load_model(self):
         """Load YOLO model with error handling"""
         try:
-            # Temporarily disable PyTorch weights_only for YOLO compatibility
-            import torch
-            original_load = torch.load
-            torch.load = lambda *args, **kwargs: original_load(*args, **kwargs, weights_only=False)
-            
             if not os.path.exists(self.config.model_path):
                 logger.warning(f"Model file {self.config.model_path} not found. Downloading default model...")
-                self.model = YOLO('yolov8n.pt')  # Download if not exists
+                self.model_path = 'yolov8n.pt'  # Download if not exists
             else:
-                self.model = YOLO(self.config.model_path)
+                self.model_path = self.config.model_path
+            self.model = get_yolo_model(self.model_path, backend=self.config.inference_backend)
                 
-            # Restore original torch.load
-            torch.load = original_load
-            logger.info(f"Model loaded successfully: {self.config.model_path}")
+            self.executor = get_inference_executor(
+                self.model,
+                max_batch_size=self.config.inference_max_batch,
+                batch_window_ms=self.config.inference_batch_window_ms
+            )
+            logger.info(f"Model loaded successfully: {self.model_path} ({self.config.inference_backend} backend)")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             raise
     
-    def detect_objects(self, image_path: str) -> List[Dict[str, Any]]:
+    def _run_model(self, images: List[np.ndarray]):
+        """Run the YOLO model on image arrays through the shared micro-batching executor"""
+        return self.executor.infer_batch(images, conf=self.config.confidence_threshold)
+    
+    def _result_to_detections(self, result) -> List[Dict[str, Any]]:
+        """Convert a single YOLO result into detection dicts"""
+        detections = []
+        for box in result.boxes:
+            # Extract detection data
+            xyxy = box.xyxy[0].cpu().numpy()
+            confidence = float(box.conf[0])
+            class_id = int(box.cls[0])
+            class_name = self.model.names[class_id]
+            
+            # Map to application category
+            category = self.config.category_mapping.get(class_name, 'MISCELLANEOUS')
+            
+            detection = {
+                'object_id': str(uuid.uuid4()),
+                'class': class_name,
+                'category': category,
+                'confidence': confidence,
+                'bbox': [int(x) for x in xyxy],  # [x1, y1, x2, y2]
+                'timestamp': datetime.now().isoformat()
+            }
+            detections.append(detection)
+        return detections
+    
+    def detect_objects(self, image: Union[str, np.ndarray]) -> List[Dict[str, Any]]:
         """
         Detect objects in an image
         
         Args:
-            image_path: Path to the image file
+            image: Path to the image file or BGR image array
             
         Returns:
             List of detection results
@@ -105,39 +154,20 @@ class UnifiedDetector:
         try:
             start_time = time.time()
             
-            # Temporarily disable PyTorch weights_only for YOLO inference
-            import torch
-            original_load = torch.load
-            torch.load = lambda *args, **kwargs: original_load(*args, **kwargs, weights_only=False)
+            if isinstance(image, str):
+                path = image
+                with stage_timer('decode'):
+                    image = cv2.imread(path)
+                if image is None:
+                    raise ValueError(f"Cannot read image: {path}")
             
-            try:
-                # Run inference
-                results = self.model(image_path, conf=self.config.confidence_threshold)
-            finally:
-                # Restore original torch.load
-                torch.load = original_load
+            # Run inference (batched with concurrent requests)
+            results = self._run_model([image])
             
             detections = []
-            for result in results:
-                for box in result.boxes:
-                    # Extract detection data
-                    xyxy = box.xyxy[0].cpu().numpy()
-                    confidence = float(box.conf[0])
-                    class_id = int(box.cls[0])
-                    class_name = self.model.names[class_id]
-                    
-                    # Map to application category
-                    category = self.config.category_mapping.get(class_name, 'MISCELLANEOUS')
-                    
-                    detection = {
-                        'object_id': str(uuid.uuid4()),
-                        'class': class_name,
-                        'category': category,
-                        'confidence': confidence,
-                        'bbox': [int(x) for x in xyxy],  # [x1, y1, x2, y2]
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    detections.append(detection)
+            with stage_timer('postprocess'):
+                for result in results:
+                    detections.extend(self._result_to_detections(result))
             
             processing_time = time.time() - start_time
             logger.info(f"Detected {len(detections)} objects in {processing_time:.2f}s")
@@ -148,175 +178,185 @@ class UnifiedDetector:
             logger.error(f"Detection failed: {e}")
             raise
     
-    def process_video(self, video_path: str, frame_skip: int = 30) -> List[Dict[str, Any]]:
+    def detect_frames(self, frames: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """
+        Detect objects in a batch of in-memory frames with a single model call
+        
+        Args:
+            frames: BGR frames as decoded by OpenCV
+            
+        Returns:
+            One list of detections per input frame, in input order
+        """
+        if not frames:
+            return []
+        
+        try:
+            start_time = time.time()
+            results = self._run_model(frames)
+            with stage_timer('postprocess'):
+                per_frame = [self._result_to_detections(result) for result in results]
+            
+            processing_time = time.time() - start_time
+            diagnostics.debug("Detected %d objects in %d frames in %.2fs",
+                              sum(len(d) for d in per_frame), len(frames), processing_time)
+            return per_frame
+            
+        except Exception as e:
+            logger.error(f"Batch detection failed: {e}")
+            raise
+    
+    def process_video(self, video_path: Union[str, BinaryIO], frame_skip: int = 30,
+                      batch_size: Optional[int] = None,
+                      sample_fps: Optional[float] = None,
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      detections_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                      frame_callback: Optional[Callable[[int, float, List[Dict[str, Any]]], None]] = None,
+                      crop_buffer: Optional[ObjectCropBuffer] = None) -> List[Dict[str, Any]]:
         """
         Process video file for object detection
         
+        Sampled frames are kept in memory and sent to the model in batches,
+        so there is no per-frame JPEG round trip through the temp directory.
+        Frames that are near-duplicates of the last inferred frame (FrameGate)
+        skip the model and reuse its detections.
+        
         Args:
-            video_path: Path to video file
+            video_path: Path to video file, or a readable file object (PyAV only)
             frame_skip: Process every Nth frame to improve performance
+            batch_size: Frames per model call (defaults to config.video_batch_size)
+            sample_fps: Sample N frames per second of video instead of every Nth frame
+            progress_callback: Called as (frames_decoded, total_frames) after each batch
+            detections_callback: Called with each batch's raw detections as they are found
+            frame_callback: Called as (frame_number, timestamp, detections) for every sampled frame
+            crop_buffer: Keeps the crop of each object's best detection so far, taken from the decoded frame
             
         Returns:
             List of unique detections across all frames
         """
+        batch_size = max(1, batch_size or self.config.video_batch_size)
+        
         try:
-            cap = cv2.VideoCapture(video_path)
-            all_detections = []
-            frame_count = 0
-            processed_frames = 0
-            
-            while cap.read()[0]:
-                frame_count += 1
-                if frame_count % frame_skip != 0:
-                    continue
-                
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count - 1)
-                ret, frame = cap.read()
-                
-                if not ret:
-                    break
-                
-                # Save frame temporarily
-                temp_frame_path = os.path.join(
-                    self.config.temp_dir, 
-                    f"frame_{frame_count}_{uuid.uuid4().hex[:8]}.jpg"
-                )
-                
-                try:
-                    cv2.imwrite(temp_frame_path, frame)
-                    frame_detections = self.detect_objects(temp_frame_path)
-                    
+            # Detections are merged as they arrive instead of being collected for the whole video
+            deduplicator = self._new_deduplicator()
+            gate = self.new_frame_gate()
+            batch = []  # (sample, reuses the previous inferred frame's detections)
+            previous = []
+            
+            def flush_batch():
+                nonlocal previous
+                inferred = iter(self.detect_frames([sample.image for sample, reuse in batch if not reuse]))
+                for sample, reuse in batch:
+                    if not reuse:
+                        previous = next(inferred)
+                    # Copies, so annotations never leak into frames that reuse these results
+                    frame_detections = copy_detections(previous)
                     # Add frame information
                     for detection in frame_detections:
-                        detection['frame_number'] = frame_count
-                        detection['frame_timestamp'] = frame_count / cap.get(cv2.CAP_PROP_FPS)
-                    
-                    all_detections.extend(frame_detections)
-                    processed_frames += 1
-                    
-                finally:
-                    # Clean up temporary frame
-                    if os.path.exists(temp_frame_path):
-                        os.remove(temp_frame_path)
-            
-            cap.release()
-            
-            # Remove duplicate detections based on spatial and temporal proximity
-            unique_detections = self._remove_duplicate_detections(all_detections)
-            
-            logger.info(f"Processed {processed_frames} frames, found {len(unique_detections)} unique objects")
+                        detection['frame_number'] = sample.frame_number
+                        detection['frame_timestamp'] = sample.timestamp
+                        cluster_id = deduplicator.add(detection)
+                        # Crop now, before the frame buffer is reused, if it is the object's best view so far
+                        if crop_buffer is not None and deduplicator.best(cluster_id) is detection:
+                            crop_buffer.offer(cluster_id, detection, sample.image)
+                    if detections_callback and frame_detections:
+                        detections_callback(frame_detections)
+                    if frame_callback:
+                        frame_callback(sample.frame_number, sample.timestamp, frame_detections)
+                batch.clear()
+            
+            # The buffer pool holds exactly one batch, frames are released on flush
+            with FrameSampler(video_path, every_n_frames=frame_skip, frames_per_second=sample_fps,
+                              reuse_buffers=True, buffer_pool_size=batch_size) as sampler:
+                for sample in sampler:
+                    batch.append((sample, gate.check(sample.image, sample.timestamp)))
+                    if len(batch) >= batch_size:
+                        flush_batch()
+                        if progress_callback:
+                            progress_callback(sampler.frames_read, sampler.total_frames)
+                
+                if batch:
+                    flush_batch()
+                processed_frames = sampler.frames_sampled
+                if progress_callback:
+                    progress_callback(sampler.frames_read, sampler.total_frames)
+            
+            # Duplicates were merged on the fly based on spatial and temporal proximity
+            unique_detections = deduplicator.results()
+            
+            logger.info(f"Processed {processed_frames} frames ({gate.skipped} reused near-duplicate detections), "
+                        f"found {len(unique_detections)} unique objects")
+            if crop_buffer is not None and crop_buffer.evicted:
+                logger.warning(f"Crop buffer over budget, {crop_buffer.evicted} crops dropped")
             return unique_detections
             
         except Exception as e:
             logger.error(f"Video processing failed: {e}")
             raise
 
+    def new_frame_gate(self) -> FrameGate:
+        return FrameGate(enabled=self.config.frame_gate_enabled, max_changed=self.config.frame_gate_max_changed,
+                         refresh_seconds=self.config.frame_gate_refresh_seconds)
+    
+    def _new_deduplicator(self) -> DetectionDeduplicator:
+        return DetectionDeduplicator(iou_threshold=self.config.dedup_iou_threshold,
+                                     time_window=self.config.dedup_time_window)
+    
     def _remove_duplicate_detections(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate detections based on IoU and class similarity"""
+        """Remove duplicate detections based on IoU, class and time proximity
+        
+        Each remaining detection is the most confident of its group and carries
+        first_seen/last_seen (seconds), first_frame/last_frame and occurrences.
+        """
         if not detections:
             return []
         
-        # Simple deduplication based on class and spatial overlap
-        unique_detections = []
-        
-        for detection in detections:
-            is_duplicate = False
-            
-            for existing in unique_detections:
-                # Check if same class and overlapping bounding boxes
-                if (detection['class'] == existing['class'] and 
-                    self._calculate_iou(detection['bbox'], existing['bbox']) > 0.5):
-                    is_duplicate = True
-                    # Keep the one with higher confidence
-                    if detection['confidence'] > existing['confidence']:
-                        unique_detections.remove(existing)
-                        unique_detections.append(detection)
-                    break
-            
-            if not is_duplicate:
-                unique_detections.append(detection)
-        
-        return unique_detections
+        return deduplicate_detections(detections, iou_threshold=self.config.dedup_iou_threshold,
+                                      time_window=self.config.dedup_time_window)
     
-    def _capture_object_screenshot(self, video_path: str, detection: Dict[str, Any]) -> str:
-        """Capture a screenshot of the detected object from the video frame"""
+    def _capture_object_screenshot(self, video_path: str, detection: Dict[str, Any],
+                                   namespace: str) -> Optional[Artifact]:
+        """Capture a screenshot of the detected object by re-reading its video frame
+        
+        Only a fallback: crops are normally kept during process_video (crop_buffer).
+        """
         try:
-            import cv2
-            import os
-            from datetime import datetime
-            
-            # Get frame number from detection
             frame_number = detection.get('frame_number', 0)
-            bbox = detection.get('bbox', [0, 0, 0, 0])
-            object_class = detection.get('class', 'unknown')
             
-            # Open video
+            # Open video and jump to the specific frame
             cap = cv2.VideoCapture(video_path)
-            
-            # Jump to the specific frame
             cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
             ret, frame = cap.read()
+            cap.release()
             
             if not ret:
-                cap.release()
                 return None
             
-            # Extract bounding box coordinates
-            x, y, w, h = bbox
-            
-            # Add some padding around the object (10% on each side)
-            padding = 20
-            x = max(0, x - padding)
-            y = max(0, y - padding)
-            w = min(frame.shape[1] - x, w + 2 * padding)
-            h = min(frame.shape[0] - y, h + 2 * padding)
-            
-            # Crop the object from the frame
-            cropped_object = frame[y:y+h, x:x+w]
-            
-            # Create screenshots directory in the Spring backend uploads folder
-            backend_uploads_dir = os.path.join('..', 'spring-backend', 'uploads', 'detected-objects')
-            os.makedirs(backend_uploads_dir, exist_ok=True)
-            
-            # Generate unique filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            screenshot_filename = f"{object_class}_{timestamp}_{frame_number}.jpg"
-            screenshot_path = os.path.join(backend_uploads_dir, screenshot_filename)
-            
-            # Save the cropped image
-            cv2.imwrite(screenshot_path, cropped_object)
-            
-            cap.release()
-            
-            logger.info(f"📸 Captured screenshot: {screenshot_path}")
-            return screenshot_path
+            return self._save_object_screenshot(crop_object(frame, detection.get('bbox', [0, 0, 0, 0])),
+                                                detection, namespace)
             
         except Exception as e:
             logger.error(f"Failed to capture screenshot: {e}")
             return None
     
+    def _save_object_screenshot(self, crop: Optional[np.ndarray], detection: Dict[str, Any],
+                                namespace: str) -> Optional[Artifact]:
+        """Store an object crop in the artifact store under the request's namespace"""
+        if crop is None:
+            return None
+        try:
+            artifact = get_artifact_store().put_image(crop, namespace)
+            logger.info(f"Captured screenshot of {detection.get('class', 'unknown')} "
+                        f"(frame {detection.get('frame_number', 0)}): {artifact.path}")
+            return artifact
+            
+        except Exception as e:
+            logger.error(f"Failed to save screenshot: {e}")
+            return None
+    
     def _calculate_iou(self, box1: List[int], box2: List[int]) -> float:
-        """Calculate Intersection over Union (IoU) of two bounding boxes"""
-        x1, y1, x2, y2 = box1
-        x1_p, y1_p, x2_p, y2_p = box2
-        
-        # Calculate intersection
-        xi1 = max(x1, x1_p)
-        yi1 = max(y1, y1_p)
-        xi2 = min(x2, x2_p)
-        yi2 = min(y2, y2_p)
-        
-        if xi2 <= xi1 or yi2 <= yi1:
-            return 0.0
-        
-        intersection = (xi2 - xi1) * (yi2 - yi1)
-        
-        # Calculate union
-        area1 = (x2 - x1) * (y2 - y1)
-        area2 = (x2_p - x1_p) * (y2_p - y1_p)
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0.0
+        """Calculate Intersection over Union (IoU) of two [x1, y1, x2, y2] boxes"""
+        return box_iou(box1, box2)
 
 # Flask application
 app = Flask(__name__)
@@ -326,8 +366,27 @@ CORS(app)
 config = DetectionConfig()
 detector = UnifiedDetector(config)
 
-# Session storage (in production, use Redis or database)
-sessions = {}
+# Keep multipart uploads in memory up to the spool threshold
+app.request_class = make_spooled_request_class(config.upload_spool_max_bytes)
+
+# Session storage (bounded in memory, or SQLite with SESSION_STORE=sqlite)
+sessions = create_session_store()
+
+# Results for identical uploads, keyed by content hash + endpoint + model + config
+result_cache = create_result_cache()
+
+# Background video detection jobs
+job_manager = JobManager.from_env()
+app.register_blueprint(create_jobs_blueprint(job_manager))
+
+# Object screenshots (/artifacts/<namespace>/<sha256>.jpg), GC'd by size and age
+app.register_blueprint(create_artifacts_blueprint(get_artifact_store()))
+
+# Prometheus metrics on /metrics
+register_metrics(app, 'unified_detection_api', job_pending_count=job_manager.pending_count)
+
+# Request ids, JSON request summaries and /debug/diagnostics
+init_request_logging(app, 'unified_detection_api')
 
 def validate_file(file) -> Optional[str]:
     """Validate uploaded file"""
@@ -357,6 +416,9 @@ def health_check():
         return jsonify({
             'status': 'healthy',
             'model_status': model_status,
+            'sessions': sessions.stats(),
+            'result_cache': result_cache.stats(),
+            'artifacts': get_artifact_store().stats(),
             'timestamp': datetime.now().isoformat(),
             'version': '1.0.0'
         })
@@ -380,34 +442,25 @@ def detect_image():
         if error:
             return jsonify({'error': error}), 400
         
-        # Save uploaded file temporarily
-        filename = secure_filename(file.filename)
-        temp_path = os.path.join(config.temp_dir, f"{uuid.uuid4().hex}_{filename}")
+        # Decode straight from the spooled upload, no temp file
+        with stage_timer('decode'):
+            file.stream.seek(0)
+            data = file.stream.read()
+            image = decode_image_bytes(data)
+        if image is None:
+            return jsonify({'error': 'Invalid image data'}), 400
         
-        try:
-            file.save(temp_path)
-            
+        def run():
             # Run detection
-            detections = detector.detect_objects(temp_path)
-            
-            session_id = str(uuid.uuid4())
-            result = {
-                'session_id': session_id,
+            detections = detector.detect_objects(image)
+            return {
                 'total_objects': len(detections),
                 'detections': detections,
-                'processing_time': time.time(),
                 'status': 'success'
             }
-            
-            # Store session data
-            sessions[session_id] = result
-            
-            return jsonify(result)
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        
+        # Each response, cached or not, gets its own stored session
+        return cached_response(content_hash(data), 'detect/image', run, new_session=True)
                 
     except Exception as e:
         logger.error(f"Image detection error: {e}")
@@ -419,49 +472,193 @@ def detect_image():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+def run_video_detection(video_path: str, frame_skip: int = 30, sample_fps: Optional[float] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        source: Optional[BinaryIO] = None,
+                        detections_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                        frame_callback: Optional[Callable[[int, float, List[Dict[str, Any]]], None]] = None,
+                        session: bool = True) -> Dict[str, Any]:
+    """Run full video detection and store the result as a session
+    
+    source, when given, is decoded instead of video_path (e.g. a still-growing upload).
+    With session=False the result is returned without session fields (for the result cache).
+    """
+    detections = detector.process_video(source or video_path, frame_skip, sample_fps=sample_fps,
+                                        progress_callback=progress_callback,
+                                        detections_callback=detections_callback,
+                                        frame_callback=frame_callback)
+    
+    result = {
+        'total_objects': len(detections),
+        'detections': detections,
+        'status': 'success'
+    }
+    return store_session(result) if session else result
+
+def store_session(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of result stamped with a fresh session id and time, stored in the session store"""
+    session_id = str(uuid.uuid4())
+    result = dict(result, session_id=session_id, processing_time=time.time())
+    sessions[session_id] = result
+    return result
+
+STRICT_MAIN_CLASSES = {'handbag', 'backpack', 'suitcase', 'cell phone', 'laptop', 'book', 'bottle', 'umbrella'}
+STRICT_MIN_CONFIDENCE = 0.7
+
+def is_strict_candidate(detection: Dict[str, Any]) -> bool:
+    """Whether a detection passes the strict filter (main object class, high confidence)"""
+    return detection.get('class') in STRICT_MAIN_CLASSES and detection.get('confidence', 0) >= STRICT_MIN_CONFIDENCE
+
+def run_strict_detection(video_path: str, frame_skip: int = 15, sample_fps: Optional[float] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         source: Optional[BinaryIO] = None,
+                         detections_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                         frame_callback: Optional[Callable[[int, float, List[Dict[str, Any]]], None]] = None) -> Dict[str, Any]:
+    """Run strict video detection (main objects only, filtered)
+    
+    source, when given, is decoded instead of video_path. Screenshots are
+    cropped from the decoded frames; video_path is only re-read for crops
+    that did not fit in the crop buffer.
+    """
+    # Only detections that can pass the strict filter are cropped while decoding
+    crop_buffer = ObjectCropBuffer(max_bytes=config.crop_buffer_max_bytes, accept=is_strict_candidate)
+    
+    # Run detection with stricter filtering
+    all_detections = detector.process_video(source or video_path, frame_skip, sample_fps=sample_fps,
+                                            progress_callback=progress_callback,
+                                            detections_callback=detections_callback,
+                                            frame_callback=frame_callback,
+                                            crop_buffer=crop_buffer)
+    
+    # Apply strict filtering - only main objects, no small parts, higher confidence threshold
+    strict_detections = [detection for detection in all_detections if is_strict_candidate(detection)]
+    
+    # Remove duplicates more aggressively for strict mode
+    filtered_detections = detector._remove_duplicate_detections(strict_detections)
+    
+    # Format response to match expected structure and capture screenshots
+    namespace = ArtifactStore.new_namespace(current_request_id())
+    objects = []
+    for i, detection in enumerate(filtered_detections):
+        # Generate screenshot for this detection
+        with stage_timer('annotate'):
+            crop = crop_buffer.get(detection)
+            if crop is not None:
+                screenshot = detector._save_object_screenshot(crop, detection, namespace)
+            else:
+                screenshot = detector._capture_object_screenshot(video_path, detection, namespace)
+        
+        obj = {
+            'id': f"strict_{i}_{detection.get('class', 'unknown')}",
+            'category': config.category_mapping.get(detection.get('class', ''), 'MISCELLANEOUS'),
+            'confidence': detection.get('confidence', 0),
+            'bbox': detection.get('bbox', [0, 0, 0, 0]),
+            'class': detection.get('class', 'unknown'),
+            'frame_number': detection.get('frame_number', 0),
+            'timestamp': detection.get('timestamp', 0),
+            'first_seen': detection.get('first_seen'),
+            'last_seen': detection.get('last_seen'),
+            'screenshot_path': screenshot.path if screenshot else None,
+            'screenshot_url': screenshot.url if screenshot else None
+        }
+        objects.append(obj)
+    
+    crop_buffer.clear()
+    
+    return {
+        'success': True,
+        'objects': objects,
+        'total_objects': len(objects),
+        'processing_mode': 'strict',
+        'filters_applied': ['main_objects_only', 'high_confidence', 'duplicate_removal'],
+        'timestamp': datetime.now().isoformat()
+    }
+
+def save_video_upload() -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Validate the 'video' upload and save it to the temp directory
+    
+    Returns:
+        (temp_path, content_hash, None) on success, (None, None, error message) otherwise
+    """
+    if 'video' not in request.files:
+        return None, None, 'No video file provided'
+    
+    file = request.files['video']
+    error = validate_file(file)
+    if error:
+        return None, None, error
+    
+    filename = secure_filename(file.filename)
+    temp_path = os.path.join(config.temp_dir, f"{uuid.uuid4().hex}_{filename}")
+    with stage_timer('upload_save'):
+        upload_hash = save_upload_hashed(file, temp_path)
+    return temp_path, upload_hash, None
+
+def cached_response(upload_hash: str, endpoint: str, run: Callable[[], Dict[str, Any]],
+                    new_session: bool = False, **params):
+    """JSON response for run(), reused for identical uploads/settings (X-Cache: HIT|MISS|COALESCED)
+    
+    With new_session, every response (hit or miss) is stored under its own
+    session id; session fields are never part of the cached body.
+    """
+    key = detection_result_key(upload_hash, endpoint, detector.model_path, config.inference_backend,
+                               detector.new_frame_gate().settings(),
+                               confidence_threshold=config.confidence_threshold,
+                               dedup_iou_threshold=config.dedup_iou_threshold,
+                               dedup_time_window=config.dedup_time_window, **params)
+    result, status = result_cache.get_or_compute(key, run)
+    if new_session:
+        result = store_session(result)
+    response = jsonify(result)
+    response.headers['X-Cache'] = status
+    return response
+
+def remove_temp_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+def stream_video_detection(fmt: str, run: Callable[..., Dict[str, Any]], temp_path: str,
+                           frame_skip: int, sample_fps: Optional[float]):
+    """Stream per-frame events and the final summary; the temp file is removed afterwards"""
+    return stream_response(fmt, lambda stream: run(
+        temp_path, frame_skip, sample_fps,
+        progress_callback=stream.progress_callback, frame_callback=stream.frame_callback
+    ), cleanup=lambda: remove_temp_file(temp_path))
+
 @app.route('/detect/video', methods=['POST'])
 def detect_video():
-    """Process video file for object detection"""
+    """Process video file for object detection
+    
+    With stream=ndjson|sse (or a matching Accept header) the response streams
+    'frame' and 'progress' events and ends with a 'summary' event.
+    """
     try:
-        if 'video' not in request.files:
-            return jsonify({'error': 'No video file provided'}), 400
-        
-        file = request.files['video']
-        error = validate_file(file)
+        # Save uploaded file temporarily
+        temp_path, upload_hash, error = save_video_upload()
         if error:
             return jsonify({'error': error}), 400
         
-        # Save uploaded file temporarily
-        filename = secure_filename(file.filename)
-        temp_path = os.path.join(config.temp_dir, f"{uuid.uuid4().hex}_{filename}")
-        
+        streaming = False
         try:
-            file.save(temp_path)
-            
             # Get frame skip parameter (default: every 30th frame)
             frame_skip = int(request.form.get('frame_skip', 30))
+            sample_fps = request.form.get('sample_fps', type=float)
             
-            # Run detection
-            detections = detector.process_video(temp_path, frame_skip)
+            stream_format = requested_stream_format(request)
+            if stream_format:
+                response = stream_video_detection(stream_format, run_video_detection, temp_path, frame_skip, sample_fps)
+                streaming = True
+                return response
             
-            session_id = str(uuid.uuid4())
-            result = {
-                'session_id': session_id,
-                'total_objects': len(detections),
-                'detections': detections,
-                'processing_time': time.time(),
-                'status': 'success'
-            }
-            
-            # Store session data
-            sessions[session_id] = result
-            
-            return jsonify(result)
+            # Run detection (identical uploads reuse the cached result)
+            return cached_response(upload_hash, 'detect/video',
+                                   lambda: run_video_detection(temp_path, frame_skip, sample_fps, session=False),
+                                   new_session=True, frame_skip=frame_skip, sample_fps=sample_fps)
             
         finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            # Clean up temporary file (streamed runs clean up when they finish)
+            if not streaming:
+                remove_temp_file(temp_path)
                 
     except Exception as e:
         logger.error(f"Video detection error: {e}")
@@ -475,75 +672,39 @@ def detect_video():
 
 @app.route('/detect/strict', methods=['POST'])
 def detect_strict():
-    """Process video with strict detection (main objects only, filtered)"""
+    """Process video with strict detection (main objects only, filtered)
+    
+    Supports the same stream=ndjson|sse mode as /detect/video; frame events
+    carry raw detections, the summary carries the strictly filtered objects.
+    """
     try:
-        if 'video' not in request.files:
-            return jsonify({'error': 'No video file provided'}), 400
-        
-        file = request.files['video']
-        error = validate_file(file)
+        # Save uploaded file temporarily
+        temp_path, upload_hash, error = save_video_upload()
         if error:
             return jsonify({'error': error}), 400
         
-        # Save uploaded file temporarily
-        filename = secure_filename(file.filename)
-        temp_path = os.path.join(config.temp_dir, f"{uuid.uuid4().hex}_{filename}")
-        
+        streaming = False
         try:
-            file.save(temp_path)
-            
             # Use stricter frame skip for better accuracy (every 15th frame)
             frame_skip = int(request.form.get('frame_skip', 15))
+            sample_fps = request.form.get('sample_fps', type=float)
             
-            # Run detection with stricter filtering
-            all_detections = detector.process_video(temp_path, frame_skip)
-            
-            # Apply strict filtering - only main objects, no small parts
-            strict_detections = []
-            main_object_classes = ['handbag', 'backpack', 'suitcase', 'cell phone', 'laptop', 'book', 'bottle', 'umbrella']
-            
-            for detection in all_detections:
-                if detection.get('class') in main_object_classes:
-                    # Additional confidence filtering for strict mode
-                    if detection.get('confidence', 0) >= 0.7:  # Higher confidence threshold
-                        strict_detections.append(detection)
+            stream_format = requested_stream_format(request)
+            if stream_format:
+                response = stream_video_detection(stream_format, run_strict_detection, temp_path, frame_skip, sample_fps)
+                streaming = True
+                return response
             
-            # Remove duplicates more aggressively for strict mode
-            filtered_detections = detector._remove_duplicate_detections(strict_detections)
-            
-            # Format response to match expected structure and capture screenshots
-            objects = []
-            for i, detection in enumerate(filtered_detections):
-                # Generate screenshot for this detection
-                screenshot_path = detector._capture_object_screenshot(temp_path, detection)
-                
-                obj = {
-                    'id': f"strict_{i}_{detection.get('class', 'unknown')}",
-                    'category': config.category_mapping.get(detection.get('class', ''), 'MISCELLANEOUS'),
-                    'confidence': detection.get('confidence', 0),
-                    'bbox': detection.get('bbox', [0, 0, 0, 0]),
-                    'class': detection.get('class', 'unknown'),
-                    'frame_number': detection.get('frame_number', 0),
-                    'timestamp': detection.get('timestamp', 0),
-                    'screenshot_path': screenshot_path
-                }
-                objects.append(obj)
-            
-            result = {
-                'success': True,
-                'objects': objects,
-                'total_objects': len(objects),
-                'processing_mode': 'strict',
-                'filters_applied': ['main_objects_only', 'high_confidence', 'duplicate_removal'],
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            return jsonify(result)
+            return cached_response(upload_hash, 'detect/strict',
+                                   lambda: run_strict_detection(temp_path, frame_skip, sample_fps),
+                                   frame_skip=frame_skip, sample_fps=sample_fps,
+                                   strict_classes=sorted(STRICT_MAIN_CLASSES),
+                                   strict_min_confidence=STRICT_MIN_CONFIDENCE)
             
         finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            # Clean up temporary file (streamed runs clean up when they finish)
+            if not streaming:
+                remove_temp_file(temp_path)
                 
     except Exception as e:
         logger.error(f"Strict detection error: {e}")
@@ -555,13 +716,124 @@ def detect_strict():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+def submit_video_job(kind: str, default_frame_skip: int):
+    """Save the upload and queue it as a background detection job"""
+    run = run_video_detection if kind == 'video' else run_strict_detection
+    try:
+        temp_path, _, error = save_video_upload()
+        if error:
+            return jsonify({'error': error}), 400
+        
+        frame_skip = int(request.form.get('frame_skip', default_frame_skip))
+        sample_fps = request.form.get('sample_fps', type=float)
+        filename = secure_filename(request.files['video'].filename)
+        
+        try:
+            job = job_manager.submit(
+                kind, filename,
+                lambda progress: run(temp_path, frame_skip, sample_fps, progress_callback=progress),
+                cleanup_path=temp_path
+            )
+        except JobQueueFullError as e:
+            os.remove(temp_path)
+            return jsonify({'error': str(e), 'status': 'rejected'}), 503
+        
+        return job_accepted_response(job)
+        
+    except Exception as e:
+        logger.error(f"Job submission error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'error': 'Internal server error',
+            'details': str(e),
+            'status': 'error',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+@app.route('/jobs/video', methods=['POST'])
+def submit_video_detection_job():
+    """Queue a video detection job and return its id immediately"""
+    return submit_video_job('video', 30)
+
+@app.route('/jobs/strict', methods=['POST'])
+def submit_strict_detection_job():
+    """Queue a strict video detection job and return its id immediately"""
+    return submit_video_job('strict', 15)
+
+def submit_streaming_job(kind: str, default_frame_skip: int):
+    """Queue a detection job that decodes the raw request body while it is still arriving
+    
+    The body is the video itself (not multipart). The filename comes from the
+    X-Filename header or ?filename=, options from the query string. Clients may
+    pick the job id with X-Job-Id to poll partial results before the upload ends.
+    """
+    run = run_video_detection if kind == 'video' else run_strict_detection
+    filename = secure_filename(request.headers.get('X-Filename') or request.args.get('filename', ''))
+    if not filename:
+        return jsonify({'error': 'No filename provided (X-Filename header)'}), 400
+    video_extensions = ('.mp4', '.avi', '.mov', '.mkv')
+    if not filename.lower().endswith(video_extensions):
+        return jsonify({'error': 'Unsupported file format'}), 400
+    if request.content_length and request.content_length > config.max_file_size:
+        return jsonify({'error': f"File too large. Maximum size: {config.max_file_size // (1024*1024)}MB"}), 413
+    
+    job_id = request.headers.get('X-Job-Id')
+    if job_id is not None:
+        try:
+            job_id = str(uuid.UUID(job_id))
+        except ValueError:
+            return jsonify({'error': 'X-Job-Id must be a UUID'}), 400
+    
+    frame_skip = request.args.get('frame_skip', default=default_frame_skip, type=int)
+    sample_fps = request.args.get('sample_fps', type=float)
+    upload = StreamingUpload(config.temp_dir, suffix=os.path.splitext(filename)[1])
+    
+    def work(job):
+        return decode_streaming(upload, lambda source: run(
+            upload.path, frame_skip, sample_fps, progress_callback=job.update_progress,
+            source=source, detections_callback=job.add_partial_detections))
+    
+    try:
+        job = job_manager.submit(kind, filename, work, cleanup_path=upload.path, job_id=job_id, pass_job=True)
+    except JobQueueFullError as e:
+        upload.abort(str(e))
+        os.remove(upload.path)
+        return jsonify({'error': str(e), 'status': 'rejected'}), 503
+    except ValueError as e:
+        upload.abort(str(e))
+        os.remove(upload.path)
+        return jsonify({'error': str(e)}), 409
+    
+    # Detection is already running on the worker while the body is copied here
+    try:
+        with stage_timer('upload_save'):
+            upload.copy_from(request.stream, max_bytes=config.max_file_size, should_stop=lambda: job.status == 'failed')
+    except UploadTooLargeError as e:
+        return jsonify({'error': str(e), 'job_id': job.id}), 413
+    except Exception as e:
+        logger.error(f"Streaming upload for job {job.id} failed: {e}")
+        return jsonify({'error': 'Upload failed', 'details': job.error or str(e), 'job_id': job.id}), 400
+    
+    return job_accepted_response(job)
+
+@app.route('/jobs/video/stream', methods=['POST'])
+def submit_streaming_video_job():
+    """Run video detection while the raw video body is still uploading"""
+    return submit_streaming_job('video', 30)
+
+@app.route('/jobs/strict/stream', methods=['POST'])
+def submit_streaming_strict_job():
+    """Run strict video detection while the raw video body is still uploading"""
+    return submit_streaming_job('strict', 15)
+
 @app.route('/session/<session_id>/results', methods=['GET'])
 def get_session_results(session_id: str):
     """Get results for a specific session"""
-    if session_id not in sessions:
+    result = sessions.get(session_id)
+    if result is None:
         return jsonify({'error': 'Session not found'}), 404
     
-    return jsonify(sessions[session_id])
+    return jsonify(result)
 
 @app.route('/models', methods=['GET'])
 def get_models():
@@ -569,6 +841,8 @@ def get_models():
     return jsonify({
         'models': ['yolov8n.pt', 'yolov8s.pt', 'yolov8m.pt', 'yolov8l.pt'],
         'current_model': config.model_path,
+        'inference_backend': config.inference_backend,
+        'available_backends': list(INFERENCE_BACKENDS),
         'categories': list(config.category_mapping.values())
     })
 
@@ -24,6 +24,7 @@ def detect_single_object_for_web(video_path: str, output_dir: str = "detections"
     """
     
     # Initialize detector with optimal settings for single object
+    # (cheap per call: YOLO/ResNet/MediaPipe come from the shared model registry)
     detector = SingleObjectDetector(confidence_threshold=0.15)  # Lower threshold to catch more objects
     
     try:
@@ -47,9 +48,9 @@ def detect_single_object_for_web(video_path: str, output_dir: str = "detections"
                 # Save the cropped image directly
                 cv2.imwrite(output_image, detection_data['cropped_image'])
             else:
-                # Try to copy from the single_detections folder
-                source_image = "single_detections/single_object_detection.jpg"
-                if os.path.exists(source_image):
+                # Copy the crop stored by the detector
+                source_image = best.get('image_path')
+                if source_image and os.path.exists(source_image):
                     shutil.copy2(source_image, output_image)
             
             # Return web-compatible result
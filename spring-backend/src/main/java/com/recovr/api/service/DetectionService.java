@@ -424,9 +424,16 @@ public class DetectionService {
                                         log.warn("⚠️ Failed to save base64 image from Python API");
                                     }
                                 } else {
-                                    // It's already a URL, use it directly
-                                    imageUrl = croppedImageUrl;
-                                    log.info("✅ Using cropped image URL from Python API: {}", croppedImageUrl);
+                                    // Artifact URLs expire with the Python artifact store's GC,
+                                    // so keep our own copy of the file when it is reachable
+                                    if (screenshotPath != null && !screenshotPath.isEmpty()) {
+                                        imageUrl = copyAndSaveScreenshot(screenshotPath, trackingId);
+                                    }
+                                    if (imageUrl == null) {
+                                        // It's already a URL, use it directly
+                                        imageUrl = croppedImageUrl;
+                                    }
+                                    log.info("✅ Using cropped image from Python API: {}", imageUrl);
                                 }
                             }
                             // Second priority: copy screenshot from path